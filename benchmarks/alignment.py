@@ -0,0 +1,64 @@
+"""Speaker/word alignment on synthetic long recordings: legacy nested scan vs. interval sweep.
+
+Run from the repository root:
+
+    python -m benchmarks.alignment --hours 2
+"""
+import argparse
+import random
+import time
+
+from transcribers.alignment import Turn, Word, group_by_turn
+
+
+def synthetic_recording(hours: float, seed: int = 0):
+    rng = random.Random(seed)
+    duration = hours * 3600
+
+    turns, position = [], 0.0
+    while position < duration:
+        length = rng.uniform(1.0, 8.0)
+        turns.append(Turn(position, min(position + length, duration), f"SPEAKER_{rng.randint(0, 1)}"))
+        position += length + rng.uniform(0.0, 0.6)
+
+    words, position = [], 0.0
+    while position < duration:
+        length = rng.uniform(0.15, 0.6)
+        words.append(Word(position, min(position + length, duration), "word"))
+        position += length + rng.uniform(0.0, 0.2)
+
+    return turns, words
+
+
+def legacy_align(turns, words):
+    # The loop transcribe_and_diarize used before the sweep: every word is
+    # rescanned for every turn, and words crossing a boundary are dropped.
+    buckets = []
+    for turn in turns:
+        buckets.append([w for w in words if turn.start <= w.start and w.end <= turn.end])
+    return buckets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    turns, words = synthetic_recording(args.hours)
+    print(f"{len(turns)} turns, {len(words)} words")
+
+    start = time.perf_counter()
+    buckets = group_by_turn(turns, words)
+    sweep = time.perf_counter() - start
+    print(f"sweep:  {sweep * 1000:10.1f} ms, {sum(map(len, buckets))} words assigned")
+
+    if not args.skip_legacy:
+        start = time.perf_counter()
+        buckets = legacy_align(turns, words)
+        legacy = time.perf_counter() - start
+        print(f"legacy: {legacy * 1000:10.1f} ms, {sum(map(len, buckets))} words assigned ({legacy / sweep:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
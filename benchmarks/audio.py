@@ -0,0 +1,33 @@
+"""Deterministic speech-like test audio: 16 kHz mono 16-bit WAV with voiced bursts and pauses."""
+import io
+import math
+import random
+import wave
+from array import array
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_wav(seconds: float, seed: int = 0, sample_rate: int = SAMPLE_RATE) -> bytes:
+    rng = random.Random(seed)
+    samples = array("h")
+    total = int(seconds * sample_rate)
+    while len(samples) < total:
+        # A "word": a harmonic tone with a syllable-rate envelope, then a short gap.
+        length = int(rng.uniform(0.2, 0.7) * sample_rate)
+        pitch = rng.uniform(110, 240)
+        step = 2 * math.pi * pitch / sample_rate
+        for n in range(min(length, total - len(samples))):
+            envelope = math.sin(math.pi * n / length)
+            value = math.sin(step * n) + 0.4 * math.sin(2 * step * n) + 0.05 * rng.uniform(-1, 1)
+            samples.append(int(9000 * envelope * value))
+        gap = int(rng.choice((0.05, 0.1, 0.1, 0.6)) * sample_rate)
+        samples.extend([0] * min(gap, total - len(samples)))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
@@ -0,0 +1,71 @@
+"""Per-request SDK client construction vs. the shared core.clients registry.
+
+Run from the repository root:
+
+    python -m benchmarks.client_setup --iterations 50
+
+Only clients whose SDKs are installed are measured. Google clients are built
+with anonymous credentials so no network or service account is needed.
+"""
+import argparse
+import statistics
+import time
+
+from core import clients
+
+
+def _time_calls(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.mean(samples) * 1000
+
+
+def _candidates():
+    try:
+        import boto3
+        for service in ("s3", "transcribe", "polly"):
+            yield (
+                f"boto3 {service}",
+                lambda service=service: boto3.client(service, region_name="us-east-1"),
+                lambda service=service: clients.boto3_client(service, "us-east-1"),
+            )
+    except ImportError:
+        print("skipping boto3: not installed")
+
+    try:
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud import speech, texttospeech
+
+        credentials = AnonymousCredentials()
+        yield (
+            "google SpeechClient",
+            lambda: speech.SpeechClient(credentials=credentials),
+            lambda: clients.get_client("bench-speech", lambda: speech.SpeechClient(credentials=credentials)),
+        )
+        yield (
+            "google TextToSpeechClient",
+            lambda: texttospeech.TextToSpeechClient(credentials=credentials),
+            lambda: clients.get_client("bench-tts", lambda: texttospeech.TextToSpeechClient(credentials=credentials)),
+        )
+    except ImportError:
+        print("skipping google-cloud: not installed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'client':<28}{'per-request ms':>16}{'registry ms':>14}{'saved ms':>12}")
+    for name, construct, lookup in _candidates():
+        per_request = _time_calls(construct, args.iterations)
+        lookup()  # first call pays construction once, as in a warm worker
+        shared = _time_calls(lookup, args.iterations)
+        print(f"{name:<28}{per_request:>16.3f}{shared:>14.4f}{per_request - shared:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Local stand-ins for every upstream provider, with simulated latency and error rates.
+
+The fakes replace only the functions that talk to Google, Azure, AWS, OpenAI
+and Gemini (or run local models); dispatch pools, spooling, caching, routing
+and the job system all run for real. Blocking fakes sleep on their worker
+thread like the SDK calls they stand in for, async fakes await.
+
+Latencies are lognormal around `base + per_audio_second * audio_seconds`.
+They are simulation parameters, chosen to give each provider a plausible
+shape relative to the others, not measurements of the real services.
+"""
+import asyncio
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+import zipfile
+
+
+class Profile:
+    def __init__(self, base: float, per_audio_second: float = 0.0, sigma: float = 0.3, error_rate: float = 0.0):
+        self.base = base
+        self.per_audio_second = per_audio_second
+        self.sigma = sigma
+        self.error_rate = error_rate
+
+
+DEFAULT_PROFILES = {
+    "google": Profile(0.6, 0.02),
+    "google-new": Profile(0.9, 0.03),
+    "azure-fast": Profile(0.7, 0.015),
+    "azure-fast-multilingual": Profile(0.9, 0.02),
+    "aws": Profile(6.0, 0.15, sigma=0.4),
+    "whisper": Profile(1.5, 0.04),
+    "gpt_4o": Profile(1.2, 0.03),
+    "gpt_4o_mini": Profile(0.9, 0.025),
+    "translate-openai": Profile(1.0),
+    "translate-gemini": Profile(0.8),
+    "translate-azure": Profile(0.2),
+    "tts-google": Profile(0.35),
+    "tts-aws": Profile(0.3),
+    "tts-azure": Profile(0.5),
+    "subtitle": Profile(4.0, 0.2),
+    "pyannote": Profile(3.0, 0.3),
+}
+
+# 16 kHz mono 16-bit WAV, as produced by benchmarks.audio.
+WAV_BYTES_PER_SECOND = 32000
+
+
+class FakeProviders:
+    def __init__(self, profiles: dict | None = None, latency_scale: float = 1.0, error_rate: float | None = None,
+                 seed: int = 0):
+        self.profiles = {**DEFAULT_PROFILES, **(profiles or {})}
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    def _delay(self, name: str, audio_seconds: float = 0.0) -> float:
+        profile = self.profiles[name]
+        error_rate = profile.error_rate if self.error_rate is None else self.error_rate
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            jitter = self._rng.lognormvariate(0, profile.sigma)
+            failed = self._rng.random() < error_rate
+        if failed:
+            raise Exception(f"Simulated {name} failure")
+        median = profile.base + profile.per_audio_second * audio_seconds
+        return median * jitter * self.latency_scale
+
+    def blocking(self, name: str, audio_seconds: float = 0.0):
+        time.sleep(self._delay(name, audio_seconds))
+
+    async def waiting(self, name: str, audio_seconds: float = 0.0):
+        await asyncio.sleep(self._delay(name, audio_seconds))
+
+    @staticmethod
+    def audio_seconds(path: str) -> float:
+        return os.path.getsize(path) / WAV_BYTES_PER_SECOND
+
+    def install(self, main):
+        """Patches the provider entry points used by `main` (the imported app module)."""
+        import text_to_speech.providers as tts_providers
+        import transcribers.providers as transcription_providers
+        from translators.LLMS import gemini_translator, openai_translator
+        from translators.services import azure_translate
+
+        fakes = self
+
+        def sync_transcriber(name):
+            def transcribe(audio_path, language_code, *args, **kwargs):
+                fakes.blocking(name, fakes.audio_seconds(audio_path))
+                return f"{name} transcript of {os.path.basename(audio_path)}"
+            return transcribe
+
+        def async_transcriber(name):
+            async def transcribe(audio_path, *args, **kwargs):
+                await fakes.waiting(name, fakes.audio_seconds(audio_path))
+                return f"{name} transcript of {os.path.basename(audio_path)}"
+            return transcribe
+
+        def openai_transcriber(name):
+            def transcribe(audio_path, language_code):
+                start = time.time()
+                fakes.blocking(name, fakes.audio_seconds(audio_path))
+                return f"{name} transcript", time.time() - start
+            return transcribe
+
+        transcription_providers.transcribe_streaming_google = sync_transcriber("google-new")
+        transcription_providers.transcribe_google = sync_transcriber("google")
+        transcription_providers.transcribe_aws = sync_transcriber("aws")
+        transcription_providers.transcribe_azure_fast_async = async_transcriber("azure-fast")
+        transcription_providers.transcribe_azure_fast_multilingual_async = async_transcriber("azure-fast-multilingual")
+        for name in list(transcription_providers.OPENAI_TRANSCRIBERS):
+            transcription_providers.OPENAI_TRANSCRIBERS[name] = openai_transcriber(name)
+        main.transcribe_with_whisper = openai_transcriber("whisper")
+        main.transcribe_with_gpt_4o = openai_transcriber("gpt_4o")
+        main.transcribe_with_gpt_4o_mini = openai_transcriber("gpt_4o_mini")
+
+        def long_audio(audio_path, provider, language_code="en", fan_out=4):
+            seconds = fakes.audio_seconds(audio_path)
+            chunks = max(1, math.ceil(seconds / 600))
+            # Chunks run side by side, so wall time is about one chunk's.
+            fakes.blocking(provider, seconds / chunks)
+            segments = [{"start": i * 600.0, "end": min(seconds, (i + 1) * 600.0), "text": f"chunk {i}"} for i in range(chunks)]
+            return " ".join(s["text"] for s in segments), segments
+        main.transcribe_long_audio = long_audio
+
+        def translate_one(name):
+            def translate(text, target_language):
+                fakes.blocking(name)
+                return f"[{target_language}] {text}"
+            return translate
+
+        def translate_many(name):
+            def translate(segments, target_language, source_language=None, context=None):
+                fakes.blocking(name)
+                return [f"[{target_language}] {s}" for s in segments]
+            return translate
+
+        async def azure_one(text, to_lang, from_lang=None):
+            await fakes.waiting("translate-azure")
+            return f"[{to_lang}] {text}"
+
+        async def azure_many(texts, to_lang, from_lang=None):
+            await fakes.waiting("translate-azure")
+            return [f"[{to_lang}] {t}" for t in texts]
+
+        main.translate_openai = translate_one("translate-openai")
+        main.translate_text_gemini = translate_one("translate-gemini")
+        main.translate_text_azure_async = azure_one
+        openai_translator.translate_batch = translate_many("translate-openai")
+        gemini_translator.translate_text_gemini_batch = translate_many("translate-gemini")
+        azure_translate.translate_batch_azure_async = azure_many
+
+        def synthesizer(name):
+            def synthesize(text, language_code):
+                fakes.blocking(name)
+                # Roughly 1 KB of 64 kbps MP3 per eight characters of speech.
+                return b"ID3" + os.urandom(128 * max(1, len(text)))
+            return synthesize
+
+        def streamer(name):
+            synthesize = synthesizer(name)
+
+            def stream(text, language_code):
+                audio = synthesize(text, language_code)
+                return (audio[i:i + 4096] for i in range(0, len(audio), 4096))
+            return stream
+
+        for provider, (voice_fn, _) in list(tts_providers.TTS_PROVIDERS.items()):
+            tts_providers.TTS_PROVIDERS[provider] = (voice_fn, synthesizer(f"tts-{provider}"))
+        for provider in list(tts_providers.TTS_STREAMERS):
+            tts_providers.TTS_STREAMERS[provider] = streamer(f"tts-{provider}")
+
+        def subtitle(audio_path, language_code, progress=None, cancel=None):
+            fakes.blocking("subtitle", fakes.audio_seconds(audio_path))
+            zip_path = os.path.join(tempfile.mkdtemp(), "outputs.zip")
+            with zipfile.ZipFile(zip_path, "w") as zipf:
+                zipf.writestr("transcript.srt", "1\n00:00:00,000 --> 00:00:01,000\n[Speaker 1] hello\n")
+                zipf.writestr("transcript_speakers.txt", "Speaker 1: hello\n")
+            return zip_path
+        main.process_audio_and_generate_outputs = subtitle
+
+        def pyannote(audio_path, language_code="en", concurrent=None, progress=None, cancel=None):
+            fakes.blocking("pyannote", fakes.audio_seconds(audio_path))
+            srt_path = os.path.splitext(audio_path)[0] + ".srt"
+            with open(srt_path, "w", encoding="utf-8") as f:
+                f.write("1\n00:00:00,000 --> 00:00:01,000\n[Speaker 1] hello\n")
+            return srt_path
+        main.transcribe_and_diarize = pyannote
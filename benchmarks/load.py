@@ -0,0 +1,372 @@
+"""Offline load benchmark: every HTTP endpoint in main.py against local fake providers.
+
+Run from the repository root:
+
+    python -m benchmarks.load --requests 40 --concurrency 8
+    python -m benchmarks.load --save-baseline benchmarks/baseline.json
+    python -m benchmarks.load --compare benchmarks/baseline.json --fail-on-regression
+
+The app runs in-process behind httpx's ASGI transport with its real
+dispatch pools, spooling, routing and job system; only the upstream calls
+are replaced (see benchmarks.fakes). Caches are disabled and every request
+carries distinct text so each one reaches a provider. Upload scenarios run
+once per --audio-seconds length with synthetic WAV audio.
+
+Reported per endpoint: throughput, p50/p95/p99 latency of successful
+requests, error count and the process's peak RSS once the endpoint has run
+(peak RSS only grows, so it shows which endpoint pushed it up). Latency
+figures reflect the simulated provider profiles scaled by --latency-scale,
+so compare runs made with the same settings on the same machine. A baseline
+is whatever --save-baseline wrote from an actual run; none is shipped.
+
+The WebSocket streaming endpoint is not covered: the ASGI transport only
+speaks plain HTTP.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.audio import synthetic_wav
+from benchmarks.fakes import FakeProviders
+
+
+def _isolate(workdir: str):
+    """Points every on-disk store at a scratch directory and disables caching, before main is imported."""
+    os.environ.update({
+        "TRANSCRIPTION_CACHE_BACKEND": "none",
+        "TRANSLATION_MEMORY_BACKEND": "none",
+        "TTS_OUTPUT_DIR": os.path.join(workdir, "tts"),
+        "JOBS_DB_PATH": os.path.join(workdir, "jobs.db"),
+        "JOBS_DIR": os.path.join(workdir, "jobs"),
+        "ARTIFACTS_DB_PATH": os.path.join(workdir, "artifacts.db"),
+        "ARTIFACTS_DIR": os.path.join(workdir, "artifacts"),
+        "ARTIFACTS_SCRATCH_DIR": os.path.join(workdir, "artifacts-scratch"),
+        "UPLOAD_SPOOL_DIR": workdir,
+        "WHISPER_PRELOAD": "0",
+        "HF_TOKEN": "",
+    })
+    # Provider modules build their SDK clients at import; these only need to exist.
+    for name in ("GOOGLE_APPLICATION_CREDENTIALS", "OPENAI_API_KEY", "GEMINI_API_KEY"):
+        os.environ.setdefault(name, "benchmark")
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def _ok(response) -> bool:
+    if response.status_code >= 400:
+        return False
+    if response.headers.get("content-type", "").startswith("application/json"):
+        body = response.json()
+        return not (isinstance(body, dict) and "error" in body)
+    return True
+
+
+NO_CACHE = {"X-Cache-Bypass": "1"}
+
+
+def _upload_scenarios(audio: dict, poll_interval: float):
+    scenarios = []
+    for seconds, wav in audio.items():
+        suffix = f"@{seconds:g}s"
+
+        def transcribe(provider, extra=None):
+            async def run(client, i):
+                return await client.post(
+                    f"/transcribe/{provider}",
+                    files={"file": (f"audio{i}.wav", wav, "audio/wav")},
+                    data={"language_code": "en-US", **(extra or {})},
+                    headers=NO_CACHE,
+                )
+            return run
+
+        for provider in ("google", "google-new", "azure-fast", "azure-fast-multilingual", "aws", "auto"):
+            scenarios.append((f"POST /transcribe/{provider}{suffix}", transcribe(provider)))
+        scenarios.append((f"POST /transcribe/race{suffix}", transcribe("race", {"race_providers": "google,azure-fast,whisper"})))
+
+        def openai(provider, long_audio=False):
+            async def run(client, i):
+                return await client.post(
+                    f"/transcribe_openai/{provider}",
+                    files={"file": (f"audio{i}.mp3", wav, "audio/mpeg")},
+                    data={"language_code": "en", "long_audio": str(long_audio).lower()},
+                    headers=NO_CACHE,
+                )
+            return run
+
+        for provider in ("whisper", "gpt_4o", "gpt_4o_mini"):
+            scenarios.append((f"POST /transcribe_openai/{provider}{suffix}", openai(provider)))
+        scenarios.append((f"POST /transcribe_openai/whisper[long]{suffix}", openai("whisper", True)))
+
+        def upload(path):
+            async def run(client, i):
+                return await client.post(
+                    path, files={"file": (f"audio{i}.wav", wav, "audio/wav")},
+                    data={"language_code": "en-US"}, headers=NO_CACHE,
+                )
+            return run
+
+        scenarios.append((f"POST /transcribed/subtitle_file{suffix}", upload("/transcribed/subtitle_file")))
+        scenarios.append((f"POST /transcribes/pyannote{suffix}", upload("/transcribes/pyannote")))
+
+        async def job(client, i):
+            submitted = await client.post(
+                "/jobs/subtitle", files={"file": (f"audio{i}.wav", wav, "audio/wav")},
+                data={"language_code": "en-US"}, headers=NO_CACHE,
+            )
+            if submitted.status_code != 202:
+                return submitted
+            status_url = submitted.json()["status_url"]
+            while True:
+                status = await client.get(status_url)
+                if status.json()["status"] in ("succeeded", "failed", "cancelled"):
+                    break
+                await asyncio.sleep(poll_interval)
+            if status.json()["status"] != "succeeded":
+                return status  # carries the job's "error" field
+            return await client.get(status.json()["result_url"])
+
+        scenarios.append((f"JOB /jobs/subtitle{suffix}", job))
+    return scenarios
+
+
+def _text_scenarios(segments: int, cues: int):
+    scenarios = []
+
+    def translate(provider):
+        async def run(client, i):
+            return await client.post(
+                f"/translate/{provider}", data={"text": f"Benchmark sentence number {i}.", "target_language": "de"}
+            )
+        return run
+
+    for provider in ("openai", "gemini", "auto"):
+        scenarios.append((f"POST /translate/{provider}", translate(provider)))
+
+    async def azure(client, i):
+        return await client.post(
+            "/translate_service/azure", data={"text": f"Benchmark sentence number {i}.", "target_language": "de"}
+        )
+    scenarios.append(("POST /translate_service/azure", azure))
+
+    def batch(provider):
+        async def run(client, i):
+            body = {"segments": [f"Line {n} of request {i}." for n in range(segments)], "target_language": "de"}
+            return await client.post(f"/translate_batch/{provider}", json=body)
+        return run
+
+    for provider in ("openai", "gemini", "azure"):
+        scenarios.append((f"POST /translate_batch/{provider}[{segments}]", batch(provider)))
+
+    subtitles = "".join(
+        f"{n + 1}\n00:{n // 60:02d}:{n % 60:02d},000 --> 00:{n // 60:02d}:{n % 60:02d},900\n[Speaker {n % 3 + 1}] Cue {n}\n\n"
+        for n in range(cues)
+    )
+
+    def subtitle_file(provider):
+        async def run(client, i):
+            return await client.post(
+                f"/translate_subtitles/{provider}",
+                files={"file": (f"subtitles{i}.srt", subtitles.replace("Cue", f"Request {i} cue"), "application/x-subrip")},
+                data={"target_language": "de"},
+            )
+        return run
+
+    for provider in ("openai", "gemini", "azure"):
+        scenarios.append((f"POST /translate_subtitles/{provider}[{cues}]", subtitle_file(provider)))
+
+    def tts(provider):
+        async def run(client, i):
+            return await client.post(
+                f"/tts/{provider}", data={"text": f"This is benchmark phrase {i} for {provider}.", "language_code": "en-US"}
+            )
+        return run
+
+    for provider in ("google", "aws", "azure", "auto"):
+        scenarios.append((f"POST /tts/{provider}", tts(provider)))
+
+    def tts_stream(provider):
+        async def run(client, i):
+            text = " ".join(f"Sentence {n} of streamed benchmark paragraph {i}." for n in range(30))
+            return await client.post(
+                f"/tts/{provider}", data={"text": text, "language_code": "en-US", "stream": "true"}
+            )
+        return run
+
+    for provider in ("google", "aws", "auto"):
+        scenarios.append((f"POST /tts/{provider}[stream]", tts_stream(provider)))
+
+    for path in ("/metrics", "/cache/stats", "/routing/stats", "/transcribe/race/stats"):
+        async def get(client, i, path=path):
+            return await client.get(path)
+        scenarios.append((f"GET {path}", get))
+    return scenarios
+
+
+async def _run_scenario(client, fn, requests: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    indices = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in indices:
+            start = time.perf_counter()
+            try:
+                ok = _ok(await fn(client, i))
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": ms(_percentile(latencies, 0.50)),
+        "p95_ms": ms(_percentile(latencies, 0.95)),
+        "p99_ms": ms(_percentile(latencies, 0.99)),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    import main
+
+    fakes = FakeProviders(latency_scale=args.latency_scale, error_rate=args.error_rate, seed=args.seed)
+    fakes.install(main)
+
+    audio = {seconds: synthetic_wav(seconds, seed=args.seed) for seconds in args.audio_seconds}
+    scenarios = _upload_scenarios(audio, poll_interval=0.02) + _text_scenarios(args.segments, args.cues)
+    if args.only:
+        scenarios = [(name, fn) for name, fn in scenarios if any(token in name for token in args.only)]
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for name, fn in scenarios:
+                results[name] = await _run_scenario(client, fn, args.requests, args.concurrency)
+                _print_row(name, results[name])
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency_scale": args.latency_scale,
+            "error_rate": args.error_rate,
+            "audio_seconds": args.audio_seconds,
+            "seed": args.seed,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:g}"
+
+
+def _print_row(name: str, result: dict):
+    print(
+        f"{name:58} {result['requests']:5} {result['errors']:5} {_fmt(result['throughput_rps']):>9} "
+        f"{_fmt(result['p50_ms']):>10} {_fmt(result['p95_ms']):>10} {_fmt(result['p99_ms']):>10} "
+        f"{_fmt(result['peak_rss_mb']):>8}",
+        flush=True,
+    )
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Prints p95/throughput changes against the baseline and returns the regressed endpoints."""
+    for key in ("requests", "concurrency", "latency_scale", "error_rate", "audio_seconds"):
+        if current["meta"].get(key) != baseline["meta"].get(key):
+            print(f"warning: {key} differs from the baseline "
+                  f"({current['meta'].get(key)} vs {baseline['meta'].get(key)}); deltas are not like for like")
+
+    regressions = []
+    print(f"\n{'endpoint':58} {'p95 Δ':>9} {'rps Δ':>9}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base or not base["p95_ms"] or not result["p95_ms"] or not base["throughput_rps"]:
+            continue
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1
+        rps_change = (result["throughput_rps"] or 0) / base["throughput_rps"] - 1
+        regressed = p95_change > tolerance or rps_change < -tolerance or result["errors"] > base["errors"]
+        if regressed:
+            regressions.append(name)
+        print(f"{name:58} {p95_change:+9.1%} {rps_change:+9.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-scale", type=float, default=0.1,
+                        help="multiplier on the simulated provider latencies (1 = profile values)")
+    parser.add_argument("--error-rate", type=float, default=None, help="override every provider's error rate")
+    parser.add_argument("--audio-seconds", type=lambda v: [float(s) for s in v.split(",")], default=[10.0, 60.0])
+    parser.add_argument("--segments", type=int, default=50, help="segments per batch translation request")
+    parser.add_argument("--cues", type=int, default=1500, help="cues per subtitle translation request")
+    parser.add_argument("--only", nargs="*", help="run endpoints whose name contains any of these")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the full results as JSON")
+    parser.add_argument("--save-baseline", help="write results to this baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative p95/throughput change")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    _isolate(workdir)
+
+    print(f"{'endpoint':58} {'reqs':>5} {'errs':>5} {'rps':>9} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'rss MB':>8}")
+    report = asyncio.run(run(args))
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
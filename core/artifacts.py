@@ -0,0 +1,301 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+ARTIFACTS_DB_PATH = os.getenv("ARTIFACTS_DB_PATH", ".cache/artifacts.db")
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", ".cache/artifacts")
+ARTIFACTS_SCRATCH_DIR = os.getenv("ARTIFACTS_SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "artifact_scratch"))
+# Files the index owns (stored with store_file) are removed after this long,
+# then least recently used first while their total exceeds ARTIFACTS_MAX_BYTES.
+ARTIFACTS_RETENTION_SECONDS = float(os.getenv("ARTIFACTS_RETENTION_SECONDS", str(7 * 24 * 3600)))
+ARTIFACTS_MAX_BYTES = int(os.getenv("ARTIFACTS_MAX_BYTES", str(5 * 1024 * 1024 * 1024)))
+# Rows for artifacts stored elsewhere (TTS store, caches) or not stored at all.
+ARTIFACTS_ROW_RETENTION_SECONDS = float(os.getenv("ARTIFACTS_ROW_RETENTION_SECONDS", str(30 * 24 * 3600)))
+# Working directories handed out by scratch_dir() that nobody cleaned up.
+ARTIFACTS_SCRATCH_MAX_AGE = float(os.getenv("ARTIFACTS_SCRATCH_MAX_AGE", str(6 * 3600)))
+ARTIFACTS_JANITOR_INTERVAL = float(os.getenv("ARTIFACTS_JANITOR_INTERVAL", "600"))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_COLUMNS = (
+    "id", "kind", "provider", "language", "input_hash", "content_hash", "path", "managed", "size", "latency",
+    "metadata", "created_at", "last_used_at",
+)
+
+
+def hash_path(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """Artifact rows in SQLite (WAL), indexed by input hash, content hash and creation time."""
+
+    def __init__(self, path: str = ARTIFACTS_DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS artifacts (
+                id TEXT PRIMARY KEY, kind TEXT NOT NULL, provider TEXT, language TEXT, input_hash TEXT,
+                content_hash TEXT, path TEXT, managed INTEGER NOT NULL DEFAULT 0, size INTEGER, latency REAL,
+                metadata TEXT, created_at REAL NOT NULL, last_used_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS artifacts_input ON artifacts (input_hash, kind, provider, language, created_at)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_content ON artifacts (content_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts (created_at, kind)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_managed ON artifacts (managed, last_used_at)")
+
+    def _rows(self, rows) -> list[dict]:
+        artifacts = []
+        for row in rows:
+            artifact = dict(zip(_COLUMNS, row))
+            artifact["managed"] = bool(artifact["managed"])
+            artifact["metadata"] = json.loads(artifact["metadata"]) if artifact["metadata"] else None
+            artifacts.append(artifact)
+        return artifacts
+
+    def _select(self, where: str, params: tuple, order: str = "created_at DESC", limit: int | None = None) -> list[dict]:
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM artifacts WHERE {where} ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return self._rows(self._conn.execute(sql, params).fetchall())
+
+    def insert(self, artifact: dict):
+        values = {**artifact, "metadata": json.dumps(artifact["metadata"]) if artifact.get("metadata") else None}
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO artifacts ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                tuple(values.values()),
+            )
+
+    def get(self, artifact_id: str) -> dict | None:
+        rows = self._select("id = ?", (artifact_id,))
+        return rows[0] if rows else None
+
+    def touch(self, artifact_id: str):
+        with self._lock:
+            self._conn.execute("UPDATE artifacts SET last_used_at = ? WHERE id = ?", (time.time(), artifact_id))
+
+    def delete(self, artifact_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM artifacts WHERE id = ?", (artifact_id,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(CASE WHEN managed THEN size ELSE 0 END), 0) FROM artifacts GROUP BY kind"
+            ).fetchall()
+        return {kind: {"count": count, "managed_bytes": size} for kind, count, size in rows}
+
+
+class ArtifactIndex:
+    """Records every transcription, translation and TTS output so it can be found and reused later.
+
+    Files moved in with `store_file` are owned by the index and reclaimed by
+    its janitor; `record` only indexes outputs that live elsewhere (the TTS
+    store, the result caches) or are not kept at all.
+    """
+
+    def __init__(self, store: ArtifactStore | None = None, directory: str = ARTIFACTS_DIR,
+                 scratch_directory: str = ARTIFACTS_SCRATCH_DIR):
+        self._store = store
+        self.directory = directory
+        self.scratch_directory = scratch_directory
+        self._lock = threading.Lock()
+        self._janitor = None
+        self._stopped = threading.Event()
+
+    @property
+    def store(self) -> ArtifactStore:
+        # Opened on first use so importing the app does not create the database.
+        with self._lock:
+            if self._store is None:
+                self._store = ArtifactStore()
+            return self._store
+
+    def record(self, kind: str, provider: str | None = None, language: str | None = None,
+               input_hash: str | None = None, path: str | None = None, content: bytes | str | None = None,
+               latency: float | None = None, metadata: dict | None = None, managed: bool = False) -> dict:
+        """Indexes one output; size and content hash come from `content` or the file at `path`."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        if content is not None:
+            size, content_hash = len(content), hashlib.sha256(content).hexdigest()
+        elif path is not None:
+            size, content_hash = os.path.getsize(path), hash_path(path)
+        else:
+            size, content_hash = None, None
+
+        now = time.time()
+        artifact = {
+            "id": uuid.uuid4().hex, "kind": kind, "provider": provider, "language": language,
+            "input_hash": input_hash, "content_hash": content_hash, "path": path, "managed": int(managed),
+            "size": size, "latency": latency, "metadata": metadata, "created_at": now, "last_used_at": now,
+        }
+        self.store.insert(artifact)
+        return self.store.get(artifact["id"])
+
+    def try_record(self, kind: str, **fields) -> dict | None:
+        """`record`, but a failed index write is logged instead of failing the work that produced the output."""
+        try:
+            return self.record(kind, **fields)
+        except Exception as e:
+            print(f"Artifact index write failed: {e}")
+            return None
+
+    def store_file(self, kind: str, source_path: str, **fields) -> dict:
+        """Moves `source_path` under ARTIFACTS_DIR/<kind>/ and records it as owned by the index."""
+        directory = os.path.join(self.directory, kind)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, uuid.uuid4().hex + os.path.splitext(source_path)[1])
+        shutil.move(source_path, path)
+        return self.record(kind, path=path, managed=True, **fields)
+
+    def adopt(self, kind: str, path: str, **fields) -> str:
+        """`store_file` for a freshly produced output; returns where the file now lives.
+
+        A scratch directory the file was produced in is removed with it. If
+        the index cannot take the file, it is left where it is.
+        """
+        scratch = os.path.dirname(os.path.abspath(path))
+        try:
+            stored = self.store_file(kind, path, **fields)["path"]
+        except Exception as e:
+            print(f"Artifact index write failed: {e}")
+            return path
+        if os.path.dirname(scratch) == os.path.abspath(self.scratch_directory):
+            shutil.rmtree(scratch, ignore_errors=True)
+        return stored
+
+    def find(self, input_hash: str, kind: str, provider: str | None = None, language: str | None = None,
+             max_age: float | None = None) -> dict | None:
+        """The newest artifact made from this input whose file still exists, marked as used."""
+        where, params = ["input_hash = ?", "kind = ?"], [input_hash, kind]
+        for column, value in (("provider", provider), ("language", language)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if max_age is not None:
+            where.append("created_at >= ?")
+            params.append(time.time() - max_age)
+
+        for artifact in self.store._select(" AND ".join(where), tuple(params), limit=5):
+            if artifact["path"] is not None and not os.path.exists(artifact["path"]):
+                self.store.delete(artifact["id"])
+                continue
+            self.store.touch(artifact["id"])
+            return artifact
+        return None
+
+    def by_content_hash(self, content_hash: str) -> list[dict]:
+        return self.store._select("content_hash = ?", (content_hash,))
+
+    def between(self, since: float | None = None, until: float | None = None, kind: str | None = None,
+                provider: str | None = None, limit: int = 100) -> list[dict]:
+        """Artifacts created in [since, until), newest first."""
+        where, params = ["created_at >= ?", "created_at < ?"], [since or 0.0, until or float("inf")]
+        for column, value in (("kind", kind), ("provider", provider)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        return self.store._select(" AND ".join(where), tuple(params), limit=limit)
+
+    def scratch_dir(self, prefix: str) -> str:
+        """A working directory the janitor removes once it is older than ARTIFACTS_SCRATCH_MAX_AGE."""
+        os.makedirs(self.scratch_directory, exist_ok=True)
+        return tempfile.mkdtemp(prefix=f"{prefix}_", dir=self.scratch_directory)
+
+    def _remove(self, artifact: dict):
+        if artifact["managed"] and artifact["path"]:
+            try:
+                os.remove(artifact["path"])
+            except FileNotFoundError:
+                pass
+        self.store.delete(artifact["id"])
+
+    def reclaim(self) -> dict:
+        """Applies the retention policy; returns how many artifacts and scratch directories it removed."""
+        now = time.time()
+        removed = {"expired": 0, "over_budget": 0, "dangling": 0, "rows": 0, "scratch": 0}
+
+        for artifact in self.store._select("managed = 1 AND created_at < ?", (now - ARTIFACTS_RETENTION_SECONDS,)):
+            self._remove(artifact)
+            removed["expired"] += 1
+
+        managed = self.store._select("managed = 1", (), order="last_used_at ASC")
+        total = sum(artifact["size"] or 0 for artifact in managed)
+        for artifact in managed:
+            if not os.path.exists(artifact["path"]):
+                self.store.delete(artifact["id"])
+                total -= artifact["size"] or 0
+                removed["dangling"] += 1
+            elif total > ARTIFACTS_MAX_BYTES:
+                self._remove(artifact)
+                total -= artifact["size"] or 0
+                removed["over_budget"] += 1
+
+        for artifact in self.store._select("managed = 0 AND path IS NOT NULL", ()):
+            # Files owned by something else (e.g. TTS store eviction) that are gone.
+            if not os.path.exists(artifact["path"]):
+                self.store.delete(artifact["id"])
+                removed["dangling"] += 1
+        for artifact in self.store._select("managed = 0 AND created_at < ?", (now - ARTIFACTS_ROW_RETENTION_SECONDS,)):
+            self.store.delete(artifact["id"])
+            removed["rows"] += 1
+
+        try:
+            names = os.listdir(self.scratch_directory)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            path = os.path.join(self.scratch_directory, name)
+            try:
+                if now - os.stat(path).st_mtime > ARTIFACTS_SCRATCH_MAX_AGE:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed["scratch"] += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def _janitor_loop(self):
+        while not self._stopped.wait(ARTIFACTS_JANITOR_INTERVAL):
+            try:
+                self.reclaim()
+            except Exception as e:
+                print(f"Artifact janitor failed: {e}")
+
+    def start(self):
+        if self._janitor is None:
+            self._stopped.clear()
+            self._janitor = threading.Thread(target=self._janitor_loop, name="artifact-janitor", daemon=True)
+            self._janitor.start()
+
+    def shutdown(self):
+        self._stopped.set()
+        self._janitor = None
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+artifact_index = ArtifactIndex()
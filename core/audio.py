@@ -0,0 +1,104 @@
+import io
+import struct
+import wave
+
+import ffmpeg
+
+TARGET_SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # signed 16-bit little-endian PCM
+STREAM_CHUNK_BYTES = 8192
+
+
+def _pcm_output(stream, sample_rate: int):
+    return stream.output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=sample_rate)
+
+
+class PCMAudio:
+    """Mono 16-bit PCM held in memory, with zero-copy views over the samples."""
+
+    def __init__(self, data: bytes, sample_rate: int = TARGET_SAMPLE_RATE):
+        self.data = data
+        self.sample_rate = sample_rate
+
+    @property
+    def duration(self) -> float:
+        return len(self.data) / (SAMPLE_WIDTH * self.sample_rate)
+
+    def samples(self) -> memoryview:
+        return memoryview(self.data).cast("h")
+
+    def to_numpy(self):
+        """int16 samples sharing this object's buffer (read-only, no copy)."""
+        import numpy as np
+        return np.frombuffer(self.data, dtype=np.int16)
+
+    def to_float32(self):
+        """float32 samples in [-1, 1], the input Whisper and pyannote expect (one conversion copy)."""
+        import numpy as np
+        return self.to_numpy().astype(np.float32) / 32768.0
+
+    def slice(self, start_seconds: float, end_seconds: float) -> "PCMAudio":
+        start = int(start_seconds * self.sample_rate) * SAMPLE_WIDTH
+        end = int(end_seconds * self.sample_rate) * SAMPLE_WIDTH
+        return PCMAudio(self.data[start:end], self.sample_rate)
+
+    def wav_header(self) -> bytes:
+        """The 44-byte RIFF header for `data`, for writing or uploading the WAV without copying the samples."""
+        return struct.pack(
+            "<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + len(self.data), b"WAVE", b"fmt ", 16, 1, 1,
+            self.sample_rate, self.sample_rate * SAMPLE_WIDTH, SAMPLE_WIDTH, SAMPLE_WIDTH * 8, b"data", len(self.data)
+        )
+
+    def to_wav_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(SAMPLE_WIDTH)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(self.data)
+        return buffer.getvalue()
+
+
+def decode_to_pcm(source: str | bytes, sample_rate: int = TARGET_SAMPLE_RATE, tempo: float = 1.0) -> PCMAudio:
+    """Decodes any ffmpeg-readable file path (or encoded bytes) to mono PCM through pipes, without temp files.
+
+    `tempo` (0.5-2.0) changes the speed without changing the pitch.
+    """
+    stream = ffmpeg.input("pipe:" if isinstance(source, bytes) else source)
+    if tempo != 1.0:
+        stream = stream.filter("atempo", tempo)
+    try:
+        data, _ = _pcm_output(stream, sample_rate).run(
+            input=source if isinstance(source, bytes) else None,
+            capture_stdout=True,
+            capture_stderr=True,
+            quiet=True,
+        )
+    except ffmpeg.Error as e:
+        raise Exception(f"Audio decoding failed: {e.stderr.decode(errors='replace').strip()}")
+    return PCMAudio(data, sample_rate)
+
+
+def probe_duration(path: str) -> float | None:
+    """Container duration in seconds via ffprobe, or None when it cannot be determined."""
+    try:
+        return float(ffmpeg.probe(path)["format"]["duration"])
+    except (ffmpeg.Error, KeyError, ValueError, OSError):
+        return None
+
+
+def stream_pcm(path: str, sample_rate: int = TARGET_SAMPLE_RATE, chunk_bytes: int = STREAM_CHUNK_BYTES):
+    """Yields mono PCM chunks while ffmpeg is still decoding, so consumers can start before it finishes."""
+    process = _pcm_output(ffmpeg.input(path), sample_rate).run_async(pipe_stdout=True, pipe_stderr=True, quiet=True)
+    try:
+        while chunk := process.stdout.read(chunk_bytes):
+            yield chunk
+        process.wait()
+        if process.returncode != 0:
+            raise Exception(f"Audio decoding failed: {process.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
@@ -0,0 +1,314 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+BYPASS_HEADER = "X-Cache-Bypass"
+
+# On-disk backends are swept for expired entries, and trimmed to
+# <prefix>_DISK_MAX_BYTES (0 disables the bound), every CACHE_JANITOR_INTERVAL seconds.
+CACHE_JANITOR_INTERVAL = float(os.getenv("CACHE_JANITOR_INTERVAL", "600"))
+DEFAULT_DISK_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def wants_bypass(headers) -> bool:
+    if headers.get(BYPASS_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    return "no-cache" in headers.get("Cache-Control", "").lower()
+
+
+class MemoryLRUBackend:
+    """In-process LRU bounded by the total size of the stored values."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._items[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                self._size -= len(value)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+class SQLiteBackend:
+    """On-disk store with a per-entry TTL (0 disables expiry)."""
+
+    def __init__(self, path: str, ttl: float = 0, max_bytes: int = 0):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            return value
+
+    def set(self, key: str, value: bytes):
+        expires_at = time.time() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(value), expires_at),
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def purge_expired(self) -> int:
+        """Drops expired entries, then the oldest written ones while the values exceed max_bytes."""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),)).rowcount
+            if self.max_bytes <= 0:
+                return removed
+            excess = self._conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache").fetchone()[0]
+            excess -= self.max_bytes
+            if excess <= 0:
+                return removed
+            # INSERT OR REPLACE assigns a new rowid, so rowid order is write order.
+            last_rowid = None
+            for rowid, size in self._conn.execute("SELECT rowid, LENGTH(value) FROM cache ORDER BY rowid"):
+                last_rowid = rowid
+                excess -= size
+                if excess <= 0:
+                    break
+            return removed + self._conn.execute("DELETE FROM cache WHERE rowid <= ?", (last_rowid,)).rowcount
+
+
+class FilesystemBackend:
+    """One file per entry, written atomically; expiry is based on the file's mtime."""
+
+    def __init__(self, directory: str, ttl: float = 0, max_bytes: int = 0):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            if self.ttl > 0 and os.path.getmtime(path) + self.ttl < time.time():
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                os.remove(os.path.join(root, name))
+
+    def purge_expired(self) -> int:
+        """Drops expired entries, then the oldest written ones while the directory exceeds max_bytes."""
+        now = time.time()
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue  # a write in progress
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            expired = self.ttl > 0 and mtime + self.ttl < now
+            if not expired and (self.max_bytes <= 0 or total <= self.max_bytes):
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
+
+
+def build_backend(prefix: str, default_backend: str = "memory", default_path: str = ".cache"):
+    """Builds a backend from <prefix>_BACKEND, <prefix>_MAX_BYTES (memory), <prefix>_DISK_MAX_BYTES,
+    <prefix>_PATH and <prefix>_TTL."""
+    kind = os.getenv(f"{prefix}_BACKEND", default_backend).lower()
+    ttl = float(os.getenv(f"{prefix}_TTL", "0"))
+    path = os.getenv(f"{prefix}_PATH", default_path)
+    disk_max_bytes = int(os.getenv(f"{prefix}_DISK_MAX_BYTES", str(DEFAULT_DISK_MAX_BYTES)))
+
+    if kind == "memory":
+        return MemoryLRUBackend(int(os.getenv(f"{prefix}_MAX_BYTES", str(256 * 1024 * 1024))))
+    if kind == "sqlite":
+        return SQLiteBackend(
+            path if path.endswith(".db") else os.path.join(path, "cache.db"), ttl=ttl, max_bytes=disk_max_bytes
+        )
+    if kind == "filesystem":
+        return FilesystemBackend(path, ttl=ttl, max_bytes=disk_max_bytes)
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown cache backend '{kind}' for {prefix}_BACKEND")
+
+
+class ResultCache:
+    """Content-addressed cache: the key is the input hash plus everything that changes the output."""
+
+    def __init__(self, backend, namespace: str):
+        self.backend = backend
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def key(self, content_hash: str, provider: str, **options) -> str:
+        material = json.dumps(
+            {"ns": self.namespace, "hash": content_hash, "provider": provider, "options": options},
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, bypass: bool = False) -> bytes | None:
+        if not self.enabled:
+            return None
+        if bypass:
+            self.bypasses += 1
+            return None
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        if self.enabled:
+            self.backend.set(key, value)
+
+    def get_json(self, key: str, bypass: bool = False):
+        value = self.get(key, bypass=bypass)
+        return None if value is None else json.loads(value)
+
+    def set_json(self, key: str, value):
+        self.set(key, json.dumps(value).encode("utf-8"))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CacheJanitor:
+    """Periodically purges the on-disk backends it is given; in-memory ones bound themselves."""
+
+    def __init__(self, *backends):
+        self.backends = [backend for backend in backends if hasattr(backend, "purge_expired")]
+        self._janitor = None
+        self._stopped = threading.Event()
+
+    def sweep(self) -> int:
+        return sum(backend.purge_expired() for backend in self.backends)
+
+    def _janitor_loop(self):
+        while not self._stopped.wait(CACHE_JANITOR_INTERVAL):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Cache janitor failed: {e}")
+
+    def start(self):
+        if self._janitor is None and self.backends:
+            self._stopped.clear()
+            self._janitor = threading.Thread(target=self._janitor_loop, name="cache-janitor", daemon=True)
+            self._janitor.start()
+
+    def shutdown(self):
+        self._stopped.set()
+        self._janitor = None
+
+
+transcription_cache = ResultCache(
+    build_backend("TRANSCRIPTION_CACHE", default_path=".cache/transcriptions"),
+    namespace="transcription",
+)
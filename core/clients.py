@@ -0,0 +1,127 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+# SDK clients are built lazily, once per process, and shared by every request.
+# gRPC channels do not survive fork(), so the registry is emptied in the
+# child when uvicorn forks its workers.
+
+_clients: dict = {}
+# Re-entrant because factories may look up other registry entries (e.g. the
+# shared boto3 session) while the lock is held.
+_lock = threading.RLock()
+_pid = os.getpid()
+# Idle Azure synthesizers kept per voice; extra ones built at a peak are dropped.
+AZURE_SYNTHESIZER_POOL_SIZE = max(1, int(os.getenv("AZURE_SYNTHESIZER_POOL_SIZE", "8")))
+
+
+def _reset_after_fork():
+    global _clients, _lock, _pid
+    _clients = {}
+    _lock = threading.RLock()
+    _pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_client(key, factory):
+    if _pid != os.getpid():
+        _reset_after_fork()
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+        return client
+
+
+def google_speech_client():
+    def factory():
+        from google.cloud import speech
+        return speech.SpeechClient()
+    return get_client("google-speech", factory)
+
+
+def google_speech_beta_client():
+    def factory():
+        from google.cloud import speech_v1p1beta1
+        return speech_v1p1beta1.SpeechClient()
+    return get_client("google-speech-v1p1beta1", factory)
+
+
+def google_tts_client():
+    def factory():
+        from google.cloud import texttospeech
+        return texttospeech.TextToSpeechClient()
+    return get_client("google-tts", factory)
+
+
+def gcs_client():
+    def factory():
+        from google.cloud import storage
+        return storage.Client()
+    return get_client("gcs", factory)
+
+
+def _boto3_session():
+    def factory():
+        import boto3
+        return boto3.session.Session()
+    return get_client("boto3-session", factory)
+
+
+def boto3_client(service: str, region_name: str | None = None):
+    # boto3 clients are thread safe once built, but building them from the
+    # shared session is not, so construction happens under the registry lock.
+    # Endpoint overrides (AWS_ENDPOINT_URL_S3 etc.) are read by botocore itself;
+    # S3 emulators usually also need path-style bucket addressing.
+    def factory():
+        config = None
+        addressing_style = os.getenv("AWS_S3_ADDRESSING_STYLE")
+        if service == "s3" and addressing_style:
+            from botocore.config import Config
+            config = Config(s3={"addressing_style": addressing_style})
+        return _boto3_session().client(service, region_name=region_name, config=config)
+    return get_client(("boto3", service, region_name), factory)
+
+
+def azure_speech_config(voice: str):
+    def factory():
+        import azure.cognitiveservices.speech as speechsdk
+        config = speechsdk.SpeechConfig(subscription=os.getenv("AZURE_SPEECH_KEY"), region=os.getenv("AZURE_REGION"))
+        config.speech_synthesis_voice_name = voice
+        config.set_speech_synthesis_output_format(
+            speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
+        )
+        return config
+    return get_client(("azure-speech-config", voice), factory)
+
+
+@contextmanager
+def azure_synthesizer(voice: str):
+    """Borrows an in-memory SpeechSynthesizer for `voice`, creating one when all are busy.
+
+    It goes back to the pool only if the block exits cleanly; one whose call
+    raised is discarded rather than reused.
+    """
+    import azure.cognitiveservices.speech as speechsdk
+
+    idle = get_client(("azure-synthesizers", voice), lambda: queue.Queue(AZURE_SYNTHESIZER_POOL_SIZE))
+    try:
+        synthesizer = idle.get_nowait()
+    except queue.Empty:
+        synthesizer = speechsdk.SpeechSynthesizer(speech_config=azure_speech_config(voice), audio_config=None)
+
+    yield synthesizer
+    try:
+        idle.put_nowait(synthesizer)
+    except queue.Full:
+        pass
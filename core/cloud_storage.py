@@ -0,0 +1,172 @@
+import concurrent.futures
+import io
+import os
+import threading
+
+from core.clients import boto3_client, gcs_client
+from core.metrics import count_bytes, time_stage
+
+# Provider inputs are staged in object storage only for as long as the
+# provider job needs them. Both SDKs honour the standard emulator settings,
+# so MinIO/LocalStack (AWS_ENDPOINT_URL_S3, plus AWS_S3_ADDRESSING_STYLE=path)
+# and fake-gcs-server (STORAGE_EMULATOR_HOST) work without code changes.
+
+# S3 rejects parts under 5 MiB except the last one.
+S3_PART_BYTES = max(5 * 1024 * 1024, int(os.getenv("S3_PART_BYTES", str(8 * 1024 * 1024))))
+S3_UPLOAD_CONCURRENCY = int(os.getenv("S3_UPLOAD_CONCURRENCY", "4"))
+# GCS resumable uploads are sent in chunks that must be a multiple of 256 KiB.
+GCS_CHUNK_BYTES = max(1, int(os.getenv("GCS_CHUNK_BYTES", str(8 * 1024 * 1024))) // (256 * 1024)) * 256 * 1024
+# Keep staged objects after the provider job, e.g. to inspect them in an emulator.
+KEEP_STAGED_OBJECTS = os.getenv("KEEP_STAGED_OBJECTS", "false").lower() in ("1", "true", "yes")
+
+
+def _read_parts(source, part_bytes: int):
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            while part := f.read(part_bytes):
+                yield part
+    else:
+        while part := source.read(part_bytes):
+            yield part
+
+
+def upload_s3(source, bucket: str, key: str, region_name: str | None, provider: str = "aws",
+              part_bytes: int = S3_PART_BYTES, concurrency: int = S3_UPLOAD_CONCURRENCY) -> str:
+    """Uploads a file path or binary stream to s3://bucket/key and returns the URI.
+
+    Parts are uploaded in parallel while the next ones are still being read,
+    with at most `concurrency` parts held in memory. Input that fits in one
+    part is sent with a single PUT; a failed multipart upload is aborted so
+    no orphaned parts are billed.
+    """
+    s3 = boto3_client("s3", region_name)
+    parts = _read_parts(source, part_bytes)
+    first = next(parts, b"")
+    second = next(parts, None)
+
+    with time_stage(provider, "cloud_upload"):
+        if second is None:
+            s3.put_object(Bucket=bucket, Key=key, Body=first)
+            count_bytes(provider, "cloud_upload", len(first))
+            return f"s3://{bucket}/{key}"
+
+        upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+        slots = threading.Semaphore(concurrency)
+        size = 0
+
+        def upload_part(number: int, body: bytes) -> dict:
+            try:
+                etag = s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body)["ETag"]
+                return {"PartNumber": number, "ETag": etag}
+            finally:
+                slots.release()
+
+        futures = []
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="s3-upload")
+        try:
+            for number, body in enumerate([first, second], start=1):
+                slots.acquire()
+                futures.append(executor.submit(upload_part, number, body))
+                size += len(body)
+            for body in parts:
+                slots.acquire()
+                # Stop reading as soon as any part has failed.
+                failed = next((f for f in futures if f.done() and f.exception()), None)
+                if failed is not None:
+                    slots.release()
+                    failed.result()
+                futures.append(executor.submit(upload_part, len(futures) + 1, body))
+                size += len(body)
+            completed = [future.result() for future in futures]
+            s3.complete_multipart_upload(
+                Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": completed}
+            )
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            try:
+                s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            except Exception as e:
+                print(f"Aborting multipart upload of s3://{bucket}/{key} failed: {e}")
+            raise
+        finally:
+            executor.shutdown(wait=False)
+
+    count_bytes(provider, "cloud_upload", size)
+    return f"s3://{bucket}/{key}"
+
+
+def delete_s3(bucket: str, key: str, region_name: str | None):
+    if KEEP_STAGED_OBJECTS:
+        return
+    try:
+        boto3_client("s3", region_name).delete_object(Bucket=bucket, Key=key)
+    except Exception as e:
+        print(f"Deleting staged object s3://{bucket}/{key} failed: {e}")
+
+
+class _ConcatReader(io.RawIOBase):
+    """A seekable read-only file over several buffers, so they can be uploaded without joining them."""
+
+    def __init__(self, *buffers):
+        self._buffers = [memoryview(buffer).cast("B") for buffer in buffers]
+        self._size = sum(len(buffer) for buffer in self._buffers)
+        self._position = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._size}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def readinto(self, target) -> int:
+        target = memoryview(target).cast("B")
+        written = 0
+        start = 0
+        for buffer in self._buffers:
+            end = start + len(buffer)
+            if written < len(target) and self._position < end:
+                offset = self._position - start
+                count = min(len(target) - written, len(buffer) - offset)
+                target[written:written + count] = buffer[offset:offset + count]
+                written += count
+                self._position += count
+            start = end
+        return written
+
+
+def upload_gcs(buffers, bucket: str, blob_name: str, content_type: str, provider: str = "subtitle",
+               chunk_bytes: int = GCS_CHUNK_BYTES) -> str:
+    """Uploads the concatenation of `buffers` to gs://bucket/blob_name with a chunked resumable upload.
+
+    The buffers are read in place, so a large payload is never copied into
+    one contiguous object first; a dropped connection resumes from the last
+    committed chunk instead of starting over.
+    """
+    reader = _ConcatReader(*buffers)
+    blob = gcs_client().bucket(bucket).blob(blob_name, chunk_size=chunk_bytes)
+    with time_stage(provider, "cloud_upload"):
+        blob.upload_from_file(reader, size=reader.size, content_type=content_type)
+    count_bytes(provider, "cloud_upload", reader.size)
+    return f"gs://{bucket}/{blob_name}"
+
+
+def delete_gcs(bucket: str, blob_name: str):
+    if KEEP_STAGED_OBJECTS:
+        return
+    try:
+        gcs_client().bucket(bucket).blob(blob_name).delete()
+    except Exception as e:
+        print(f"Deleting staged object gs://{bucket}/{blob_name} failed: {e}")
@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from fastapi import HTTPException
+
+DEFAULT_MAX_WORKERS = int(os.getenv("DISPATCH_MAX_WORKERS", "4"))
+DEFAULT_MAX_QUEUE = int(os.getenv("DISPATCH_MAX_QUEUE", "16"))
+
+# (max_workers, max_queue) for pools whose workload differs from the default.
+# AWS batch jobs spend most of their time sleeping between polls, while the
+# local pyannote/Whisper pipeline is CPU bound and should not oversubscribe.
+POOL_DEFAULTS = {
+    "aws": (8, 32),
+    "subtitle": (8, 32),
+    "pyannote": (1, 4),
+    # Live streams hold a worker for their whole duration; queueing one
+    # would only delay audio, so a full pool refuses new streams outright.
+    "google-streaming": (16, 0),
+}
+
+
+class ProviderBusy(HTTPException):
+    def __init__(self, name: str):
+        super().__init__(
+            status_code=429,
+            detail=f"Provider '{name}' is at capacity, retry later.",
+            headers={"Retry-After": "5"},
+        )
+
+
+def _env_int(name: str, key: str, default: int) -> int:
+    env_name = f"DISPATCH_{name.upper().replace('-', '_')}_{key}"
+    return int(os.getenv(env_name, default))
+
+
+class ProviderPool:
+    """Bounded thread pool for one provider's blocking SDK calls."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"dispatch-{name}")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def queued(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise ProviderBusy(self.name)
+            self._pending += 1
+
+        # The slot is released when the worker finishes, not when the caller
+        # stops waiting, so a disconnected client cannot free capacity early.
+        # Run under a copy of the caller's context, as asyncio.to_thread does.
+        future = self._executor.submit(contextvars.copy_context().run, partial(fn, *args, **kwargs))
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pools: dict[str, ProviderPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> ProviderPool:
+    pool = _pools.get(name)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            workers, queue = POOL_DEFAULTS.get(name, (DEFAULT_MAX_WORKERS, DEFAULT_MAX_QUEUE))
+            pool = ProviderPool(
+                name,
+                max_workers=_env_int(name, "WORKERS", workers),
+                max_queue=_env_int(name, "QUEUE", queue),
+            )
+            _pools[name] = pool
+        return pool
+
+
+async def run_blocking(provider: str, fn, *args, **kwargs):
+    """Runs a blocking provider call on that provider's pool without blocking the event loop."""
+    return await get_pool(provider).run(fn, *args, **kwargs)
+
+
+def pool_stats() -> dict:
+    return {
+        name: {
+            "max_workers": pool.max_workers,
+            "max_queue": pool.max_queue,
+            "pending": pool.pending,
+            "queued": pool.queued,
+        }
+        for name, pool in _pools.items()
+    }
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
@@ -0,0 +1,201 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+
+from core.audio import SAMPLE_WIDTH, TARGET_SAMPLE_RATE, PCMAudio, decode_to_pcm, probe_duration
+from core.dispatch import run_blocking
+from core.metrics import time_stage
+from core.routing import tts_router
+from core.waiter import JobCancelled
+from text_to_speech.providers import TTS_PROVIDERS, tts_with
+from transcribers.long_audio import OPENAI_MODELS, iter_long_audio
+from translators.segments import BATCH_PROVIDERS, translate_segments
+
+# Items waiting between two stages; a full queue pauses the stage before it.
+DUBBING_QUEUE_SIZE = int(os.getenv("DUBBING_QUEUE_SIZE", "8"))
+# Segments already waiting are translated together, up to this many per request.
+DUBBING_TRANSLATE_BATCH = int(os.getenv("DUBBING_TRANSLATE_BATCH", "16"))
+DUBBING_CONTEXT_SEGMENTS = int(os.getenv("DUBBING_CONTEXT_SEGMENTS", "3"))
+DUBBING_TTS_CONCURRENCY = int(os.getenv("DUBBING_TTS_CONCURRENCY", "4"))
+# Shorter than LONG_AUDIO_MAX_CHUNK_SECONDS so the first segments reach
+# translation early.
+DUBBING_CHUNK_SECONDS = float(os.getenv("DUBBING_CHUNK_SECONDS", "120"))
+# Dubbed speech longer than its slot is sped up by at most this factor; any
+# remainder pushes later segments back until the next pause absorbs it.
+DUBBING_MAX_SPEEDUP = float(os.getenv("DUBBING_MAX_SPEEDUP", "1.5"))
+
+TRANSCRIBE_PROVIDERS = tuple(OPENAI_MODELS)
+
+_END = object()
+
+
+class DubbedSegment:
+    def __init__(self, index: int, start: float, end: float, text: str):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.text = text
+        self.translation = None
+        self.audio = None  # the synthesized speech, still encoded
+        self.placed_at = None
+        self.tempo = 1.0
+
+    def to_dict(self) -> dict:
+        return {
+            "start": self.start,
+            "end": self.end,
+            "text": self.text,
+            "translation": self.translation,
+            "placed_at": self.placed_at,
+            "tempo": self.tempo,
+        }
+
+
+def validate_providers(transcribe_provider: str, translate_provider: str, tts_provider: str):
+    if transcribe_provider not in TRANSCRIBE_PROVIDERS:
+        raise ValueError(f"Unsupported transcription provider for dubbing: {transcribe_provider} "
+                         f"(segment timings need one of {', '.join(TRANSCRIBE_PROVIDERS)})")
+    if translate_provider not in BATCH_PROVIDERS:
+        raise ValueError(f"Unsupported translation provider: {translate_provider}")
+    if tts_provider not in TTS_PROVIDERS:
+        raise ValueError(f"Unsupported TTS provider: {tts_provider}")
+
+
+def assemble(segments: list[DubbedSegment], duration: float, sample_rate: int = TARGET_SAMPLE_RATE) -> PCMAudio:
+    """Places each segment's speech at its original start time on a silent track."""
+    track = bytearray(int(duration * sample_rate) * SAMPLE_WIDTH)
+    cursor = 0.0
+    for position, segment in enumerate(segments):
+        if segment.audio is None:
+            continue
+        audio = decode_to_pcm(segment.audio, sample_rate)
+        following = segments[position + 1].start if position + 1 < len(segments) else duration
+        slot = following - max(segment.start, cursor)
+        if audio.duration > slot:
+            segment.tempo = round(min(DUBBING_MAX_SPEEDUP, audio.duration / slot) if slot > 0 else DUBBING_MAX_SPEEDUP, 3)
+            audio = decode_to_pcm(segment.audio, sample_rate, tempo=segment.tempo)
+
+        segment.placed_at = round(max(segment.start, cursor), 3)
+        offset = int(segment.placed_at * sample_rate) * SAMPLE_WIDTH
+        if offset + len(audio.data) > len(track):
+            track.extend(bytes(offset + len(audio.data) - len(track)))
+        track[offset:offset + len(audio.data)] = audio.data
+        cursor = segment.placed_at + audio.duration
+    return PCMAudio(bytes(track), sample_rate)
+
+
+async def dub(audio_path: str, source_language: str, target_language: str, transcribe_provider: str = "whisper",
+              translate_provider: str = "azure", tts_provider: str = "google", voice_language: str | None = None,
+              progress=None, cancel: threading.Event | None = None) -> tuple[PCMAudio, list[DubbedSegment]]:
+    """Transcribes, translates and re-voices `audio_path` as one overlapped pipeline.
+
+    Segments flow through bounded queues: each is translated as soon as its
+    transcription chunk is final and synthesized as soon as it is
+    translated. The dubbed track keeps the original segment timings.
+    """
+    validate_providers(transcribe_provider, translate_provider, tts_provider)
+    voice_language = voice_language or target_language
+    loop = asyncio.get_running_loop()
+    cancel = cancel or threading.Event()
+    stop = threading.Event()  # set when another stage has failed
+    duration = await asyncio.to_thread(probe_duration, audio_path)
+
+    transcripts: asyncio.Queue = asyncio.Queue(DUBBING_QUEUE_SIZE)
+    translated: asyncio.Queue = asyncio.Queue(DUBBING_QUEUE_SIZE)
+    segments: list[DubbedSegment] = []
+    done = 0
+
+    def report(message: str):
+        if progress is None:
+            return
+        heard = segments[-1].end / duration if duration and segments else 0.0
+        # Transcription coverage and finished segments weigh equally.
+        fraction = 0.5 * min(1.0, heard) + 0.5 * (done / len(segments) if segments else 0.0)
+        progress(min(fraction, 0.99), message)
+
+    def check_cancelled():
+        if cancel.is_set() or stop.is_set():
+            raise JobCancelled("Dubbing cancelled")
+
+    def put_from_thread(item):
+        future = asyncio.run_coroutine_threadsafe(transcripts.put(item), loop)
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except concurrent.futures.TimeoutError:
+                if cancel.is_set() or stop.is_set():
+                    future.cancel()
+                check_cancelled()
+
+    def transcribe():
+        # Runs on the provider's pool; blocks while the translate stage is behind.
+        for item in iter_long_audio(audio_path, transcribe_provider, source_language.split("-")[0],
+                                    max_chunk_seconds=DUBBING_CHUNK_SECONDS,
+                                    min_chunk_seconds=DUBBING_CHUNK_SECONDS / 4):
+            check_cancelled()
+            segment = DubbedSegment(len(segments), item["start"], item["end"], item["text"])
+            segments.append(segment)
+            put_from_thread(segment)
+
+    async def transcribe_stage():
+        await run_blocking(transcribe_provider, transcribe)
+        await transcripts.put(_END)
+
+    async def translate_stage():
+        history = []
+        finished = False
+        while not finished:
+            batch = [await transcripts.get()]
+            while len(batch) < DUBBING_TRANSLATE_BATCH and not transcripts.empty():
+                batch.append(transcripts.get_nowait())
+            if batch[-1] is _END:
+                batch.pop()
+                finished = True
+            if batch:
+                check_cancelled()
+                context = {"before": history[-DUBBING_CONTEXT_SEGMENTS:], "after": []} if DUBBING_CONTEXT_SEGMENTS else None
+                translations = await translate_segments(
+                    translate_provider, [s.text for s in batch], target_language,
+                    source_language.split("-")[0], context
+                )
+                for segment, translation in zip(batch, translations):
+                    segment.translation = translation
+                    await translated.put(segment)
+                history.extend(s.text for s in batch)
+                report(f"Translated {len(history)} segments")
+        for _ in range(DUBBING_TTS_CONCURRENCY):
+            await translated.put(_END)
+
+    def synthesize(text: str) -> bytes:
+        path = tts_with(tts_provider, text, voice_language, track=lambda: tts_router.track(tts_provider, voice_language))
+        # Read at once: the TTS store may evict the file before the track is assembled.
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def tts_worker():
+        nonlocal done
+        while (segment := await translated.get()) is not _END:
+            check_cancelled()
+            if segment.translation.strip():
+                segment.audio = await run_blocking(f"tts-{tts_provider}", synthesize, segment.translation)
+            done += 1
+            report(f"Dubbed {done} of {len(segments)} segments")
+
+    tasks = [asyncio.create_task(transcribe_stage()), asyncio.create_task(translate_stage())]
+    tasks += [asyncio.create_task(tts_worker()) for _ in range(DUBBING_TTS_CONCURRENCY)]
+    try:
+        # The first failure stops every stage.
+        for task in asyncio.as_completed(tasks):
+            await task
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    with time_stage("dubbing", "postprocess"):
+        end = max([duration or 0.0] + [s.end for s in segments])
+        track = await asyncio.to_thread(assemble, segments, end)
+    return track, segments
@@ -0,0 +1,97 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE_PER_HOST = int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "300"))
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1" and _http2_available()
+
+
+class AsyncHTTPPool:
+    """One keep-alive httpx.AsyncClient per upstream host, so each host gets its own connection cap."""
+
+    def __init__(self):
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(host)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=HTTP2_ENABLED,
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_PER_HOST,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self._clients[host] = client
+        return client
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+_async_pool: AsyncHTTPPool | None = None
+
+
+def open_http_pool() -> AsyncHTTPPool:
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncHTTPPool()
+    return _async_pool
+
+
+async def close_http_pool():
+    global _async_pool
+    if _async_pool is not None:
+        pool, _async_pool = _async_pool, None
+        await pool.aclose()
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    # The app opens the pool in its lifespan hook; scripts that skip the
+    # lifespan get one opened on first use.
+    return open_http_pool().client_for(url)
+
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Shared requests.Session for the remaining blocking call sites."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                    pool_maxsize=HTTP_MAX_CONNECTIONS_PER_HOST,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
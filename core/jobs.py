@@ -0,0 +1,472 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from core.http_client import get_session
+from core.waiter import JobCancelled
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", ".cache/jobs.db")
+JOBS_DIR = os.getenv("JOBS_DIR", ".cache/jobs")
+JOBS_RETENTION_SECONDS = float(os.getenv("JOBS_RETENTION_SECONDS", str(24 * 3600)))
+JOBS_JANITOR_INTERVAL = float(os.getenv("JOBS_JANITOR_INTERVAL", "600"))
+# Running jobs carry the owning process and a heartbeat, so several workers
+# can share JOBS_DB_PATH: only jobs whose owner stopped heartbeating for
+# JOBS_HEARTBEAT_TIMEOUT seconds are re-queued, and cancels reach the owner
+# through the store within one heartbeat interval.
+JOBS_HEARTBEAT_INTERVAL = max(1.0, float(os.getenv("JOBS_HEARTBEAT_INTERVAL", "10")))
+JOBS_HEARTBEAT_TIMEOUT = max(3 * JOBS_HEARTBEAT_INTERVAL, float(os.getenv("JOBS_HEARTBEAT_TIMEOUT", "60")))
+JOBS_WEBHOOK_SECRET = os.getenv("JOBS_WEBHOOK_SECRET")
+JOBS_WEBHOOK_RETRIES = int(os.getenv("JOBS_WEBHOOK_RETRIES", "3"))
+# Comma-separated hosts webhooks may be sent to. When unset, any host is
+# accepted as long as it resolves only to public addresses.
+JOBS_WEBHOOK_ALLOWED_HOSTS = {
+    host.strip().lower() for host in os.getenv("JOBS_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+}
+DEFAULT_JOB_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+
+# Worker threads per job kind (override with JOBS_<KIND>_WORKERS). Subtitle
+# jobs mostly wait on Google; pyannote jobs are CPU bound.
+JOB_KIND_WORKERS = {
+    "subtitle": 4,
+    "pyannote": 1,
+}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_COLUMNS = (
+    "id", "kind", "status", "progress", "message", "error", "params", "input_path", "result_path",
+    "result_filename", "webhook_url", "created_at", "started_at", "finished_at", "owner", "heartbeat_at",
+    "cancel_requested",
+)
+# Added after the first release; databases created before then are migrated on open.
+_ADDED_COLUMNS = {"owner": "TEXT", "heartbeat_at": "REAL", "cancel_requested": "INTEGER NOT NULL DEFAULT 0"}
+
+
+def validate_webhook_url(url: str):
+    """Raises ValueError unless `url` is an http(s) URL the server may POST job results to.
+
+    Hosts that resolve to loopback, private, link-local or other non-public
+    addresses are refused, so a webhook cannot reach the metadata service or
+    internal hosts.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("webhook_url must be an http(s) URL")
+    host = parts.hostname.lower()
+    if JOBS_WEBHOOK_ALLOWED_HOSTS:
+        if host not in JOBS_WEBHOOK_ALLOWED_HOSTS:
+            raise ValueError(f"webhook_url host '{host}' is not allowed")
+        return
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or None, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, ValueError) as e:
+        raise ValueError(f"webhook_url host '{host}' cannot be resolved: {e}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"webhook_url host '{host}' resolves to a non-public address")
+
+
+class JobStore:
+    """Job rows in SQLite (WAL), so queued work and results survive a restart."""
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0,
+                message TEXT, error TEXT, params TEXT NOT NULL, input_path TEXT, result_path TEXT,
+                result_filename TEXT, webhook_url TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL,
+                owner TEXT, heartbeat_at REAL, cancel_requested INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in _ADDED_COLUMNS.items():
+            if column not in existing:
+                try:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+                except sqlite3.OperationalError:
+                    pass  # another worker migrated it first
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, finished_at)")
+
+    def _row(self, row) -> dict | None:
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def create(self, job: dict):
+        values = {**job, "params": json.dumps(job["params"])}
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                tuple(values.values()),
+            )
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def update(self, job_id: str, expected_status: str | None = None, **fields) -> bool:
+        """Updates a job; with `expected_status`, only if it is still in that state (a compare-and-set)."""
+        sql = f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?"
+        params = [*fields.values(), job_id]
+        if expected_status is not None:
+            sql += " AND status = ?"
+            params.append(expected_status)
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount > 0
+
+    def ids_with_status(self, *statuses: str) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM jobs WHERE status IN ({', '.join('?' * len(statuses))}) ORDER BY created_at",
+                statuses,
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def heartbeat(self, owner: str, now: float) -> list[str]:
+        """Refreshes `owner`'s running jobs and returns those another worker asked to cancel."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?", (now, owner, RUNNING))
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE owner = ? AND status = ? AND cancel_requested = 1", (owner, RUNNING)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def release_stale(self, before: float) -> list[str]:
+        """Takes back running jobs whose owner last heartbeat before `before`.
+
+        Each is re-queued, or cancelled if a cancel was requested; every row
+        is claimed with a compare-and-set, so only one worker releases it.
+        """
+        stale = "status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)"
+        released = []
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id FROM jobs WHERE {stale}", (RUNNING, before)).fetchall()
+            for (job_id,) in rows:
+                claimed = self._conn.execute(
+                    f"""UPDATE jobs SET status = CASE cancel_requested WHEN 1 THEN ? ELSE ? END,
+                        finished_at = CASE cancel_requested WHEN 1 THEN ? END, progress = 0,
+                        message = CASE cancel_requested WHEN 1 THEN NULL ELSE ? END,
+                        owner = NULL, heartbeat_at = NULL WHERE id = ? AND {stale}""",
+                    (CANCELLED, QUEUED, time.time(), "Requeued after its worker stopped", job_id, RUNNING, before),
+                ).rowcount
+                if claimed:
+                    released.append(job_id)
+        return released
+
+    def finished_before(self, timestamp: float) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (timestamp,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class JobContext:
+    """Handed to a job handler: where to write, how to report progress and how to notice a cancel."""
+
+    def __init__(self, manager: "JobManager", job_id: str, directory: str):
+        self.job_id = job_id
+        self.directory = directory
+        self.cancel_event = threading.Event()
+        self._manager = manager
+
+    def progress(self, fraction: float, message: str | None = None):
+        self._manager.store.update(self.job_id, progress=round(min(max(fraction, 0.0), 1.0), 3), message=message)
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+
+def public_view(job: dict) -> dict:
+    view = {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "status_url": f"/jobs/{job['id']}",
+    }
+    if job["status"] == SUCCEEDED:
+        view["result_url"] = f"/jobs/{job['id']}/result"
+    return view
+
+
+class JobManager:
+    """Runs registered job kinds on per-kind worker pools, backed by a JobStore.
+
+    Handlers are called as `handler(ctx, input_path, **params)` and return the
+    path of their result file, which is moved into the job's directory and
+    kept until the retention period runs out.
+    """
+
+    def __init__(self, store: JobStore | None = None, directory: str = JOBS_DIR,
+                 retention: float = JOBS_RETENTION_SECONDS):
+        self._store = store
+        self.directory = directory
+        self.retention = retention
+        self._handlers = {}
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._running: dict[str, JobContext] = {}
+        self._lock = threading.Lock()
+        self._janitor = None
+        self._stopped = threading.Event()
+        self._owner = None
+
+    @property
+    def store(self) -> JobStore:
+        # Opened on first use so importing the app does not create the database.
+        with self._lock:
+            if self._store is None:
+                self._store = JobStore()
+            return self._store
+
+    @property
+    def owner(self) -> str:
+        # Per process, and re-derived after a fork so pre-forked workers do not share it.
+        if self._owner is None or self._owner[1] != os.getpid():
+            self._owner = (f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}", os.getpid())
+        return self._owner[0]
+
+    def register(self, kind: str, handler, media_type: str = "application/octet-stream"):
+        self._handlers[kind] = (handler, media_type)
+
+    def media_type(self, kind: str) -> str:
+        return self._handlers[kind][1]
+
+    def _executor(self, kind: str) -> ThreadPoolExecutor:
+        with self._lock:
+            if kind not in self._executors:
+                workers = int(os.getenv(f"JOBS_{kind.upper()}_WORKERS", JOB_KIND_WORKERS.get(kind, DEFAULT_JOB_WORKERS)))
+                self._executors[kind] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"job-{kind}")
+            return self._executors[kind]
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def submit(self, kind: str, input_path: str, params: dict, webhook_url: str | None = None,
+               result_filename: str | None = None) -> dict:
+        """Takes ownership of `input_path` (moved into the job directory) and queues the job."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+
+        job_id = uuid.uuid4().hex
+        directory = self.job_dir(job_id)
+        os.makedirs(directory, exist_ok=True)
+        stored_input = os.path.join(directory, "input" + os.path.splitext(input_path)[1])
+        shutil.move(input_path, stored_input)
+
+        job = {
+            "id": job_id, "kind": kind, "status": QUEUED, "progress": 0.0, "params": params,
+            "input_path": stored_input, "result_filename": result_filename, "webhook_url": webhook_url,
+            "created_at": time.time(),
+        }
+        self.store.create(job)
+        self._executor(kind).submit(self._run, job_id)
+        return self.store.get(job_id)
+
+    def get(self, job_id: str) -> dict | None:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> dict | None:
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED:
+            return job
+
+        if self.store.update(job_id, expected_status=QUEUED, status=CANCELLED, finished_at=time.time()):
+            self._cleanup_input(job_id)
+            self._send_webhook(job_id)
+        else:
+            # The flag reaches the owning worker on its next heartbeat, if it is another process.
+            if self.store.update(job_id, expected_status=RUNNING, cancel_requested=1, message="Cancelling"):
+                self._signal_cancel(job_id)
+        return self.store.get(job_id)
+
+    def _signal_cancel(self, job_id: str):
+        with self._lock:
+            ctx = self._running.get(job_id)
+        if ctx is not None:
+            ctx.cancel_event.set()
+
+    def _run(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None:
+            return
+
+        handler, _ = self._handlers[job["kind"]]
+        ctx = JobContext(self, job_id, self.job_dir(job_id))
+        # Registered before the status leaves QUEUED, so a cancel that misses
+        # the QUEUED state always finds the context to signal.
+        with self._lock:
+            if self._running.setdefault(job_id, ctx) is not ctx:
+                return  # submitted twice; the first run has it
+        now = time.time()
+        if not self.store.update(job_id, expected_status=QUEUED, status=RUNNING, started_at=now, owner=self.owner,
+                                 heartbeat_at=now, cancel_requested=0):
+            with self._lock:
+                self._running.pop(job_id, None)
+            return  # cancelled while queued
+
+        try:
+            ctx.check_cancelled()
+            result_path = handler(ctx, job["input_path"], **job["params"])
+            stored_result = os.path.join(ctx.directory, "result" + os.path.splitext(result_path)[1])
+            if os.path.abspath(result_path) != os.path.abspath(stored_result):
+                shutil.move(result_path, stored_result)
+            self.store.update(job_id, status=SUCCEEDED, progress=1.0, message=None,
+                              result_path=stored_result, finished_at=time.time())
+        except JobCancelled:
+            self.store.update(job_id, status=CANCELLED, message=None, finished_at=time.time())
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, message=None, error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+            self._cleanup_input(job_id)
+
+        self._send_webhook(job_id)
+
+    def _cleanup_input(self, job_id: str):
+        job = self.store.get(job_id)
+        if job and job["input_path"]:
+            try:
+                os.remove(job["input_path"])
+            except FileNotFoundError:
+                pass
+
+    def _send_webhook(self, job_id: str):
+        job = self.store.get(job_id)
+        if not job or not job["webhook_url"]:
+            return
+
+        body = json.dumps(public_view(job)).encode()
+        headers = {"Content-Type": "application/json"}
+        if JOBS_WEBHOOK_SECRET:
+            signature = hmac.new(JOBS_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+            headers["X-Job-Signature"] = f"sha256={signature}"
+
+        try:
+            # Checked again at send time: the host's DNS may have changed since submission.
+            validate_webhook_url(job["webhook_url"])
+        except ValueError as e:
+            print(f"Webhook for job {job_id} refused: {e}")
+            return
+
+        for attempt in range(JOBS_WEBHOOK_RETRIES):
+            try:
+                response = get_session().post(job["webhook_url"], data=body, headers=headers, timeout=10,
+                                              allow_redirects=False)
+                if response.status_code < 500:
+                    return
+            except Exception as e:
+                print(f"Webhook for job {job_id} failed: {e}")
+            if attempt + 1 < JOBS_WEBHOOK_RETRIES:
+                time.sleep(2 ** attempt)
+
+    def purge_expired(self) -> int:
+        """Drops finished jobs (row and files) older than the retention period."""
+        expired = self.store.finished_before(time.time() - self.retention)
+        for job_id in expired:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            self.store.delete(job_id)
+        return len(expired)
+
+    def _resume(self, job_id: str):
+        job = self.store.get(job_id)
+        if job["status"] == CANCELLED:
+            self._cleanup_input(job_id)
+            self._send_webhook(job_id)
+        elif job["kind"] in self._handlers and os.path.exists(job["input_path"] or ""):
+            # A second worker may submit it too; the QUEUED -> RUNNING compare-and-set picks one.
+            self._executor(job["kind"]).submit(self._run, job_id)
+        else:
+            self.store.update(job_id, status=FAILED, error="Input no longer available", finished_at=time.time())
+
+    def _release_stale(self) -> list[str]:
+        # Interrupted mid-run; handlers start from their input, so it runs again.
+        released = self.store.release_stale(time.time() - JOBS_HEARTBEAT_TIMEOUT)
+        for job_id in released:
+            self._resume(job_id)
+        return released
+
+    def _janitor_loop(self):
+        next_purge = time.monotonic() + JOBS_JANITOR_INTERVAL
+        while not self._stopped.wait(JOBS_HEARTBEAT_INTERVAL):
+            try:
+                for job_id in self.store.heartbeat(self.owner, time.time()):
+                    self._signal_cancel(job_id)
+                self._release_stale()
+                if time.monotonic() >= next_purge:
+                    next_purge = time.monotonic() + JOBS_JANITOR_INTERVAL
+                    self.purge_expired()
+            except Exception as e:
+                print(f"Job janitor failed: {e}")
+
+    def start(self):
+        """Takes over work left behind by stopped workers and starts the heartbeat and retention janitor."""
+        released = self._release_stale()
+        for job_id in self.store.ids_with_status(QUEUED):
+            if job_id not in released:
+                self._resume(job_id)
+
+        self.purge_expired()
+        if self._janitor is None:
+            self._stopped.clear()
+            self._janitor = threading.Thread(target=self._janitor_loop, name="job-janitor", daemon=True)
+            self._janitor.start()
+
+    def shutdown(self):
+        # Running jobs are left as they are; once their heartbeat is stale,
+        # another worker (or the next start()) re-queues them.
+        self._stopped.set()
+        self._janitor = None
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = len(self._running)
+        return {"running": running, "by_status": self.store.counts()}
+
+
+job_manager = JobManager()
@@ -0,0 +1,303 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+
+from core.dispatch import ProviderBusy
+from core.metrics import provider_request_duration_seconds
+
+ROUTING_WINDOW = int(os.getenv("ROUTING_WINDOW", "50"))
+ROUTING_WINDOW_SECONDS = float(os.getenv("ROUTING_WINDOW_SECONDS", "900"))
+ROUTING_MIN_SAMPLES = int(os.getenv("ROUTING_MIN_SAMPLES", "5"))
+ROUTING_FAILURE_RATE = float(os.getenv("ROUTING_FAILURE_RATE", "0.5"))
+ROUTING_CONSECUTIVE_FAILURES = int(os.getenv("ROUTING_CONSECUTIVE_FAILURES", "3"))
+ROUTING_OPEN_SECONDS = float(os.getenv("ROUTING_OPEN_SECONDS", "30"))
+ROUTING_MAX_OPEN_SECONDS = float(os.getenv("ROUTING_MAX_OPEN_SECONDS", "600"))
+ROUTING_HALF_OPEN_SUCCESSES = int(os.getenv("ROUTING_HALF_OPEN_SUCCESSES", "3"))
+# Share of auto requests sent to a provider other than the current best, so
+# stats for the others do not go stale.
+ROUTING_EXPLORE = float(os.getenv("ROUTING_EXPLORE", "0.05"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# The (breaker, probe) held by the routed call running in this context, so
+# track() can tell a half-open probe apart from explicit calls to the same
+# provider. Pool workers run with a copy of the caller's context.
+_held_probe = contextvars.ContextVar("held_probe", default=None)
+
+
+class NoProviderAvailable(Exception):
+    def __init__(self, kind: str, errors: dict):
+        self.errors = errors
+        detail = "; ".join(f"{p}: {e}" for p, e in errors.items()) or "all circuits open"
+        super().__init__(f"No {kind} provider succeeded: {detail}")
+
+
+def _percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class RollingWindow:
+    """The last `size` outcomes no older than `max_age` seconds."""
+
+    def __init__(self, size: int = ROUTING_WINDOW, max_age: float = ROUTING_WINDOW_SECONDS):
+        self._samples = deque(maxlen=size)
+        self.max_age = max_age
+
+    def add(self, latency: float, ok: bool):
+        self._samples.append((time.monotonic(), latency, ok))
+
+    def _recent(self):
+        cutoff = time.monotonic() - self.max_age
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return self._samples
+
+    def summary(self) -> dict:
+        samples = self._recent()
+        latencies = [latency for _, latency, ok in samples if ok]
+        failures = sum(1 for _, _, ok in samples if not ok)
+        return {
+            "samples": len(samples),
+            "error_rate": round(failures / len(samples), 3) if samples else None,
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+        }
+
+
+class CircuitBreaker:
+    """Opens on repeated failures (or slow calls), then lets single probe requests through until the provider recovers."""
+
+    def __init__(self):
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=ROUTING_WINDOW)
+        self._consecutive_failures = 0
+        self._trips = 0
+        self._opened_at = 0.0
+        self._open_for = 0.0
+        self._probe = None
+        self._probe_successes = 0
+
+    def _refresh(self):
+        if self.state == OPEN and time.monotonic() >= self._opened_at + self._open_for:
+            self.state = HALF_OPEN
+            self._probe_successes = 0
+            self._probe = None
+
+    def available(self) -> bool:
+        self._refresh()
+        return self.state == CLOSED or (self.state == HALF_OPEN and self._probe is None)
+
+    def try_acquire(self):
+        """A truthy token when a call may go through; while half-open it is the single probe slot."""
+        self._refresh()
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self._probe is None:
+            self._probe = object()
+            return self._probe
+        return None
+
+    def _trip(self):
+        self._trips += 1
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._open_for = min(ROUTING_MAX_OPEN_SECONDS, ROUTING_OPEN_SECONDS * 2 ** (self._trips - 1))
+        self._probe = None
+
+    def record(self, healthy: bool, probe=None):
+        self._refresh()
+        if self.state == HALF_OPEN:
+            # Only the call holding the probe slot decides whether the provider recovered.
+            if probe is None or probe is not self._probe:
+                return
+            self._probe = None
+            if not healthy:
+                self._trip()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= ROUTING_HALF_OPEN_SUCCESSES:
+                self.state = CLOSED
+                self._trips = 0
+                self._outcomes.clear()
+                self._consecutive_failures = 0
+            return
+
+        self._outcomes.append(healthy)
+        self._consecutive_failures = 0 if healthy else self._consecutive_failures + 1
+        if self.state != CLOSED:
+            return
+        failure_rate = self._outcomes.count(False) / len(self._outcomes)
+        if (self._consecutive_failures >= ROUTING_CONSECUTIVE_FAILURES
+                or (len(self._outcomes) >= ROUTING_MIN_SAMPLES and failure_rate >= ROUTING_FAILURE_RATE)):
+            self._trip()
+
+    def release(self, probe=None):
+        """Returns an unused probe slot (the call never reached the provider)."""
+        if probe is not None and probe is self._probe:
+            self._probe = None
+
+    def describe(self) -> dict:
+        self._refresh()
+        info = {"state": self.state, "trips": self._trips}
+        if self.state == OPEN:
+            info["retry_in"] = round(self._opened_at + self._open_for - time.monotonic(), 1)
+        return info
+
+
+class Router:
+    """Rolling latency/error stats per provider and language, with a circuit breaker per provider.
+
+    `track()` records any provider call, including explicitly requested
+    ones; `route()` serves "auto" requests by trying providers best first
+    and failing over on errors.
+    """
+
+    def __init__(self, kind: str, providers: tuple[str, ...], slow_seconds: float):
+        self.kind = kind
+        self.providers = providers
+        self.slow_seconds = slow_seconds
+        self._lock = threading.Lock()
+        self._windows = defaultdict(RollingWindow)
+        self._breakers = defaultdict(CircuitBreaker)
+
+    def _score(self, provider: str, language: str) -> float | None:
+        summary = self._windows[(provider, language)].summary()
+        if summary["p50"] is None or summary["samples"] < ROUTING_MIN_SAMPLES:
+            summary = self._windows[(provider, None)].summary()
+        if summary["p50"] is None:
+            return None
+        success_rate = 1 - (summary["error_rate"] or 0)
+        return summary["p50"] / max(success_rate, 0.05)
+
+    def candidates(self, language: str) -> list[str]:
+        """Available providers, fastest expected first; providers without data keep their configured order."""
+        with self._lock:
+            available = [p for p in self.providers if self._breakers[p].available()]
+            probing = [p for p in available if self._breakers[p].state == HALF_OPEN]
+            scores = {p: self._score(p, language) for p in available if p not in probing}
+        known = sorted((p for p in scores if scores[p] is not None), key=lambda p: scores[p])
+        ordered = known + [p for p in scores if scores[p] is None]
+        if len(ordered) > 1 and random.random() < ROUTING_EXPLORE:
+            ordered.insert(0, ordered.pop(random.randrange(1, len(ordered))))
+        # A recovering provider gets one request at a time up front (the probe);
+        # if it fails, the request simply fails over to the rest.
+        return probing + ordered
+
+    def _probe_for(self, provider: str):
+        held = _held_probe.get()
+        with self._lock:
+            breaker = self._breakers[provider]
+        if held is not None and held[0] is breaker:
+            return held[1]
+        return None
+
+    def _record(self, provider: str, language: str, latency: float, ok: bool, probe=None):
+        provider_request_duration_seconds.observe(
+            latency, kind=self.kind, provider=provider, outcome="ok" if ok else "error"
+        )
+        with self._lock:
+            self._windows[(provider, language)].add(latency, ok)
+            self._windows[(provider, None)].add(latency, ok)
+            self._breakers[provider].record(ok and latency <= self.slow_seconds, probe)
+
+    @contextmanager
+    def track(self, provider: str, language: str):
+        """Times the enclosed upstream call; usable from async code and worker threads alike."""
+        probe = self._probe_for(provider)
+        start = time.monotonic()
+        try:
+            yield
+        except (ProviderBusy, asyncio.CancelledError):
+            # Local back-pressure or an abandoned request says nothing about the provider's health.
+            with self._lock:
+                self._breakers[provider].release(probe)
+            raise
+        except HTTPException as e:
+            if e.status_code >= 500:
+                self._record(provider, language, time.monotonic() - start, False, probe)
+            else:
+                with self._lock:
+                    self._breakers[provider].release(probe)
+            raise
+        except BaseException:
+            self._record(provider, language, time.monotonic() - start, False, probe)
+            raise
+        else:
+            self._record(provider, language, time.monotonic() - start, True, probe)
+
+    async def route(self, language: str, call):
+        """Runs `await call(provider)` on the best provider, failing over in order; returns (provider, result).
+
+        `call` is expected to wrap its upstream request in `track()`, so
+        cache hits along the way do not count as provider latency.
+        """
+        errors = {}
+        for provider in self.candidates(language):
+            with self._lock:
+                breaker = self._breakers[provider]
+                acquired = breaker.try_acquire()
+            if not acquired:
+                continue
+            held = _held_probe.set((breaker, acquired))
+            try:
+                return provider, await call(provider)
+            except HTTPException as e:
+                if e.status_code < 500 and not isinstance(e, ProviderBusy):
+                    raise
+                errors[provider] = e.detail
+            except Exception as e:
+                errors[provider] = str(e)
+            finally:
+                _held_probe.reset(held)
+                with self._lock:
+                    breaker.release(acquired)
+        raise NoProviderAvailable(self.kind, errors)
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for provider in self.providers:
+                languages = {
+                    language: window.summary()
+                    for (name, language), window in self._windows.items()
+                    if name == provider and language is not None
+                }
+                result[provider] = {
+                    **self._breakers[provider].describe(),
+                    **self._windows[(provider, None)].summary(),
+                    "languages": languages,
+                }
+            return result
+
+
+def _providers(env_name: str, default: str) -> tuple[str, ...]:
+    return tuple(p.strip() for p in os.getenv(env_name, default).split(",") if p.strip())
+
+
+transcription_router = Router(
+    "transcription",
+    _providers("ROUTING_TRANSCRIBE_PROVIDERS", "azure-fast,google,whisper,gpt_4o_mini,aws"),
+    float(os.getenv("ROUTING_TRANSCRIBE_SLOW_SECONDS", "120")),
+)
+translation_router = Router(
+    "translation",
+    _providers("ROUTING_TRANSLATE_PROVIDERS", "azure,gemini,openai"),
+    float(os.getenv("ROUTING_TRANSLATE_SLOW_SECONDS", "20")),
+)
+tts_router = Router(
+    "tts",
+    _providers("ROUTING_TTS_PROVIDERS", "google,azure,aws"),
+    float(os.getenv("ROUTING_TTS_SLOW_SECONDS", "20")),
+)
@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+
+from core.metrics import count_bytes, time_stage
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(1024 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+
+class UploadTooLarge(HTTPException):
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"Upload exceeds the {max_bytes} byte limit.")
+
+
+class SpooledUpload:
+    """An upload copied to a named spool file, with its size and SHA-256 computed on the way."""
+
+    def __init__(self, path: str, size: int, sha256: str, filename: str | None):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _spool(source, suffix: str, max_bytes: int) -> tuple[str, int, str]:
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="upload_", dir=UPLOAD_SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, size, digest.hexdigest()
+
+
+async def spool_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES, suffix: str | None = None) -> SpooledUpload:
+    """Copies an UploadFile to a named spool file chunk by chunk, never holding the whole body in memory.
+
+    Starlette has already received the body into its own anonymous temporary
+    file by now; providers need a path, hence this second copy. The size
+    limit is enforced earlier, while the body arrives, by
+    UploadLimitMiddleware. The copy runs on a worker thread; the caller owns
+    the spool file and must call cleanup() when done with it.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+    if suffix is None:
+        suffix = os.path.splitext(file.filename or "")[1].lower()
+
+    await file.seek(0)
+    with time_stage("http", "upload_read"):
+        path, size, sha256 = await asyncio.to_thread(_spool, file.file, suffix, max_bytes)
+    count_bytes("http", "upload_read", size)
+    return SpooledUpload(path, size, sha256, file.filename)
+
+
+# Room for the multipart envelope and form fields around the file itself.
+_ENVELOPE_BYTES = 64 * 1024
+
+
+def content_length_exceeded(headers, max_bytes: int = MAX_UPLOAD_BYTES) -> bool:
+    """True when the declared body size is already over the limit, so it can be refused before parsing."""
+    try:
+        return int(headers.get("content-length", "0")) > max_bytes + _ENVELOPE_BYTES
+    except ValueError:
+        return False
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware that stops reading a request body once it passes the upload limit.
+
+    A declared Content-Length over the limit is refused before any of the
+    body is read; chunked bodies are counted as they arrive, and the request
+    fails with 413 as soon as the count passes the limit, instead of after
+    the whole body has been received.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        if content_length_exceeded(headers, self.max_bytes):
+            return await self._reject(send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes + _ENVELOPE_BYTES:
+                    raise UploadTooLarge(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"Upload exceeds the {self.max_bytes} byte limit."}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
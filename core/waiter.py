@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from core.metrics import time_stage
+
+# Defaults for waiting on provider batch jobs (AWS Transcribe, Azure batch).
+# Probes start fast so short clips return as soon as they finish, then back
+# off exponentially up to a ceiling scaled to the audio duration.
+JOB_POLL_INITIAL = float(os.getenv("JOB_POLL_INITIAL", "1"))
+JOB_POLL_FACTOR = float(os.getenv("JOB_POLL_FACTOR", "1.5"))
+JOB_POLL_MIN_INTERVAL = float(os.getenv("JOB_POLL_MIN_INTERVAL", "2"))
+JOB_POLL_MAX_INTERVAL = float(os.getenv("JOB_POLL_MAX_INTERVAL", "15"))
+JOB_POLL_JITTER = float(os.getenv("JOB_POLL_JITTER", "0.2"))
+JOB_DEADLINE_MIN = float(os.getenv("JOB_DEADLINE_MIN", "300"))
+JOB_DEADLINE_REALTIME_FACTOR = float(os.getenv("JOB_DEADLINE_REALTIME_FACTOR", "3"))
+# When completion events are wired up (POST /callbacks/...), polling is only
+# a safety net for lost events and can stretch to this interval.
+JOB_CALLBACKS_ENABLED = os.getenv("JOB_CALLBACKS_ENABLED", "0") == "1"
+JOB_CALLBACK_POLL_INTERVAL = float(os.getenv("JOB_CALLBACK_POLL_INTERVAL", "60"))
+# Shared secret every callback must carry; POST /callbacks/jobs is off without it.
+JOB_CALLBACK_TOKEN = os.getenv("JOB_CALLBACK_TOKEN")
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class PollPolicy:
+    def __init__(self, initial: float = JOB_POLL_INITIAL, factor: float = JOB_POLL_FACTOR,
+                 max_interval: float = JOB_POLL_MAX_INTERVAL, jitter: float = JOB_POLL_JITTER,
+                 deadline: float = JOB_DEADLINE_MIN):
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.deadline = deadline
+
+    @classmethod
+    def for_duration(cls, audio_seconds: float | None, callbacks: bool = JOB_CALLBACKS_ENABLED) -> "PollPolicy":
+        """Scales the backoff ceiling (~1/20 of the audio) and deadline (a multiple of real time) to the input."""
+        if not audio_seconds:
+            max_interval, deadline = JOB_POLL_MAX_INTERVAL, JOB_DEADLINE_MIN
+        else:
+            max_interval = min(JOB_POLL_MAX_INTERVAL, max(JOB_POLL_MIN_INTERVAL, audio_seconds / 20))
+            deadline = max(JOB_DEADLINE_MIN, audio_seconds * JOB_DEADLINE_REALTIME_FACTOR)
+        if callbacks:
+            max_interval = max(max_interval, JOB_CALLBACK_POLL_INTERVAL)
+        return cls(max_interval=max_interval, deadline=deadline)
+
+    def intervals(self):
+        interval = self.initial
+        while True:
+            spread = interval * self.jitter
+            yield max(0.0, interval + random.uniform(-spread, spread))
+            interval = min(self.max_interval, interval * self.factor)
+
+
+class CompletionNotifier:
+    """Wakes waiters early when a provider reports a job finished (EventBridge, SNS, webhooks).
+
+    Notifications only trigger an immediate probe; the provider's status API
+    stays the source of truth, so a spoofed or duplicated event costs one
+    extra request and nothing more.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners: dict[str, list] = {}
+
+    def subscribe(self, job_id: str, callback):
+        with self._lock:
+            self._listeners.setdefault(job_id, []).append(callback)
+
+    def unsubscribe(self, job_id: str, callback):
+        with self._lock:
+            listeners = self._listeners.get(job_id, [])
+            if callback in listeners:
+                listeners.remove(callback)
+            if not listeners:
+                self._listeners.pop(job_id, None)
+
+    def notify(self, job_id: str) -> bool:
+        with self._lock:
+            listeners = list(self._listeners.get(job_id, []))
+        for callback in listeners:
+            callback()
+        return bool(listeners)
+
+    def waiting(self) -> int:
+        with self._lock:
+            return len(self._listeners)
+
+
+completion_notifier = CompletionNotifier()
+
+
+def job_ids_from_event(event: dict) -> list[str]:
+    """Extracts job ids from an EventBridge event, an SNS notification wrapping one, or an Azure web hook."""
+    if event.get("Type") == "Notification" and isinstance(event.get("Message"), str):
+        try:
+            return job_ids_from_event(json.loads(event["Message"]))
+        except ValueError:
+            return []
+
+    detail = event.get("detail")
+    if isinstance(detail, dict) and detail.get("TranscriptionJobName"):
+        return [detail["TranscriptionJobName"]]
+
+    # Azure speech web hooks link to the transcription, whose id is the last path segment.
+    link = event.get("self")
+    if isinstance(link, str) and "/transcriptions/" in link:
+        return [urlparse(link).path.rstrip("/").rsplit("/", 1)[-1]]
+
+    return []
+
+
+def sns_subscribe_url(event: dict) -> str | None:
+    """The confirmation URL of an SNS subscription handshake, if it points at AWS."""
+    if event.get("Type") != "SubscriptionConfirmation":
+        return None
+    url = event.get("SubscribeURL", "")
+    parsed = urlparse(url)
+    if parsed.scheme == "https" and (parsed.hostname or "").endswith(".amazonaws.com"):
+        return url
+    return None
+
+
+class JobWaiter:
+    """Repeatedly calls `probe` until it returns something other than None.
+
+    `probe` raises on job failure. Between probes the waiter sleeps along the
+    policy's backoff, waking early on a completion notification or a cancel.
+    """
+
+    def __init__(self, policy: PollPolicy | None = None, notifier: CompletionNotifier = completion_notifier,
+                 name: str = "job"):
+        self.policy = policy or PollPolicy()
+        self.notifier = notifier
+        self.name = name
+
+    def wait(self, job_id: str, probe, cancel: threading.Event | None = None):
+        with time_stage(self.name, "polling_wait"):
+            return self._wait(job_id, probe, cancel)
+
+    def _wait(self, job_id: str, probe, cancel: threading.Event | None):
+        deadline = time.monotonic() + self.policy.deadline
+        wake = threading.Event()
+        self.notifier.subscribe(job_id, wake.set)
+        try:
+            for interval in self.policy.intervals():
+                if cancel is not None and cancel.is_set():
+                    raise JobCancelled(f"Waiting for job {job_id} was cancelled")
+                # Cleared before probing so an event that lands mid-probe still cuts the next sleep short.
+                wake.clear()
+                result = probe()
+                if result is not None:
+                    return result
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise JobTimeout(f"Job {job_id} did not finish within {self.policy.deadline:.0f}s")
+                self._sleep(wake, cancel, min(interval, remaining))
+        finally:
+            self.notifier.unsubscribe(job_id, wake.set)
+
+    @staticmethod
+    def _sleep(wake: threading.Event, cancel: threading.Event | None, seconds: float):
+        if cancel is None:
+            wake.wait(seconds)
+            return
+        # threading.Event has no wait-for-either, so a cancel is noticed
+        # within a quarter second instead of at the end of the interval.
+        end = time.monotonic() + seconds
+        while not wake.is_set() and not cancel.is_set():
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return
+            wake.wait(min(remaining, 0.25))
+
+    async def wait_async(self, job_id: str, probe, cancel: asyncio.Event | None = None):
+        """Async variant; `probe` is a coroutine function. Task cancellation also stops the wait."""
+        with time_stage(self.name, "polling_wait"):
+            return await self._wait_async(job_id, probe, cancel)
+
+    async def _wait_async(self, job_id: str, probe, cancel: asyncio.Event | None):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.policy.deadline
+        wake = asyncio.Event()
+
+        def on_notify():
+            loop.call_soon_threadsafe(wake.set)
+
+        self.notifier.subscribe(job_id, on_notify)
+        try:
+            for interval in self.policy.intervals():
+                if cancel is not None and cancel.is_set():
+                    raise JobCancelled(f"Waiting for job {job_id} was cancelled")
+                wake.clear()
+                result = await probe()
+                if result is not None:
+                    return result
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise JobTimeout(f"Job {job_id} did not finish within {self.policy.deadline:.0f}s")
+
+                waits = [asyncio.ensure_future(wake.wait())]
+                if cancel is not None:
+                    waits.append(asyncio.ensure_future(cancel.wait()))
+                try:
+                    await asyncio.wait(waits, timeout=min(interval, remaining), return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for task in waits:
+                        task.cancel()
+        finally:
+            self.notifier.unsubscribe(job_id, on_notify)
@@ -1,18 +1,31 @@
-from fastapi import FastAPI, File, UploadFile, Form
-from transcribers.google_transcriber import transcribe_google
-from transcribers.azure_transcriber import transcribe_azure_fast
-from transcribers.azure_multilingual import transcribe_azure_fast_multilingual
-from transcribers.aws_transcriber import transcribe_aws
+from fastapi import FastAPI, File, UploadFile, Form, Query, Request, Response, WebSocket
+from transcribers.providers import TRANSCRIPTION_PROVIDERS, transcribe_with
+from transcribers.race import parse_race_providers, race_stats, race_transcription
 from translators.LLMS.openai_translator import translate_text as translate_openai
 from translators.LLMS.gemini_translator import translate_text_gemini
-from text_to_speech.tts_google import tts_google
-from text_to_speech.tts_aws import tts_aws
-from text_to_speech.tts_azure import tts_azure
-from fastapi.responses import FileResponse
-from translators.services.azure_translate import translate_text_azure
+from text_to_speech.providers import TTS_PROVIDERS, stored_tts, tts_with
+from text_to_speech.store import tts_store
+from text_to_speech.streaming import stream_segments, stream_tts
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from core.cache import CacheJanitor, transcription_cache, wants_bypass
+from core.dispatch import ProviderBusy, pool_stats, run_blocking, shutdown_pools
+from core import metrics
+from core.http_client import open_http_pool, close_http_pool
+from core.uploads import UploadLimitMiddleware, spool_upload
+from core.routing import transcription_router, translation_router, tts_router
+from core.jobs import SUCCEEDED, job_manager, public_view, validate_webhook_url
+from core.artifacts import artifact_index, hash_text
+from core.dubbing import dub, validate_providers
+from core.waiter import JOB_CALLBACK_TOKEN, completion_notifier, job_ids_from_event, sns_subscribe_url
+from core.http_client import get_async_client
+from transcribers.whisper_local import preload_in_background, whisper_models
+from translators.memory import translation_memory
+from translators.segments import BATCH_PROVIDERS, translate_segments
+from translators.subtitles import read_subtitles, translate_subtitles
+from translators.services.azure_translate import translate_text_azure_async
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from transcribers.google_new import transcribe_streaming_google
+from transcribers.google_streaming import GoogleStreamingSession
 from transcribers.subtitle import process_audio_and_generate_outputs
 
 from fastapi.responses import JSONResponse
@@ -20,23 +33,238 @@ from fastapi.responses import JSONResponse
 from transcribers.whisper import transcribe_with_whisper
 from transcribers.gpt_4o import transcribe_with_gpt_4o
 from transcribers.gpt_4o_mini import transcribe_with_gpt_4o_mini
-import tempfile
-from fastapi import Body,Path
+from transcribers.long_audio import OPENAI_MAX_UPLOAD_BYTES, transcribe_long_audio
+from fastapi import Path
+import asyncio
+import hmac
 import io
+import json
+import zipfile
 import time
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
+cache_janitor = CacheJanitor(transcription_cache.backend, translation_memory.persistent)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.http = open_http_pool()
+    preload_in_background()
+    job_manager.start()
+    artifact_index.start()
+    cache_janitor.start()
+    yield
+    cache_janitor.shutdown()
+    artifact_index.shutdown()
+    job_manager.shutdown()
+    await close_http_pool()
+    shutdown_pools()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+app.add_middleware(UploadLimitMiddleware)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    metrics.http_requests_in_flight.inc(method=request.method)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.http_requests_in_flight.dec(method=request.method)
+        route = request.scope.get("route")
+        metrics.http_request_duration_seconds.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=status
+        )
+
+
+def _pool_gauge(field: str):
+    return lambda: {(name,): stats[field] for name, stats in pool_stats().items()}
+
+
+def _cache_gauge():
+    return {
+        ("transcription",): transcription_cache.stats()["hit_ratio"],
+        ("translation_memory",): translation_memory.stats()["hit_ratio"],
+        ("tts",): tts_store.stats()["hit_ratio"],
+    }
+
+
+def _circuit_gauge():
+    return {
+        (router.kind, provider): 0 if info["state"] == "closed" else 1 if info["state"] == "open" else 0.5
+        for router in (transcription_router, translation_router, tts_router)
+        for provider, info in router.stats().items()
+    }
+
+
+metrics.registry.callback_gauge("dispatch_pending", "Calls running or queued per provider pool.", ("pool",), _pool_gauge("pending"))
+metrics.registry.callback_gauge("dispatch_queue_depth", "Calls waiting for a worker per provider pool.", ("pool",), _pool_gauge("queued"))
+metrics.registry.callback_gauge("dispatch_workers", "Worker threads per provider pool.", ("pool",), _pool_gauge("max_workers"))
+metrics.registry.callback_gauge("cache_hit_ratio", "Hit ratio since start per cache.", ("cache",), _cache_gauge)
+metrics.registry.callback_gauge(
+    "jobs", "Jobs in the job table by status.", ("status",),
+    lambda: {(status,): count for status, count in job_manager.stats()["by_status"].items()}
+)
+metrics.registry.callback_gauge(
+    "artifacts_managed_bytes", "Bytes of files owned by the artifact index, by kind.", ("kind",),
+    lambda: {(kind,): stats["managed_bytes"] for kind, stats in artifact_index.stats().items()}
+)
+metrics.registry.callback_gauge(
+    "routing_circuit_state", "Circuit breaker state: 0 closed, 0.5 half-open, 1 open.", ("kind", "provider"), _circuit_gauge
+)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def _record_artifact(kind: str, **fields):
+    await asyncio.to_thread(artifact_index.try_record, kind, **fields)
+
+
+async def _file_response(path: str, media_type: str, filename: str, headers: dict | None = None) -> StreamingResponse:
+    """Serves a file the artifact janitor may delete at any time.
+
+    The file is opened before the response is returned, so a later delete
+    cannot cut the download short; a file that is already gone raises
+    FileNotFoundError for the caller to handle.
+    """
+    f = await asyncio.to_thread(open, path, "rb")
+    size = os.fstat(f.fileno()).st_size
+
+    async def body():
+        try:
+            while chunk := await asyncio.to_thread(f.read, 64 * 1024):
+                yield chunk
+        finally:
+            f.close()
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Content-Length": str(size), **(headers or {})}
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "transcription": transcription_cache.stats(),
+        "translation_memory": translation_memory.stats(),
+        "tts": tts_store.stats()
+    }
+
+
+def _artifact_view(artifact: dict) -> dict:
+    view = {key: value for key, value in artifact.items() if key not in ("path", "managed")}
+    if artifact["path"] and artifact["managed"]:
+        view["file_url"] = f"/artifacts/{artifact['id']}/file"
+    return view
+
+
+@app.get("/artifacts")
+async def list_artifacts(
+    since: float | None = Query(None, description="Unix time, inclusive"),
+    until: float | None = Query(None, description="Unix time, exclusive"),
+    kind: str | None = None,
+    provider: str | None = None,
+    content_hash: str | None = None,
+    input_hash: str | None = None,
+    limit: int = Query(100, le=1000)
+):
+    """Indexed outputs, newest first: by creation time range, or every artifact with a given
+    content_hash, or the newest one made from input_hash (with kind)."""
+    if content_hash:
+        artifacts = await asyncio.to_thread(artifact_index.by_content_hash, content_hash)
+    elif input_hash:
+        if not kind:
+            raise HTTPException(status_code=400, detail="input_hash lookups need a kind")
+        artifact = await asyncio.to_thread(artifact_index.find, input_hash, kind, provider)
+        artifacts = [artifact] if artifact else []
+    else:
+        artifacts = await asyncio.to_thread(artifact_index.between, since, until, kind, provider, limit)
+    return {"artifacts": [_artifact_view(a) for a in artifacts[:limit]]}
+
+
+@app.get("/artifacts/stats")
+async def artifact_stats():
+    return await asyncio.to_thread(artifact_index.stats)
+
+
+@app.get("/artifacts/{artifact_id}/file")
+async def get_artifact_file(artifact_id: str):
+    artifact = await asyncio.to_thread(artifact_index.store.get, artifact_id)
+    if artifact is None or not artifact["managed"]:
+        raise HTTPException(status_code=404, detail="Artifact file not found")
+    filename = f"{artifact['kind']}{os.path.splitext(artifact['path'])[1]}"
+    try:
+        response = await _file_response(artifact["path"], "application/octet-stream", filename)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Artifact file not found")
+    await asyncio.to_thread(artifact_index.store.touch, artifact_id)
+    return response
+
+
+@app.post("/callbacks/jobs")
+async def job_completion_callback(request: Request, token: str | None = None):
+    """Receives EventBridge (via API destination), SNS or Azure web hook completion events.
+    A matching event wakes the request waiting on that job so it fetches the result right away.
+    Disabled unless JOB_CALLBACK_TOKEN is set; every call must carry it (?token= or X-Callback-Token)."""
+    if not JOB_CALLBACK_TOKEN:
+        # Unauthenticated, the SNS handshake would confirm subscriptions to anyone's topics.
+        raise HTTPException(status_code=404, detail="Job callbacks are not enabled")
+    supplied = token or request.headers.get("X-Callback-Token") or ""
+    if not hmac.compare_digest(supplied.encode(), JOB_CALLBACK_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid callback token")
+
+    try:
+        # SNS posts JSON with a text/plain content type, so the body is parsed by hand.
+        event = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    if not isinstance(event, dict):
+        raise HTTPException(status_code=400, detail="Body must be a JSON object")
+
+    subscribe_url = sns_subscribe_url(event)
+    if subscribe_url:
+        await get_async_client(subscribe_url).get(subscribe_url)
+        return {"confirmed": True}
+
+    job_ids = job_ids_from_event(event)
+    woken = [job_id for job_id in job_ids if completion_notifier.notify(job_id)]
+    return {"jobs": job_ids, "woken": woken}
+
 
 @app.post("/transcribe/{provider}")
 async def transcribe(
+    request: Request,
+    response: Response,
     provider: str,
     language_code: str = Form(...),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    race_providers: str | None = Form(None)
 ):
+    """provider "race" sends the audio to several providers at once (race_providers, comma separated,
+    defaults to TRANSCRIBE_RACE_PROVIDERS) and answers with the first successful transcript.
+    provider "auto" picks the provider with the best recent latency and error rate, failing over
+    to the next one; the choice is returned in X-Provider."""
     provider = provider.lower()
     start_time = time.time()
     file_ext = os.path.splitext(file.filename)[1].lower().lstrip(".")
@@ -44,107 +272,314 @@ async def transcribe(
     if file_ext not in ("mp3", "wav"):
         raise HTTPException(status_code=400, detail="Only MP3 or WAV files are supported.")
 
-    audio_data = await file.read()
-
-    try:
-        if provider == "google-new":
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_ext}") as temp_audio:
-                temp_audio.write(audio_data)
-                temp_audio_path = temp_audio.name
-
-            text = transcribe_streaming_google(temp_audio_path, language_code)
-
-        elif provider == "google":
-            text=transcribe_google(audio_data,language_code)
-            
+    race = None
+    if provider == "race":
+        try:
+            race = parse_race_providers(race_providers)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        elif provider == "azure-fast":
-            text = transcribe_azure_fast(audio_data, language_code, file_type=file_ext)
+    upload = await spool_upload(file)
 
-        elif provider == "aws":
-            text = transcribe_aws(audio_data, language_code)
-
-        elif provider == "azure-fast-multilingual":
-            text = transcribe_azure_fast_multilingual(audio_data)
+    try:
+        bypass = wants_bypass(request.headers)
+        # Any winner is an acceptable answer for a given provider set, so races share one entry.
+        cache_provider = f"race:{','.join(sorted(race))}" if race else provider
+        cache_key = transcription_cache.key(upload.sha256, cache_provider, language_code=language_code, file_type=file_ext)
+        cached = await asyncio.to_thread(transcription_cache.get_json, cache_key, bypass=bypass)
+        if cached is None and provider == "auto" and not bypass:
+            # Whatever any routable provider already produced for this audio is a valid answer.
+            for candidate in transcription_router.providers:
+                candidate_key = transcription_cache.key(
+                    upload.sha256, candidate, language_code=language_code, file_type=file_ext
+                )
+                cached = await asyncio.to_thread(transcription_cache.get_json, candidate_key)
+                if cached is not None:
+                    response.headers["X-Provider"] = candidate
+                    break
+        if cached is not None:
+            response.headers["X-Cache"] = "HIT"
+            return {"transcription": cached["transcription"], "latency": time.time() - start_time}
 
+        produced_by = provider
+        if provider == "auto":
+            routed, text = await transcription_router.route(
+                language_code, lambda candidate: transcribe_with(candidate, upload.path, language_code, file_ext)
+            )
+            response.headers["X-Provider"] = produced_by = routed
+            cache_key = transcription_cache.key(upload.sha256, routed, language_code=language_code, file_type=file_ext)
+        elif provider == "race":
+            winner, text = await race_transcription(race, upload.path, language_code, file_ext)
+            response.headers["X-Race-Winner"] = produced_by = winner
+        elif provider in TRANSCRIPTION_PROVIDERS:
+            text = await transcribe_with(provider, upload.path, language_code, file_ext)
         else:
             raise HTTPException(status_code=400, detail=f"Invalid transcription provider: {provider}")
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.cleanup()
+
+    await asyncio.to_thread(transcription_cache.set_json, cache_key, {"transcription": text})
+    response.headers["X-Cache"] = "BYPASS" if bypass else "MISS"
 
     latency = time.time() - start_time
+    await _record_artifact(
+        "transcription", provider=produced_by, language=language_code, input_hash=upload.sha256,
+        content=text, latency=latency
+    )
     return {"transcription": text, "latency": latency}
 
 
+@app.get("/routing/stats")
+async def routing_stats():
+    return {
+        "transcription": transcription_router.stats(),
+        "translation": translation_router.stats(),
+        "tts": tts_router.stats()
+    }
+
+
+@app.get("/transcribe/race/stats")
+async def transcribe_race_stats():
+    return race_stats.stats()
+
+
+def _translation_fetch(provider: str, target_language: str, source_language: str | None = None):
+    """The upstream call for one text, timed by the translation router (memory hits never reach it)."""
+    async def fetch(segment: str) -> str:
+        with translation_router.track(provider, target_language):
+            if provider == "openai":
+                return await run_blocking(provider, translate_openai, segment, target_language)
+            if provider == "gemini":
+                return await run_blocking(provider, translate_text_gemini, segment, target_language)
+            return await translate_text_azure_async(segment, to_lang=target_language, from_lang=source_language)
+
+    return fetch
+
+
 @app.post("/translate/{provider}")
 async def translate(
+    response: Response,
     provider: str,
     text: str = Form(...),
     target_language: str = Form(...)
 ):
+    """provider "auto" routes to the best recent performer among ROUTING_TRANSLATE_PROVIDERS (see X-Provider)."""
     start_time = time.time()
 
     provider = provider.lower()
     try:
-        if provider == "openai":
-            translated = translate_openai(text, target_language)
-        elif provider == "gemini":
-            translated = translate_text_gemini(text, target_language)
+        if provider == "auto":
+            routed, translated = await translation_router.route(
+                target_language,
+                lambda candidate: translation_memory.translate(
+                    candidate, text, target_language, None, _translation_fetch(candidate, target_language)
+                )
+            )
+            response.headers["X-Provider"] = routed
+        elif provider in ("openai", "gemini"):
+            translated = await translation_memory.translate(
+                provider, text, target_language, None, _translation_fetch(provider, target_language)
+            )
         else:
             return {"error": f"Unsupported translation provider: {provider}"}
 
         latency = time.time() - start_time
+        await _record_artifact(
+            "translation", provider=response.headers.get("X-Provider", provider), language=target_language,
+            input_hash=hash_text(text), content=translated, latency=latency
+        )
         return {"translated_text": translated, "latency": latency}
 
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
 
+class BatchTranslationRequest(BaseModel):
+    segments: list[str]
+    target_language: str
+    source_language: str | None = None
+
+
+@app.post("/translate_batch/{provider}")
+async def translate_batch(provider: str, payload: BatchTranslationRequest):
+    start_time = time.time()
+    provider = provider.lower()
+
+    if provider not in BATCH_PROVIDERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported translation provider: {provider}")
+
+    try:
+        translations = await translate_segments(
+            provider,
+            payload.segments,
+            payload.target_language,
+            payload.source_language
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    latency = time.time() - start_time
+    await _record_artifact(
+        "translation", provider=provider, language=payload.target_language,
+        input_hash=hash_text(json.dumps(payload.segments, ensure_ascii=False)),
+        content=json.dumps(translations, ensure_ascii=False), latency=latency,
+        metadata={"segments": len(payload.segments)}
+    )
+    return {"translations": translations, "latency": latency}
+
+
+@app.post("/translate_subtitles/{provider}")
+async def translate_subtitle_file(
+    provider: str,
+    file: UploadFile = File(...),
+    target_language: str = Form(...),
+    source_language: str | None = Form(None)
+):
+    """Translates an SRT (or the ZIP from /transcribed/subtitle_file), keeping timings and speaker tags.
+
+    The translated SRT is streamed back window by window as translations complete."""
+    start_time = time.time()
+    provider = provider.lower()
+
+    if provider not in BATCH_PROVIDERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported translation provider: {provider}")
+
+    upload = await spool_upload(file)
+    try:
+        subtitles = read_subtitles(await asyncio.to_thread(_read_file, upload.path))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        upload.cleanup()
+
+    chunks = translate_subtitles(provider, subtitles, target_language, source_language)
+    try:
+        # The first window is awaited here so provider errors still produce an error response.
+        first = await anext(chunks, "")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def body():
+        translated = [first]
+        yield first
+        async for chunk in chunks:
+            translated.append(chunk)
+            yield chunk
+        await _record_artifact(
+            "subtitle_translation", provider=provider, language=target_language, input_hash=upload.sha256,
+            content="".join(translated), latency=time.time() - start_time, metadata={"cues": len(subtitles)}
+        )
+
+    name = os.path.splitext(os.path.basename(file.filename or "subtitles"))[0]
+    return StreamingResponse(
+        body(),
+        media_type="application/x-subrip; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.{target_language}.srt"',
+            "X-Cues": str(len(subtitles)),
+            "X-First-Window-Latency": str(time.time() - start_time),
+        }
+    )
+
+
 @app.post("/tts/{provider}")
 async def tts(
     provider: str,
     text: str = Form(...),
-    language_code: str = Form(...)
+    language_code: str = Form(...),
+    stream: bool = Form(False)
 ):
+    """provider "auto" reuses audio any provider already stored for the phrase, otherwise routes to
+    the best recent performer among ROUTING_TTS_PROVIDERS (see X-Provider).
+
+    stream=true returns chunked MP3 as sentence-sized segments finish, instead of one file."""
     start_time = time.time()
     provider = provider.lower()
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Text is empty.")
+
+    def synthesize(candidate: str):
+        return run_blocking(
+            f"tts-{candidate}", tts_with, candidate, text, language_code,
+            track=lambda: tts_router.track(candidate, language_code)
+        )
+
+    async def open_stream(candidate: str):
+        # Wait for the first chunk so a failing provider still gets an error
+        # response (or, for auto, a failover) rather than a truncated body.
+        chunks = stream_tts(candidate, text, language_code, track=lambda: tts_router.track(candidate, language_code))
+        return chunks, await anext(chunks, b"")
 
     try:
-        if provider == "google":
-            file_path = tts_google(text, language_code)
-        elif provider == "aws":
-            file_path = tts_aws(text, language_code)
-        elif provider == "azure":
-            file_path = tts_azure(text, language_code)
+        headers = {}
+        if stream:
+            if provider == "auto":
+                provider, (chunks, first) = await tts_router.route(language_code, open_stream)
+                headers["X-Provider"] = provider
+            elif provider in TTS_PROVIDERS:
+                chunks, first = await open_stream(provider)
+            else:
+                return {"error": f"Unsupported TTS provider: {provider}"}
+
+            async def body():
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+
+            headers["X-First-Chunk-Latency"] = str(time.time() - start_time)
+            headers["X-Segments"] = str(len(stream_segments(provider, text)))
+            return StreamingResponse(body(), media_type="audio/mpeg", headers=headers)
+
+        if provider == "auto":
+            stored = stored_tts(text, language_code, tts_router.providers)
+            if stored:
+                routed, file_path = stored
+            else:
+                routed, file_path = await tts_router.route(language_code, synthesize)
+            headers["X-Provider"] = routed
+        elif provider in TTS_PROVIDERS:
+            file_path = await synthesize(provider)
         else:
             return {"error": f"Unsupported TTS provider: {provider}"}
 
         latency = time.time() - start_time
-        return FileResponse(
-            path=file_path,
-            media_type="audio/mpeg",
-            filename=os.path.basename(file_path),
-            headers={"X-Generation-Latency": str(latency)}
+        # Opened before returning, so the store's eviction cannot remove it mid-response.
+        return await _file_response(
+            file_path, "audio/mpeg", os.path.basename(file_path),
+            headers={"X-Generation-Latency": str(latency), **headers}
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": f"TTS failed: {str(e)}"}
 
 
 @app.post("/translate_service/azure")
-def azure_translate(
+async def azure_translate(
     text: str = Form(...),
     target_language: str = Form(...),
     source_language: str | None = Form(None)
 ):
     try:
         start_time = time.time()
-        translated_text = translate_text_azure(
+        translated_text = await translation_memory.translate(
+            "azure",
             text,
-            to_lang=target_language,
-            from_lang=source_language
+            target_language,
+            source_language,
+            _translation_fetch("azure", target_language, source_language)
         )
         latency = time.time() - start_time
 
@@ -152,22 +587,74 @@ def azure_translate(
             "translated_text": translated_text,
             "latency": latency
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 from fastapi import FastAPI, UploadFile, File, Query
 
 
+def _pyannote_model() -> str:
+    # Quantized weights transcribe differently, so their outputs are kept apart.
+    return f"{whisper_models.size}-int8" if whisper_models.quantize else whisper_models.size
+
+
+def _find_artifact(sha256: str, kind: str, provider: str, language_code: str, bypass: bool) -> dict | None:
+    # Reusing a stored output is caching too, so it follows the transcription cache settings.
+    if bypass or not transcription_cache.enabled:
+        return None
+    return artifact_index.find(sha256, kind, provider, language_code)
+
+
+async def _stored_artifact(sha256: str, kind: str, provider: str, language_code: str, bypass: bool) -> dict | None:
+    return await asyncio.to_thread(_find_artifact, sha256, kind, provider, language_code, bypass)
+
+
 @app.post("/transcribed/subtitle_file")
 async def subtitle_transcription(
+    request: Request,
     file: UploadFile = File(...),
     language_code: str = Form(...)
 ):
-    zip_path = process_audio_and_generate_outputs(file.file, language_code)
-    return FileResponse(
-        path=zip_path,
+    upload = await spool_upload(file)
+
+    try:
+        bypass = wants_bypass(request.headers)
+        artifact = await _stored_artifact(upload.sha256, "subtitle", "google", language_code, bypass)
+        if artifact is not None:
+            try:
+                return await _file_response(
+                    artifact["path"], "application/zip", "transcription_outputs.zip",
+                    headers={"X-Cache": "HIT", "X-Artifact-Id": artifact["id"]}
+                )
+            except FileNotFoundError:
+                pass  # reclaimed since the lookup; produce it again
+        cache_key = transcription_cache.key(upload.sha256, "google-subtitle", language_code=language_code)
+        cached = await asyncio.to_thread(transcription_cache.get, cache_key, bypass=bypass)
+        if cached is not None:
+            return Response(
+                content=cached,
+                media_type="application/zip",
+                headers={"Content-Disposition": 'attachment; filename="transcription_outputs.zip"', "X-Cache": "HIT"}
+            )
+
+        start_time = time.time()
+        zip_path = await run_blocking("subtitle", process_audio_and_generate_outputs, upload.path, language_code)
+    finally:
+        upload.cleanup()
+
+    content = await asyncio.to_thread(_read_file, zip_path)
+    await asyncio.to_thread(transcription_cache.set, cache_key, content)
+    await asyncio.to_thread(
+        artifact_index.adopt, "subtitle", zip_path, provider="google", language=language_code,
+        input_hash=upload.sha256, latency=time.time() - start_time
+    )
+    return Response(
+        content=content,
         media_type="application/zip",
-        filename="transcription_outputs.zip"
+        headers={"Content-Disposition": 'attachment; filename="transcription_outputs.zip"',
+                 "X-Cache": "BYPASS" if bypass else "MISS"}
     )
 
 from transcribers.pyannote import transcribe_and_diarize
@@ -177,60 +664,373 @@ import shutil
 
 @app.post("/transcribes/pyannote")
 async def upload_and_transcribe(
+    request: Request,
     file: UploadFile = File(...),
     language_code: str = Form(...)
 ):
-    input_path = f"temp_{file.filename}"
-    with open(input_path, "wb") as f:
-        f.write(await file.read())
+    srt_filename = os.path.splitext(os.path.basename(file.filename or "audio"))[0] + ".srt"
+    upload = await spool_upload(file)
 
     try:
-        
-        srt_file_path = transcribe_and_diarize(input_path, language_code=language_code)
-        return FileResponse(
-            path=srt_file_path,
+        bypass = wants_bypass(request.headers)
+        artifact = await _stored_artifact(upload.sha256, "pyannote", _pyannote_model(), language_code, bypass)
+        if artifact is not None:
+            try:
+                return await _file_response(
+                    artifact["path"], "application/x-subrip", srt_filename,
+                    headers={"X-Cache": "HIT", "X-Artifact-Id": artifact["id"]}
+                )
+            except FileNotFoundError:
+                pass  # reclaimed since the lookup; produce it again
+        cache_key = transcription_cache.key(
+            upload.sha256, "pyannote", language_code=language_code, model=_pyannote_model()
+        )
+        cached = await asyncio.to_thread(transcription_cache.get, cache_key, bypass=bypass)
+        if cached is not None:
+            return Response(
+                content=cached,
+                media_type="application/x-subrip",
+                headers={"Content-Disposition": f'attachment; filename="{srt_filename}"', "X-Cache": "HIT"}
+            )
+
+        start_time = time.time()
+        srt_file_path = await run_blocking("pyannote", transcribe_and_diarize, upload.path, language_code=language_code)
+        content = await asyncio.to_thread(_read_file, srt_file_path)
+        await asyncio.to_thread(transcription_cache.set, cache_key, content)
+        # Moved out of the spool directory into the artifact store, which owns its lifetime.
+        await asyncio.to_thread(
+            artifact_index.adopt, "pyannote", srt_file_path, provider=_pyannote_model(), language=language_code,
+            input_hash=upload.sha256, latency=time.time() - start_time
+        )
+        return Response(
+            content=content,
             media_type="application/x-subrip",
-            filename=os.path.basename(srt_file_path)
+            headers={"Content-Disposition": f'attachment; filename="{srt_filename}"',
+                     "X-Cache": "BYPASS" if bypass else "MISS"}
         )
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": str(e)}
     finally:
-        if os.path.exists(input_path):
-            os.remove(input_path)
+        upload.cleanup()
+
+
+
+
+
+
+def _cached_job_result(ctx, cache_key: str, bypass: bool, suffix: str, artifact: dict | None = None) -> str | None:
+    path = os.path.join(ctx.directory, "result" + suffix)
+    if artifact is not None:
+        try:
+            shutil.copyfile(artifact["path"], path)
+            return path
+        except FileNotFoundError:
+            pass  # reclaimed since the lookup
+    cached = transcription_cache.get(cache_key, bypass=bypass)
+    if cached is None:
+        return None
+    with open(path, "wb") as f:
+        f.write(cached)
+    return path
+
+
+def _adopted_job_result(ctx, kind: str, result_path: str, **fields) -> str:
+    # The job directory keeps its own copy under the job's retention, taken
+    # before the index (and its janitor) owns the original.
+    path = os.path.join(ctx.directory, "result" + os.path.splitext(result_path)[1])
+    shutil.copyfile(result_path, path)
+    artifact_index.adopt(kind, result_path, **fields)
+    return path
+
+
+def _subtitle_job(ctx, input_path: str, language_code: str, sha256: str, bypass: bool = False) -> str:
+    cache_key = transcription_cache.key(sha256, "google-subtitle", language_code=language_code)
+    artifact = _find_artifact(sha256, "subtitle", "google", language_code, bypass)
+    cached_path = _cached_job_result(ctx, cache_key, bypass, ".zip", artifact)
+    if cached_path:
+        return cached_path
+
+    start_time = time.time()
+    zip_path = process_audio_and_generate_outputs(
+        input_path, language_code, progress=ctx.progress, cancel=ctx.cancel_event
+    )
+    transcription_cache.set(cache_key, _read_file(zip_path))
+    return _adopted_job_result(
+        ctx, "subtitle", zip_path, provider="google", language=language_code,
+        input_hash=sha256, latency=time.time() - start_time
+    )
+
+
+def _pyannote_job(ctx, input_path: str, language_code: str, sha256: str, bypass: bool = False) -> str:
+    cache_key = transcription_cache.key(sha256, "pyannote", language_code=language_code, model=_pyannote_model())
+    artifact = _find_artifact(sha256, "pyannote", _pyannote_model(), language_code, bypass)
+    cached_path = _cached_job_result(ctx, cache_key, bypass, ".srt", artifact)
+    if cached_path:
+        return cached_path
+
+    start_time = time.time()
+    srt_path = transcribe_and_diarize(
+        input_path, language_code=language_code, progress=ctx.progress, cancel=ctx.cancel_event
+    )
+    transcription_cache.set(cache_key, _read_file(srt_path))
+    return _adopted_job_result(
+        ctx, "pyannote", srt_path, provider=_pyannote_model(), language=language_code,
+        input_hash=sha256, latency=time.time() - start_time
+    )
+
+
+job_manager.register("subtitle", _subtitle_job, media_type="application/zip")
+job_manager.register("pyannote", _pyannote_job, media_type="application/x-subrip")
+
+
+@app.post("/jobs/{kind}")
+async def submit_job(
+    request: Request,
+    kind: str = Path(..., description="subtitle or pyannote"),
+    file: UploadFile = File(...),
+    language_code: str = Form(...),
+    webhook_url: str | None = Form(None)
+):
+    """Queues long-running work and returns 202 at once; poll the status_url or pass a webhook_url,
+    which receives the job status as JSON (signed with X-Job-Signature when JOBS_WEBHOOK_SECRET is set)."""
+    if kind == "subtitle":
+        result_filename = "transcription_outputs.zip"
+    elif kind == "pyannote":
+        result_filename = os.path.splitext(os.path.basename(file.filename or "audio"))[0] + ".srt"
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported job kind")
+
+    if webhook_url:
+        try:
+            await asyncio.to_thread(validate_webhook_url, webhook_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    upload = await spool_upload(file)
+    try:
+        params = {"language_code": language_code, "sha256": upload.sha256, "bypass": wants_bypass(request.headers)}
+        job = await asyncio.to_thread(
+            job_manager.submit, kind, upload.path, params, webhook_url=webhook_url, result_filename=result_filename
+        )
+    finally:
+        upload.cleanup()
+
+    return JSONResponse(status_code=202, content=public_view(job), headers={"Location": f"/jobs/{job['id']}"})
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return public_view(job)
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return FileResponse(
+        path=job["result_path"],
+        media_type=job_manager.media_type(job["kind"]),
+        filename=job["result_filename"]
+    )
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = await asyncio.to_thread(job_manager.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return public_view(job)
 
 
+def _dubbing_zip(track, segments) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zipf:
+        zipf.writestr("dubbed.wav", track.to_wav_bytes())
+        zipf.writestr("segments.json", json.dumps([s.to_dict() for s in segments], ensure_ascii=False, indent=2))
+    return buffer.getvalue()
 
 
+@app.post("/dub")
+async def dub_audio(
+    file: UploadFile = File(...),
+    source_language: str = Form(...),
+    target_language: str = Form(...),
+    transcribe_provider: str = Form("whisper"),
+    translate_provider: str = Form("azure"),
+    tts_provider: str = Form("google"),
+    voice_language: str | None = Form(None)
+):
+    """Transcribe -> translate -> TTS in one request, with the stages overlapped per segment.
+
+    voice_language is the TTS locale (e.g. de-DE) and defaults to target_language. Returns a ZIP
+    with dubbed.wav, laid out on the original segment timings, and segments.json."""
+    start_time = time.time()
+    try:
+        validate_providers(transcribe_provider.lower(), translate_provider.lower(), tts_provider.lower())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    upload = await spool_upload(file)
+    try:
+        track, segments = await dub(
+            upload.path, source_language, target_language,
+            transcribe_provider.lower(), translate_provider.lower(), tts_provider.lower(), voice_language
+        )
+        content = await asyncio.to_thread(_dubbing_zip, track, segments)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.cleanup()
+
+    await _record_artifact(
+        "dubbing", provider=f"{transcribe_provider}+{translate_provider}+{tts_provider}".lower(),
+        language=target_language, input_hash=upload.sha256, content=content,
+        latency=time.time() - start_time, metadata={"segments": len(segments)}
+    )
+    return Response(
+        content=content,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="dubbing_outputs.zip"',
+            "X-Segments": str(len(segments)),
+            "X-Processing-Latency": str(time.time() - start_time),
+        }
+    )
 
 
 @app.post("/transcribe_openai/{provider}")
 async def transcribe_audio(
+    request: Request,
+    response: Response,
     provider: str = Path(..., description="Choose from: whisper, gpt_4o, gpt_4o_mini"),
     file: UploadFile = File(...),
-    language_code: str = Form("en")
+    language_code: str = Form("en"),
+    long_audio: bool = Form(False)
 ):
     if file.content_type not in ["audio/mpeg", "audio/mp3"]:
         return JSONResponse(status_code=400, content={"error": "Invalid audio format. Please upload an MP3 file."})
 
-    audio_bytes = await file.read()
+    start_time = time.time()
+    upload = await spool_upload(file, suffix=".mp3")
 
     try:
-        if provider == "whisper":
-            transcript, latency = transcribe_with_whisper(audio_bytes, language_code)
+        # Files over the upstream size limit can only go through the chunked path.
+        long_audio = long_audio or upload.size > OPENAI_MAX_UPLOAD_BYTES
+
+        bypass = wants_bypass(request.headers)
+        cache_key = transcription_cache.key(
+            upload.sha256, f"openai-{provider}", language_code=language_code, long_audio=long_audio
+        )
+        cached = await asyncio.to_thread(transcription_cache.get_json, cache_key, bypass=bypass)
+        if cached is not None:
+            response.headers["X-Cache"] = "HIT"
+            return {
+                "provider": provider,
+                **cached,
+                "latency_seconds": round(time.time() - start_time, 3),
+                "language_code": language_code
+            }
+
+        segments = None
+        if long_audio and provider in ("whisper", "gpt_4o", "gpt_4o_mini"):
+            transcript, segments = await run_blocking(provider, transcribe_long_audio, upload.path, provider, language_code)
+            latency = time.time() - start_time
+        elif provider == "whisper":
+            transcript, latency = await run_blocking(provider, transcribe_with_whisper, upload.path, language_code)
         elif provider == "gpt_4o":
-            transcript, latency = transcribe_with_gpt_4o(audio_bytes, language_code)
+            transcript, latency = await run_blocking(provider, transcribe_with_gpt_4o, upload.path, language_code)
         elif provider == "gpt_4o_mini":
-            transcript, latency = transcribe_with_gpt_4o_mini(audio_bytes, language_code)
+            transcript, latency = await run_blocking(provider, transcribe_with_gpt_4o_mini, upload.path, language_code)
         else:
             return JSONResponse(status_code=400, content={"error": f"Unsupported provider '{provider}'."})
 
+        result = {"transcript": transcript}
+        if segments is not None:
+            result["segments"] = segments
+        await asyncio.to_thread(transcription_cache.set_json, cache_key, result)
+        response.headers["X-Cache"] = "BYPASS" if bypass else "MISS"
+        await _record_artifact(
+            "transcription", provider=f"openai-{provider}", language=language_code, input_hash=upload.sha256,
+            content=json.dumps(result, ensure_ascii=False), latency=latency, metadata={"long_audio": long_audio}
+        )
         return {
             "provider": provider,
-            "transcript": transcript,
+            **result,
             "latency_seconds": round(latency, 3),
             "language_code": language_code
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+    finally:
+        upload.cleanup()
+
+
+@app.websocket("/ws/transcribe/google")
+async def transcribe_stream_google(
+    websocket: WebSocket,
+    language_code: str = "en-US",
+    encoding: str = "linear16",
+    sample_rate: int = 16000,
+    interim_results: bool = True
+):
+    """Binary frames carry audio; a text frame "EOS" (or disconnecting) ends the audio.
+    Interim and final results are sent back as JSON as soon as Google produces them."""
+    await websocket.accept()
+
+    try:
+        session = GoogleStreamingSession(language_code, encoding, sample_rate, interim_results)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1003)
+        return
+
+    async def forward_results():
+        async for message in session.messages():
+            await websocket.send_json(message)
+
+    worker = asyncio.create_task(run_blocking("google-streaming", session.run))
+    sender = asyncio.create_task(forward_results())
+
+    disconnected = False
+    try:
+        while not worker.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                disconnected = True
+                break
+            if message.get("bytes"):
+                session.feed(message["bytes"])
+            elif message.get("text") == "EOS":
+                break
+    finally:
+        session.close()
+
+    try:
+        await worker
+    except ProviderBusy as e:
+        sender.cancel()
+        if not disconnected:
+            await websocket.send_json({"type": "error", "detail": e.detail})
+            await websocket.close(code=1013)
+        return
+    except Exception:
+        pass  # already reported to the client by the session
 
+    if disconnected:
+        sender.cancel()
+        return
+    await sender
+    await websocket.close()
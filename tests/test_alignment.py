@@ -0,0 +1,23 @@
+from transcribers.alignment import Turn, Word, assign_to_turns
+
+
+TURNS = [Turn(0, 10, "A"), Turn(10.5, 20, "B"), Turn(20.5, 30, "C")]
+
+
+def test_point_sized_words_go_to_the_containing_turn():
+    words = [Word(15, 15, "b"), Word(5, 5, "a"), Word(12, 12, "b")]
+    assert assign_to_turns(TURNS, words) == [1, 0, 1]
+
+
+def test_point_sized_word_on_a_turn_start():
+    assert assign_to_turns(TURNS, [Word(10.5, 10.5, "b"), Word(0, 0, "a")]) == [1, 0]
+
+
+def test_point_sized_word_in_a_gap_goes_to_the_nearest_turn():
+    words = [Word(10.1, 10.1, "a"), Word(10.4, 10.4, "b")]
+    assert assign_to_turns(TURNS, words) == [0, 1]
+    assert assign_to_turns(TURNS, words, fill_nearest=False) == [None, None]
+
+
+def test_straddling_word_goes_to_the_larger_overlap():
+    assert assign_to_turns(TURNS, [Word(9, 12, "b"), Word(19, 20.6, "b")]) == [1, 1]
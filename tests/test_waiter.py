@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from core.waiter import (
+    CompletionNotifier, JobCancelled, JobTimeout, JobWaiter, PollPolicy, job_ids_from_event, sns_subscribe_url,
+)
+
+
+class StubProbe:
+    """Reports the job as running for `pending` calls, then returns `result`."""
+
+    def __init__(self, pending: int, result="done"):
+        self.pending = pending
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.result if self.calls > self.pending else None
+
+
+def test_intervals_back_off_to_the_ceiling():
+    policy = PollPolicy(initial=1, factor=2, max_interval=5, jitter=0)
+    intervals = policy.intervals()
+    assert [next(intervals) for _ in range(5)] == [1, 2, 4, 5, 5]
+
+
+def test_for_duration_scales_ceiling_and_deadline():
+    short = PollPolicy.for_duration(10, callbacks=False)
+    long = PollPolicy.for_duration(3600, callbacks=False)
+    assert short.max_interval <= long.max_interval
+    assert short.deadline <= long.deadline
+    assert long.deadline >= 3600
+
+
+def test_waiter_returns_once_the_probe_reports_a_result():
+    probe = StubProbe(pending=2)
+    waiter = JobWaiter(PollPolicy(initial=0.01, factor=1, jitter=0, deadline=5), CompletionNotifier())
+    assert waiter.wait("job-1", probe) == "done"
+    assert probe.calls == 3
+
+
+def test_waiter_times_out():
+    waiter = JobWaiter(PollPolicy(initial=0.01, factor=1, jitter=0, deadline=0.05), CompletionNotifier())
+    with pytest.raises(JobTimeout):
+        waiter.wait("job-1", StubProbe(pending=1000))
+
+
+def test_notification_cuts_the_sleep_short():
+    notifier = CompletionNotifier()
+    probe = StubProbe(pending=1)
+    waiter = JobWaiter(PollPolicy(initial=30, factor=1, jitter=0, deadline=60), notifier)
+
+    # Stands in for the provider's completion event arriving at /callbacks/jobs.
+    def callback():
+        while notifier.waiting() == 0:
+            time.sleep(0.005)
+        assert notifier.notify("job-1")
+
+    thread = threading.Thread(target=callback)
+    thread.start()
+    started = time.monotonic()
+    assert waiter.wait("job-1", probe) == "done"
+    thread.join()
+    assert time.monotonic() - started < 5
+    assert notifier.waiting() == 0
+    assert not notifier.notify("job-1")
+
+
+def test_cancel_stops_the_wait():
+    cancel = threading.Event()
+    waiter = JobWaiter(PollPolicy(initial=30, factor=1, jitter=0, deadline=60), CompletionNotifier())
+    threading.Timer(0.05, cancel.set).start()
+    with pytest.raises(JobCancelled):
+        waiter.wait("job-1", StubProbe(pending=1000), cancel=cancel)
+
+
+def test_async_waiter_wakes_on_notification():
+    notifier = CompletionNotifier()
+    calls = []
+
+    async def probe():
+        calls.append(1)
+        return "done" if len(calls) > 1 else None
+
+    async def run():
+        waiter = JobWaiter(PollPolicy(initial=30, factor=1, jitter=0, deadline=60), notifier)
+        task = asyncio.create_task(waiter.wait_async("job-1", probe))
+        while notifier.waiting() == 0:
+            await asyncio.sleep(0.005)
+        notifier.notify("job-1")
+        return await asyncio.wait_for(task, 5)
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_job_ids_from_eventbridge():
+    event = {"detail-type": "Transcribe Job State Change", "detail": {"TranscriptionJobName": "job-1"}}
+    assert job_ids_from_event(event) == ["job-1"]
+
+
+def test_job_ids_from_sns_wrapped_event():
+    inner = {"detail": {"TranscriptionJobName": "job-2"}}
+    assert job_ids_from_event({"Type": "Notification", "Message": json.dumps(inner)}) == ["job-2"]
+    assert job_ids_from_event({"Type": "Notification", "Message": "not json"}) == []
+
+
+def test_job_ids_from_azure_web_hook():
+    event = {"self": "https://westeurope.api.cognitive.microsoft.com/speechtotext/v3.2/transcriptions/abc-123"}
+    assert job_ids_from_event(event) == ["abc-123"]
+    assert job_ids_from_event({"unrelated": True}) == []
+
+
+def test_sns_subscribe_url_only_trusts_aws():
+    confirm = {"Type": "SubscriptionConfirmation", "SubscribeURL": "https://sns.eu-west-1.amazonaws.com/?Action=x"}
+    assert sns_subscribe_url(confirm) == confirm["SubscribeURL"]
+    assert sns_subscribe_url({**confirm, "SubscribeURL": "https://evil.example.com/"}) is None
+    assert sns_subscribe_url({"Type": "Notification"}) is None
@@ -0,0 +1,60 @@
+import re
+
+# Sentence ends, including CJK full-width punctuation that is not followed by a space.
+_SENTENCE_END = re.compile(r"(?<=[.!?;。！？；])\s+|(?<=[。！？；])")
+_CLAUSE_END = re.compile(r"(?<=[,:，、：])\s*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _size(text: str) -> int:
+    # Limits are counted in UTF-8 bytes: Google's is defined that way and the
+    # others (in characters) are never exceeded by a byte count.
+    return len(text.encode("utf-8"))
+
+
+def _hard_split(text: str, max_bytes: int) -> list[str]:
+    pieces, current = [], ""
+    for char in text:
+        if current and _size(current + char) > max_bytes:
+            pieces.append(current)
+            current = ""
+        current += char
+    return pieces + [current] if current else pieces
+
+
+def _units(text: str, max_bytes: int) -> list[str]:
+    """Sentences, broken further at clauses, words and finally characters until each fits."""
+    units = []
+    for sentence in filter(None, (s.strip() for s in _SENTENCE_END.split(text))):
+        if _size(sentence) <= max_bytes:
+            units.append(sentence)
+            continue
+        for clause in filter(None, (c.strip() for c in _CLAUSE_END.split(sentence))):
+            if _size(clause) <= max_bytes:
+                units.append(clause)
+                continue
+            for word in _WHITESPACE.split(clause):
+                units.extend(_hard_split(word, max_bytes) if _size(word) > max_bytes else [word])
+    return units
+
+
+def split_text(text: str, max_bytes: int, first_max_bytes: int | None = None) -> list[str]:
+    """Splits `text` at sentence boundaries into segments of at most `max_bytes` UTF-8 bytes.
+
+    Neighbouring sentences are packed together up to the limit; the first
+    segment can be kept shorter (`first_max_bytes`, though never less than
+    one sentence) so it synthesizes fast.
+    """
+    first_max_bytes = min(first_max_bytes or max_bytes, max_bytes)
+    segments, current = [], ""
+    for unit in _units(text, max_bytes):
+        limit = max_bytes if segments else first_max_bytes
+        candidate = f"{current} {unit}" if current else unit
+        if current and _size(candidate) > limit:
+            segments.append(current)
+            current = unit
+        else:
+            current = candidate
+    if current:
+        segments.append(current)
+    return segments
@@ -0,0 +1,77 @@
+import os
+
+from text_to_speech.chunking import split_text
+from text_to_speech.store import tts_store
+from text_to_speech.tts_aws import polly_voice, stream_aws, synthesize_aws
+from text_to_speech.tts_azure import azure_voice, synthesize_azure
+from text_to_speech.tts_google import google_voice, synthesize_google
+
+# provider -> (store voice key for a language, synthesize(text, language_code) -> bytes)
+TTS_PROVIDERS = {
+    "google": (google_voice, synthesize_google),
+    "aws": (polly_voice, synthesize_aws),
+    "azure": (azure_voice, synthesize_azure),
+}
+
+# Largest text each provider accepts per request, in UTF-8 bytes (Google: 5000
+# bytes; Polly: 3000 billed characters; Azure: ~10 minutes of audio).
+TTS_TEXT_LIMITS = {
+    "google": int(os.getenv("TTS_GOOGLE_MAX_BYTES", "4800")),
+    "aws": int(os.getenv("TTS_AWS_MAX_BYTES", "2900")),
+    "azure": int(os.getenv("TTS_AZURE_MAX_BYTES", "4800")),
+}
+
+# Providers that can hand back audio while it is still being generated.
+TTS_STREAMERS = {
+    "aws": stream_aws,
+}
+
+
+def stored_tts(text: str, language_code: str, providers) -> tuple[str, str] | None:
+    """(provider, path) of an already stored rendering of `text` by any of `providers`."""
+    for provider in providers:
+        voice_fn, _ = TTS_PROVIDERS[provider]
+        path = tts_store.get(provider, voice_fn(language_code), text)
+        if path:
+            return provider, path
+    return None
+
+
+def tts_with(provider: str, text: str, language_code: str, track=None) -> str:
+    """Synthesizes through the store; `track`, a context manager factory, wraps only the upstream call."""
+    if not text.strip():
+        raise ValueError("Text is empty")
+    voice_fn, synthesize = TTS_PROVIDERS[provider]
+
+    def render() -> bytes:
+        # Text over the provider's limit is synthesized in sentence-aligned
+        # pieces; MP3 frames concatenate into one playable file.
+        segments = split_text(text, TTS_TEXT_LIMITS[provider])
+        if track is None:
+            return b"".join(synthesize(segment, language_code) for segment in segments)
+        with track():
+            return b"".join(synthesize(segment, language_code) for segment in segments)
+
+    return tts_store.synthesize(provider, voice_fn(language_code), text, render)
+
+
+def tts_stream(provider: str, text: str, language_code: str, track=None):
+    """Yields the audio for one segment (within the provider's limit) as it arrives, storing it when complete.
+
+    `track` wraps the call up to the provider's first response.
+    """
+    voice_fn, synthesize = TTS_PROVIDERS[provider]
+    streamer = TTS_STREAMERS.get(provider)
+
+    def start():
+        if streamer is not None:
+            return streamer(text, language_code)
+        return [synthesize(text, language_code)]
+
+    def open_audio():
+        if track is None:
+            return start()
+        with track():
+            return start()
+
+    return tts_store.stream(provider, voice_fn(language_code), text, open_audio)
@@ -0,0 +1,206 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from core.artifacts import artifact_index, hash_text
+from core.metrics import count_bytes
+
+load_dotenv()
+
+TTS_OUTPUT_DIR = os.getenv("TTS_OUTPUT_DIR", "tts_output")
+TTS_STORE_MAX_BYTES = int(os.getenv("TTS_STORE_MAX_BYTES", str(1024 * 1024 * 1024)))
+TTS_STORE_MAX_AGE = float(os.getenv("TTS_STORE_MAX_AGE", str(7 * 24 * 3600)))
+TTS_STORE_EVICT_INTERVAL = float(os.getenv("TTS_STORE_EVICT_INTERVAL", "60"))
+# Files used this recently are never evicted, so a path just handed to a
+# caller is still there when the caller opens it.
+TTS_STORE_EVICT_GRACE = float(os.getenv("TTS_STORE_EVICT_GRACE", "60"))
+STREAM_CHUNK_BYTES = 16 * 1024
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg")
+
+
+class TTSStore:
+    """Synthesized audio on disk, keyed by (provider, voice, text, format).
+
+    Repeated phrases are served from the existing file, concurrent requests
+    for the same phrase wait for a single synthesis, and the directory is
+    trimmed by age and total size.
+    """
+
+    def __init__(self, directory: str = TTS_OUTPUT_DIR, max_bytes: int = TTS_STORE_MAX_BYTES,
+                 max_age: float = TTS_STORE_MAX_AGE, evict_interval: float = TTS_STORE_EVICT_INTERVAL,
+                 evict_grace: float = TTS_STORE_EVICT_GRACE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evict_interval = evict_interval
+        self.evict_grace = evict_grace
+        self.hits = 0
+        self.misses = 0
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._last_evict = 0.0
+
+    def path_for(self, provider: str, voice: str, text: str, audio_format: str = "mp3") -> str:
+        digest = hashlib.sha256(f"{provider}\0{voice}\0{audio_format}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{provider}_tts_{digest[:32]}.{audio_format}")
+
+    def get(self, provider: str, voice: str, text: str, audio_format: str = "mp3") -> str | None:
+        path = self.path_for(provider, voice, text, audio_format)
+        try:
+            os.utime(path)  # eviction is least-recently-used by mtime
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, provider: str, voice: str, text: str, audio: bytes, audio_format: str = "mp3") -> str:
+        path = self.path_for(provider, voice, text, audio_format)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._maybe_evict()
+        return path
+
+    def _lock_for(self, path: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = threading.Lock()
+            return lock
+
+    def synthesize(self, provider: str, voice: str, text: str, synthesize_fn, audio_format: str = "mp3") -> str:
+        """Returns the stored file for this phrase, calling `synthesize_fn()` for the audio bytes on a miss."""
+        path = self.get(provider, voice, text, audio_format)
+        if path is not None:
+            self.hits += 1
+            return path
+
+        lock = self._lock_for(self.path_for(provider, voice, text, audio_format))
+        with lock:
+            path = self.get(provider, voice, text, audio_format)
+            if path is not None:
+                self.hits += 1
+                return path
+            self.misses += 1
+            start = time.time()
+            audio = synthesize_fn()
+            count_bytes(f"tts-{provider}", "synthesize", len(audio))
+            path = self.put(provider, voice, text, audio, audio_format)
+            self._index(provider, voice, text, path, audio, time.time() - start)
+            return path
+
+    def stream(self, provider: str, voice: str, text: str, open_fn, audio_format: str = "mp3",
+               chunk_size: int = STREAM_CHUNK_BYTES):
+        """Like `synthesize`, but yields the audio in chunks as `open_fn()` (an iterable of bytes) produces them.
+
+        The phrase is stored once the provider's stream is complete.
+        """
+        path = self.get(provider, voice, text, audio_format)
+        if path is None:
+            lock = self._lock_for(self.path_for(provider, voice, text, audio_format))
+            with lock:
+                path = self.get(provider, voice, text, audio_format)
+                if path is None:
+                    self.misses += 1
+                    start = time.time()
+                    chunks = []
+                    for chunk in open_fn():
+                        chunks.append(chunk)
+                        yield chunk
+                    audio = b"".join(chunks)
+                    count_bytes(f"tts-{provider}", "synthesize", len(audio))
+                    path = self.put(provider, voice, text, audio, audio_format)
+                    self._index(provider, voice, text, path, audio, time.time() - start)
+                    return
+
+        self.hits += 1
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    @staticmethod
+    def _index(provider: str, voice: str, text: str, path: str, audio: bytes, latency: float):
+        # The file stays under this store's eviction; the index only points at it.
+        artifact_index.try_record(
+            "tts", provider=provider, input_hash=hash_text(text), path=path, content=audio,
+            latency=latency, metadata={"voice": voice}
+        )
+
+    def _maybe_evict(self):
+        now = time.time()
+        if now - self._last_evict < self.evict_interval:
+            return
+        self._last_evict = now
+        self.evict()
+
+    def evict(self) -> int:
+        """Deletes files older than max_age, then least recently used files until under max_bytes.
+
+        Files used within the last `evict_grace` seconds are kept either way.
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if name.endswith(".tmp"):
+                # Leftovers from writers that died mid-write.
+                if now - stat.st_mtime > 3600:
+                    removed += self._remove(path)
+                continue
+            if not name.endswith(AUDIO_EXTENSIONS):
+                continue
+            if self.max_age > 0 and now - stat.st_mtime > max(self.max_age, self.evict_grace):
+                removed += self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes or now - mtime < self.evict_grace:
+                break  # entries are oldest first, so the rest are recent too
+            removed += self._remove(path)
+            total -= size
+
+        with self._locks_guard:
+            self._locks = {path: lock for path, lock in self._locks.items() if lock.locked()}
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+tts_store = TTSStore()
@@ -0,0 +1,77 @@
+import asyncio
+import os
+
+from core.dispatch import ProviderBusy, run_blocking
+from text_to_speech.chunking import split_text
+from text_to_speech.providers import TTS_TEXT_LIMITS, tts_stream
+
+# Segments are kept well under the provider limits so long texts synthesize
+# in parallel, and the first one is shorter still to get audio out quickly.
+TTS_STREAM_SEGMENT_BYTES = int(os.getenv("TTS_STREAM_SEGMENT_BYTES", "800"))
+TTS_STREAM_FIRST_SEGMENT_BYTES = int(os.getenv("TTS_STREAM_FIRST_SEGMENT_BYTES", "200"))
+# Segments synthesized ahead of the one being sent, per request.
+TTS_STREAM_AHEAD = int(os.getenv("TTS_STREAM_AHEAD", "4"))
+# Longest pause between retries when a later segment finds the pool full.
+TTS_STREAM_BUSY_RETRY_SECONDS = float(os.getenv("TTS_STREAM_BUSY_RETRY_SECONDS", "1"))
+
+_DONE = object()
+
+
+def stream_segments(provider: str, text: str) -> list[str]:
+    limit = min(TTS_STREAM_SEGMENT_BYTES, TTS_TEXT_LIMITS[provider])
+    return split_text(text, limit, TTS_STREAM_FIRST_SEGMENT_BYTES)
+
+
+async def stream_tts(provider: str, text: str, language_code: str, track=None):
+    """Async iterator over MP3 chunks for `text`, in order.
+
+    Up to TTS_STREAM_AHEAD segments are synthesized concurrently on the
+    provider's pool; each segment's audio is forwarded as soon as it and
+    every segment before it have arrived.
+    """
+    if not text.strip():
+        raise ValueError("Text is empty")
+    segments = stream_segments(provider, text)
+    loop = asyncio.get_running_loop()
+    queues = [asyncio.Queue() for _ in segments]
+    tasks = []
+
+    def produce(index: int):
+        # Runs on a worker thread; chunks reach the event loop in order, before
+        # the pool future completes.
+        for chunk in tts_stream(provider, segments[index], language_code, track):
+            loop.call_soon_threadsafe(queues[index].put_nowait, chunk)
+
+    async def synthesize(index: int):
+        try:
+            delay = 0.05
+            while True:
+                try:
+                    await run_blocking(f"tts-{provider}", produce, index)
+                    break
+                except ProviderBusy:
+                    # Only the first segment may be refused; once the response has
+                    # started, a full pool must not cut the audio short.
+                    if index == 0:
+                        raise
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, TTS_STREAM_BUSY_RETRY_SECONDS)
+            queues[index].put_nowait(_DONE)
+        except BaseException as e:
+            queues[index].put_nowait(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
+    try:
+        for index in range(len(segments)):
+            while len(tasks) < min(len(segments), index + 1 + TTS_STREAM_AHEAD):
+                tasks.append(asyncio.create_task(synthesize(len(tasks))))
+            while (chunk := await queues[index].get()) is not _DONE:
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                yield chunk
+    finally:
+        # A failed segment or a disconnected client stops the rest; segments
+        # already on a worker still finish and land in the store.
+        for task in tasks:
+            task.cancel()
@@ -1,19 +1,30 @@
-import boto3
-import uuid
-import os
+from core.clients import boto3_client
+from text_to_speech.store import tts_store
 
-def tts_aws(text: str, language_code: str) -> str:
-    polly = boto3.client("polly")
+def polly_voice(language_code: str) -> str:
+    return "Joanna" if language_code.startswith("en") else "Aditi"
+
+def synthesize_aws(text: str, language_code: str) -> bytes:
+    polly = boto3_client("polly")
     response = polly.synthesize_speech(
         Text=text,
         OutputFormat="mp3",
-        VoiceId="Joanna" if language_code.startswith("en") else "Aditi"  
+        VoiceId=polly_voice(language_code)
     )
+    return response["AudioStream"].read()
 
-    output_dir = "tts_output"
-    os.makedirs(output_dir, exist_ok=True)
-    filename = f"{output_dir}/aws_tts_{uuid.uuid4().hex}.mp3"
-    with open(filename, "wb") as f:
-        f.write(response["AudioStream"].read())
+def stream_aws(text: str, language_code: str, chunk_size: int = 16 * 1024):
+    """Starts synthesis and returns an iterator over Polly's AudioStream as it arrives."""
+    polly = boto3_client("polly")
+    response = polly.synthesize_speech(
+        Text=text,
+        OutputFormat="mp3",
+        VoiceId=polly_voice(language_code)
+    )
+    return response["AudioStream"].iter_chunks(chunk_size)
 
-    return filename
+def tts_aws(text: str, language_code: str) -> str:
+    return tts_store.synthesize(
+        "aws", polly_voice(language_code), text,
+        lambda: synthesize_aws(text, language_code)
+    )
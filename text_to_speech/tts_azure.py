@@ -1,22 +1,22 @@
 import azure.cognitiveservices.speech as speechsdk
-import uuid
-import os
+from core.clients import azure_synthesizer
+from text_to_speech.store import tts_store
 
-def tts_azure(text: str, language_code: str) -> str:
-    speech_key = os.getenv("AZURE_SPEECH_KEY")
-    region = os.getenv("AZURE_REGION")
-
-    speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=region)
-    speech_config.speech_synthesis_voice_name = language_code
+def synthesize_azure(text: str, language_code: str) -> bytes:
+    with azure_synthesizer(language_code) as synthesizer:
+        result = synthesizer.speak_text_async(text).get()
+        # Raised inside the block so a failed synthesizer is not pooled again.
+        if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+            raise Exception(f"Speech synthesis failed: {result.reason}")
 
-    
-    filename = f"azure_tts_{uuid.uuid4().hex}.mp3"
-    audio_output = speechsdk.audio.AudioOutputConfig(filename=filename)
+    return result.audio_data
 
-    synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=audio_output)
-    result = synthesizer.speak_text_async(text).get()
+def azure_voice(language_code: str) -> str:
+    # The SDK picks the locale's default neural voice.
+    return language_code
 
-    if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
-        raise Exception(f"Speech synthesis failed: {result.reason}")
-
-    return filename  
+def tts_azure(text: str, language_code: str) -> str:
+    return tts_store.synthesize(
+        "azure", azure_voice(language_code), text,
+        lambda: synthesize_azure(text, language_code)
+    )
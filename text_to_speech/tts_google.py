@@ -1,9 +1,9 @@
 from google.cloud import texttospeech
-import uuid
-import os
+from core.clients import google_tts_client
+from text_to_speech.store import tts_store
 
-def tts_google(text: str, language_code: str) -> str:
-    client = texttospeech.TextToSpeechClient()
+def synthesize_google(text: str, language_code: str) -> bytes:
+    client = google_tts_client()
     synthesis_input = texttospeech.SynthesisInput(text=text)
 
     voice = texttospeech.VoiceSelectionParams(
@@ -17,11 +17,13 @@ def tts_google(text: str, language_code: str) -> str:
         voice=voice,
         audio_config=audio_config
     )
+    return response.audio_content
 
-    output_dir = "tts_output"
-    os.makedirs(output_dir, exist_ok=True)
-    filename = f"{output_dir}/google_tts_{uuid.uuid4().hex}.mp3"
-    with open(filename, "wb") as out:
-        out.write(response.audio_content)
+def google_voice(language_code: str) -> str:
+    return f"{language_code}/NEUTRAL"
 
-    return filename
+def tts_google(text: str, language_code: str) -> str:
+    return tts_store.synthesize(
+        "google", google_voice(language_code), text,
+        lambda: synthesize_google(text, language_code)
+    )
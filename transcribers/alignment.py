@@ -0,0 +1,114 @@
+from typing import NamedTuple, Iterable
+
+
+class Turn(NamedTuple):
+    start: float
+    end: float
+    speaker: str
+
+
+class Word(NamedTuple):
+    start: float
+    end: float
+    text: str
+
+
+def assign_to_turns(turns: list[Turn], items: list, fill_nearest: bool = True) -> list[int | None]:
+    """Returns, for every item, the index of the turn it overlaps most.
+
+    Items are anything with `start`/`end` (words or whole segments). Turns
+    and items are each sorted once and matched with a forward sweep, so an
+    item that straddles a turn boundary goes to the turn holding most of it
+    instead of being dropped. Items that fall in a gap between turns go to
+    the nearest turn when `fill_nearest` is set, otherwise to None.
+    """
+    turn_order = sorted(range(len(turns)), key=lambda i: (turns[i].start, turns[i].end))
+    item_order = sorted(range(len(items)), key=lambda i: (items[i].start, items[i].end))
+    assigned: list[int | None] = [None] * len(items)
+
+    first = 0
+    last_ended = None
+    for item_index in item_order:
+        item = items[item_index]
+
+        # Items are visited by start time, so a turn that ended before this
+        # item started cannot overlap any later item either.
+        while first < len(turn_order) and turns[turn_order[first]].end <= item.start:
+            ended = turn_order[first]
+            if last_ended is None or turns[ended].end >= turns[last_ended].end:
+                last_ended = ended
+            first += 1
+
+        best, best_overlap = None, 0.0
+        preceding = last_ended
+        position = first
+        while position < len(turn_order) and (turns[turn_order[position]].start < item.end
+                                               or turns[turn_order[position]].start <= item.start):
+            candidate = turn_order[position]
+            turn = turns[candidate]
+            overlap = min(turn.end, item.end) - max(turn.start, item.start)
+            # Zero-length items (Whisper emits many) overlap nothing, so a
+            # turn that contains one is a match too.
+            if overlap > best_overlap or (best is None and turn.start <= item.start and item.end <= turn.end):
+                best, best_overlap = candidate, overlap
+            elif turn.end <= item.start and (preceding is None or turn.end > turns[preceding].end):
+                preceding = candidate
+            position += 1
+
+        if best is None and fill_nearest:
+            following = turn_order[position] if position < len(turn_order) else None
+            best = _nearest(turns, item, preceding, following)
+
+        assigned[item_index] = best
+
+    return assigned
+
+
+def _nearest(turns: list[Turn], item, before: int | None, after: int | None) -> int | None:
+    if before is None:
+        return after
+    if after is None:
+        return before
+    gap_before = item.start - turns[before].end
+    gap_after = turns[after].start - item.end
+    return before if gap_before <= gap_after else after
+
+
+def group_by_turn(turns: list[Turn], items: list, fill_nearest: bool = True) -> list[list]:
+    """Buckets items per turn (in the turns' original order), each bucket in time order."""
+    buckets = [[] for _ in turns]
+    assigned = assign_to_turns(turns, items, fill_nearest=fill_nearest)
+    for item_index in sorted(range(len(items)), key=lambda i: items[i].start):
+        turn_index = assigned[item_index]
+        if turn_index is not None:
+            buckets[turn_index].append(items[item_index])
+    return buckets
+
+
+def turns_from_pyannote(diarization) -> list[Turn]:
+    return [
+        Turn(turn.start, turn.end, speaker)
+        for turn, _, speaker in diarization.itertracks(yield_label=True)
+    ]
+
+
+def words_from_whisper(result: dict) -> list[Word]:
+    return [
+        Word(word["start"], word["end"], word["word"].strip())
+        for segment in result["segments"]
+        for word in segment.get("words", [])
+    ]
+
+
+def turns_from_speaker_tags(words: Iterable) -> list[Turn]:
+    """Collapses Google diarized words (with `speaker_tag`) into one turn per run of the same speaker."""
+    turns = []
+    for word in words:
+        start = word.start_time.total_seconds()
+        end = word.end_time.total_seconds()
+        speaker = str(word.speaker_tag)
+        if turns and turns[-1].speaker == speaker:
+            turns[-1] = Turn(turns[-1].start, end, speaker)
+        else:
+            turns.append(Turn(start, end, speaker))
+    return turns
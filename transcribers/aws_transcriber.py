@@ -1,13 +1,17 @@
-import boto3
 import uuid
-import time
 import os
-import tempfile
+import threading
 from dotenv import load_dotenv
+from core.audio import probe_duration
+from core.clients import boto3_client
+from core.cloud_storage import KEEP_STAGED_OBJECTS, delete_s3, upload_s3
+from core.http_client import get_session
+from core.metrics import time_stage
+from core.waiter import JobWaiter, PollPolicy
 
 load_dotenv(override=True)  
 
-def transcribe_aws(audio_bytes: bytes, language_code: str) -> str:
+def transcribe_aws(audio_path: str, language_code: str, cancel: threading.Event | None = None) -> str:
     region_name = os.getenv("AWS_REGION")
     bucket = os.getenv("AWS_BUCKET_NAME")
     if not region_name:
@@ -15,36 +19,47 @@ def transcribe_aws(audio_bytes: bytes, language_code: str) -> str:
     if not bucket:
         raise Exception("AWS_BUCKET_NAME is not set in .env")
 
-  
-    s3 = boto3.client('s3', region_name=region_name)
-    transcribe = boto3.client('transcribe', region_name=region_name)
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
-        temp_audio.write(audio_bytes)
-        temp_audio_path = temp_audio.name
-        object_key = f"audio/{uuid.uuid4()}.wav"
-        s3.upload_file(temp_audio_path, bucket, object_key)
+    transcribe = boto3_client('transcribe', region_name)
 
+    media_format = os.path.splitext(audio_path)[1].lower().lstrip(".") or "wav"
+    object_key = f"audio/{uuid.uuid4()}.{media_format}"
+    job_uri = upload_s3(audio_path, bucket, object_key, region_name)
     job_name = f"job-{uuid.uuid4()}"
-    job_uri = f"s3://{bucket}/{object_key}"
-
-    transcribe.start_transcription_job(
-        TranscriptionJobName=job_name,
-        Media={'MediaFileUri': job_uri},
-        MediaFormat='wav',
-        LanguageCode=language_code
-    )
-
-    while True:
-        status = transcribe.get_transcription_job(TranscriptionJobName=job_name)
-        if status['TranscriptionJob']['TranscriptionJobStatus'] in ['COMPLETED', 'FAILED']:
-            break
-        time.sleep(5)
-
-    if status['TranscriptionJob']['TranscriptionJobStatus'] == 'COMPLETED':
-        transcript_url = status['TranscriptionJob']['Transcript']['TranscriptFileUri']
-        import requests
-        result = requests.get(transcript_url).json()
-        return result['results']['transcripts'][0]['transcript']
-    else:
-        return "Transcription failed"
+
+    # The staged audio is only needed until the job finishes; both are deleted
+    # either way so nothing accumulates in the bucket or the job list.
+    try:
+        with time_stage("aws", "provider_call"):
+            transcribe.start_transcription_job(
+                TranscriptionJobName=job_name,
+                Media={'MediaFileUri': job_uri},
+                MediaFormat=media_format,
+                LanguageCode=language_code
+            )
+
+        def probe():
+            job = transcribe.get_transcription_job(TranscriptionJobName=job_name)['TranscriptionJob']
+            if job['TranscriptionJobStatus'] == 'FAILED':
+                raise Exception(f"AWS transcription failed: {job.get('FailureReason', 'unknown reason')}")
+            return job if job['TranscriptionJobStatus'] == 'COMPLETED' else None
+
+        waiter = JobWaiter(PollPolicy.for_duration(probe_duration(audio_path)), name="aws")
+        job = waiter.wait(job_name, probe, cancel=cancel)
+
+        transcript_url = job['Transcript']['TranscriptFileUri']
+        with time_stage("aws", "provider_call"):
+            result = get_session().get(transcript_url).json()
+    finally:
+        delete_s3(bucket, object_key, region_name)
+        _delete_job(transcribe, job_name)
+    return result['results']['transcripts'][0]['transcript']
+
+
+def _delete_job(transcribe, job_name: str):
+    if KEEP_STAGED_OBJECTS:
+        return
+    try:
+        transcribe.delete_transcription_job(TranscriptionJobName=job_name)
+    except Exception as e:
+        # Never started, or still running after a cancel.
+        print(f"Deleting AWS transcription job {job_name} failed: {e}")
@@ -0,0 +1,76 @@
+from core.http_client import get_async_client
+from core.waiter import JobWaiter, PollPolicy
+
+AZURE_API_VERSION = "2024-11-15"
+
+
+def fast_transcription_url(region: str) -> str:
+    return f"https://{region}.api.cognitive.microsoft.com/speechtotext/transcriptions:transcribe?api-version={AZURE_API_VERSION}"
+
+
+def transcription_status_url(region: str, job_id: str) -> str:
+    return f"https://{region}.api.cognitive.microsoft.com/speechtotext/transcriptions/{job_id}?api-version={AZURE_API_VERSION}"
+
+
+async def post_fast_transcription_async(region: str, headers: dict, files: dict) -> str | dict:
+    """Posts a fast transcription request; returns the text, or the job dict when Azure queued a batch job.
+
+    Failures raise, so callers never mistake an error message for a transcript.
+    """
+    url = fast_transcription_url(region)
+    response = await get_async_client(url).post(url, headers=headers, files=files)
+
+    if response.status_code != 200:
+        raise Exception(f"Azure Fast Transcription failed: {response.status_code} - {response.text}")
+
+    job = response.json()
+
+    if "combinedPhrases" in job:
+        return " ".join([p["text"] for p in job.get("combinedPhrases", [])]) or "Transcription completed but no text found."
+
+    if "id" not in job:
+        raise Exception(f"Azure Fast Transcription failed: No 'id' in response: {job}")
+
+    return job
+
+
+def _batch_status(poll_resp) -> dict | None:
+    if poll_resp.status_code != 200:
+        raise Exception(f"Polling failed: {poll_resp.status_code} - {poll_resp.text}")
+
+    poll_data = poll_resp.json()
+    status = poll_data.get("status", "")
+    if status == "Succeeded":
+        return poll_data
+    elif status == "Failed":
+        raise Exception(f"Transcription job failed: {poll_data}")
+    return None
+
+
+async def wait_for_batch_transcript_async(region: str, job_id: str, headers: dict, audio_seconds: float | None = None) -> str:
+    poll_url = transcription_status_url(region, job_id)
+    client = get_async_client(poll_url)
+
+    async def probe():
+        return _batch_status(await client.get(poll_url, headers=headers))
+
+    waiter = JobWaiter(PollPolicy.for_duration(audio_seconds), name="azure")
+    poll_data = await waiter.wait_async(job_id, probe)
+
+    files_url = poll_data["links"]["files"]
+    files_resp = await get_async_client(files_url).get(files_url, headers=headers)
+    if files_resp.status_code != 200:
+        raise Exception(f"Failed to fetch transcription files: {files_resp.status_code} - {files_resp.text}")
+
+    files_data = files_resp.json()
+    transcript_file_url = next(
+        (f["links"]["contentUrl"] for f in files_data["values"] if f["kind"] == "Transcription"), None
+    )
+
+    if not transcript_file_url:
+        raise Exception("Transcription succeeded, but no result file found.")
+
+    transcript_resp = await get_async_client(transcript_file_url).get(transcript_file_url)
+    transcript_data = transcript_resp.json()
+    text = " ".join([p["display"] for p in transcript_data.get("recognizedPhrases", [])])
+    return text or "Transcription was successful but no text found."
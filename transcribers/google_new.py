@@ -1,23 +1,13 @@
 from google.cloud import speech
-from pydub import AudioSegment
-import io
-import tempfile
-
-def convert_to_wav_linear16(input_path: str) -> str:
-    audio = AudioSegment.from_file(input_path)
-    audio = audio.set_frame_rate(16000).set_channels(1).set_sample_width(2)
-    temp_wav = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    audio.export(temp_wav.name, format="wav")
-    return temp_wav.name
+from core.audio import TARGET_SAMPLE_RATE, stream_pcm
+from core.clients import google_speech_client
 
 def transcribe_streaming_google(audio_path: str, language_code: str = "en-US") -> str:
-    audio_path = convert_to_wav_linear16(audio_path)
-
-    client = speech.SpeechClient()
+    client = google_speech_client()
 
     config = speech.RecognitionConfig(
         encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-        sample_rate_hertz=16000,
+        sample_rate_hertz=TARGET_SAMPLE_RATE,
         language_code=language_code,
     )
 
@@ -28,9 +18,8 @@ def transcribe_streaming_google(audio_path: str, language_code: str = "en-US") -
     )
 
     def generate_requests():
-        with io.open(audio_path, "rb") as audio_file:
-            while chunk := audio_file.read(4096):
-                yield speech.StreamingRecognizeRequest(audio_content=chunk)
+        for chunk in stream_pcm(audio_path):
+            yield speech.StreamingRecognizeRequest(audio_content=chunk)
 
     responses = client.streaming_recognize(
         config=streaming_config,
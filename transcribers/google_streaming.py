@@ -0,0 +1,161 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+
+from google.cloud import speech
+
+from core.clients import google_speech_client
+
+# Google closes a streaming_recognize call after ~5 minutes of audio, so each
+# stream is ended a little earlier and a new one takes over.
+GOOGLE_STREAM_ROLLOVER_SECONDS = float(os.getenv("GOOGLE_STREAM_ROLLOVER_SECONDS", "290"))
+
+ENCODINGS = {
+    "linear16": speech.RecognitionConfig.AudioEncoding.LINEAR16,
+    "ogg_opus": speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+    "webm_opus": speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
+}
+
+_END = object()
+
+
+class GoogleStreamingSession:
+    """Feeds live audio chunks into Google streaming recognition and publishes results as they arrive.
+
+    `feed()`/`close()` are called from the event loop, `run()` blocks on a
+    worker thread, and `messages()` yields interim/final results back on the
+    loop. With LINEAR16 audio, the audio after the last final result is
+    replayed into the next stream on rollover so no words are lost at the
+    seam; container formats (Opus) replay only their header chunk.
+    """
+
+    def __init__(self, language_code: str = "en-US", encoding: str = "linear16", sample_rate: int = 16000,
+                 interim_results: bool = True, rollover_seconds: float = GOOGLE_STREAM_ROLLOVER_SECONDS):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported encoding '{encoding}', choose from {', '.join(ENCODINGS)}")
+
+        self.language_code = language_code
+        self.encoding = encoding
+        self.sample_rate = sample_rate
+        self.interim_results = interim_results
+        self.rollover_seconds = rollover_seconds
+
+        self._audio = queue.Queue()
+        self._closed = False
+        self._loop = asyncio.get_running_loop()
+        self._messages: asyncio.Queue = asyncio.Queue()
+
+        self._header = None
+        # (end_seconds_in_stream, chunk) since the last final result; appended
+        # by the request iterator and trimmed by the response loop, which run
+        # on different gRPC threads.
+        self._unfinalized = []
+        self._unfinalized_lock = threading.Lock()
+        self._offset = 0.0
+        self.streams = 0
+
+    def feed(self, chunk: bytes):
+        if self.encoding != "linear16" and self._header is None:
+            self._header = chunk
+        self._audio.put(chunk)
+
+    def close(self):
+        self._closed = True
+        self._audio.put(_END)
+
+    async def messages(self):
+        while True:
+            message = await self._messages.get()
+            if message is _END:
+                return
+            yield message
+
+    def _publish(self, message):
+        self._loop.call_soon_threadsafe(self._messages.put_nowait, message)
+
+    def _chunk_seconds(self, chunk: bytes) -> float:
+        return len(chunk) / (2 * self.sample_rate) if self.encoding == "linear16" else 0.0
+
+    def _requests(self, replay: list[bytes], state: dict):
+        started = time.monotonic()
+        sent_seconds = 0.0
+        with self._unfinalized_lock:
+            self._unfinalized = []
+
+        for chunk in replay:
+            sent_seconds += self._chunk_seconds(chunk)
+            with self._unfinalized_lock:
+                self._unfinalized.append((sent_seconds, chunk))
+            yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+        while time.monotonic() - started < self.rollover_seconds:
+            try:
+                chunk = self._audio.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if chunk is _END:
+                state["ended"] = True
+                return
+            sent_seconds += self._chunk_seconds(chunk)
+            with self._unfinalized_lock:
+                self._unfinalized.append((sent_seconds, chunk))
+            yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+        state["wall_seconds"] = time.monotonic() - started
+
+    def _handle(self, response, state: dict):
+        for result in response.results:
+            if not result.alternatives:
+                continue
+            end = result.result_end_time.total_seconds() if result.result_end_time else 0.0
+            if result.is_final:
+                state["final_end"] = end
+                with self._unfinalized_lock:
+                    self._unfinalized = [(t, chunk) for t, chunk in self._unfinalized if t > end]
+            self._publish({
+                "type": "final" if result.is_final else "interim",
+                "transcript": result.alternatives[0].transcript,
+                "stability": result.stability,
+                "result_end_time": round(self._offset + end, 3),
+                "stream": self.streams,
+            })
+
+    def run(self):
+        replay = []
+        # Set-up failures (credentials, a config the proto rejects) must also
+        # reach the client as an error message followed by the end marker.
+        try:
+            client = google_speech_client()
+            config = speech.StreamingRecognitionConfig(
+                config=speech.RecognitionConfig(
+                    encoding=ENCODINGS[self.encoding],
+                    sample_rate_hertz=self.sample_rate,
+                    language_code=self.language_code,
+                ),
+                interim_results=self.interim_results,
+            )
+
+            while True:
+                state = {"ended": False, "final_end": 0.0, "wall_seconds": 0.0}
+                self.streams += 1
+                responses = client.streaming_recognize(config=config, requests=self._requests(replay, state))
+                for response in responses:
+                    self._handle(response, state)
+
+                if state["ended"]:
+                    break
+
+                if self.encoding == "linear16":
+                    with self._unfinalized_lock:
+                        replay = [chunk for _, chunk in self._unfinalized]
+                    self._offset += state["final_end"]
+                else:
+                    replay = [self._header] if self._header is not None else []
+                    self._offset += state["wall_seconds"]
+        except Exception as e:
+            self._publish({"type": "error", "detail": str(e)})
+            raise
+        finally:
+            self._publish(_END)
@@ -1,20 +1,26 @@
 from google.cloud import speech_v1p1beta1 as speech
-import io
 import os
 from dotenv import load_dotenv
+from core.audio import TARGET_SAMPLE_RATE, decode_to_pcm
+from core.clients import google_speech_beta_client
+from core.metrics import time_stage
 load_dotenv()
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 
-def transcribe_google(audio_bytes: bytes, language_code: str) -> str:
-    client = speech.SpeechClient()
+def transcribe_google(audio_path: str, language_code: str) -> str:
+    client = google_speech_beta_client()
 
-    audio = speech.RecognitionAudio(content=audio_bytes)
+    # Decoding to LINEAR16 first means the config matches whatever was uploaded,
+    # rather than assuming 44.1 kHz MP3.
+    with time_stage("google", "transcode"):
+        audio = speech.RecognitionAudio(content=decode_to_pcm(audio_path).data)
     config = speech.RecognitionConfig(
-        encoding=speech.RecognitionConfig.AudioEncoding.MP3,
-        sample_rate_hertz=44100,
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=TARGET_SAMPLE_RATE,
         language_code=language_code
     )
 
-    response = client.recognize(config=config, audio=audio)
+    with time_stage("google", "provider_call"):
+        response = client.recognize(config=config, audio=audio)
     transcript = " ".join([result.alternatives[0].transcript for result in response.results])
     return transcript
@@ -0,0 +1,174 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+
+from core.audio import SAMPLE_WIDTH, PCMAudio, decode_to_pcm
+from core.metrics import count_bytes, time_stage
+from transcribers.whisper import client
+
+# OpenAI rejects uploads above 25 MB; chunks are sent as in-memory 16 kHz mono
+# WAV (about 1.9 MB a minute), so ten minutes stays under that without an MP3
+# encode per chunk.
+OPENAI_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+# Chunks are at least a second long and the window must have room to cut in.
+LONG_AUDIO_MIN_CHUNK_SECONDS = max(1.0, float(os.getenv("LONG_AUDIO_MIN_CHUNK_SECONDS", "60")))
+LONG_AUDIO_MAX_CHUNK_SECONDS = max(LONG_AUDIO_MIN_CHUNK_SECONDS + 1,
+                                   float(os.getenv("LONG_AUDIO_MAX_CHUNK_SECONDS", "600")))
+LONG_AUDIO_OVERLAP_SECONDS = float(os.getenv("LONG_AUDIO_OVERLAP_SECONDS", "2"))
+LONG_AUDIO_FAN_OUT = int(os.getenv("LONG_AUDIO_FAN_OUT", "4"))
+
+OPENAI_MODELS = {
+    "whisper": "whisper-1",
+    "gpt_4o": "gpt-4o-transcribe",
+    "gpt_4o_mini": "gpt-4o-mini-transcribe",
+}
+# Only whisper-1 returns segment timestamps (verbose_json).
+TIMESTAMPED_MODELS = {"whisper-1"}
+
+
+class Chunk:
+    def __init__(self, start_ms: int, end_ms: int, keep_from_ms: int, keep_until_ms: int):
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.keep_from_ms = keep_from_ms
+        self.keep_until_ms = keep_until_ms
+
+    @property
+    def overlaps_previous(self) -> bool:
+        return self.start_ms < self.keep_from_ms
+
+
+def plan_chunks(duration_ms: int, silences: list[tuple[int, int]], max_ms: int, min_ms: int, overlap_ms: int) -> list[Chunk]:
+    """Cuts at the latest silence inside each [min, max] window; without one, cuts hard with overlap.
+
+    `keep_from_ms`/`keep_until_ms` mark the part of each chunk that counts
+    towards the stitched result, so audio transcribed twice around a hard
+    cut is only kept once.
+    """
+    # Every cut must land past the previous one, or the loop never ends.
+    min_ms = max(1, min_ms)
+    max_ms = max(min_ms, max_ms)
+    chunks = []
+    start, keep_from = 0, 0
+    while start < duration_ms:
+        if duration_ms - keep_from <= max_ms:
+            chunks.append(Chunk(start, duration_ms, keep_from, duration_ms))
+            break
+
+        window_start, window_end = keep_from + min_ms, keep_from + max_ms
+        cut = None
+        for silence_start, silence_end in silences:
+            middle = (silence_start + silence_end) // 2
+            if window_start <= middle <= window_end:
+                cut = middle
+            elif middle > window_end:
+                break
+
+        if cut is not None:
+            chunks.append(Chunk(start, cut, keep_from, cut))
+            start, keep_from = cut, cut
+        else:
+            cut = window_end
+            chunks.append(Chunk(start, min(duration_ms, cut + overlap_ms // 2), keep_from, cut))
+            start, keep_from = max(0, cut - overlap_ms // 2), cut
+
+    return chunks
+
+
+def _transcribe_chunk(audio: PCMAudio, chunk: Chunk, model: str, language_code: str) -> list[dict]:
+    wav_bytes = audio.slice(chunk.start_ms / 1000, chunk.end_ms / 1000).to_wav_bytes()
+    timestamped = model in TIMESTAMPED_MODELS
+    count_bytes("openai-long", "provider_call", len(wav_bytes))
+    with time_stage("openai-long", "provider_call"):
+        response = client.audio.transcriptions.create(
+            model=model,
+            file=("chunk.wav", wav_bytes),
+            language=language_code,
+            response_format="verbose_json" if timestamped else "text"
+        )
+
+    offset = chunk.start_ms / 1000
+    if not timestamped:
+        return [{"start": chunk.keep_from_ms / 1000, "end": chunk.keep_until_ms / 1000, "text": str(response).strip()}]
+
+    segments = []
+    for segment in response.segments or []:
+        start, end = segment.start + offset, segment.end + offset
+        middle_ms = (start + end) * 500
+        if chunk.keep_from_ms <= middle_ms < chunk.keep_until_ms:
+            segments.append({"start": round(start, 3), "end": round(end, 3), "text": segment.text.strip()})
+    return segments
+
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _drop_repeated_prefix(previous: str, current: str, max_words: int = 20) -> str:
+    """Removes words at the start of `current` that repeat the end of `previous` (overlap re-transcribed)."""
+    previous_words = [w.lower() for w in _WORD.findall(previous)][-max_words:]
+    tokens = current.split()
+    current_words = [" ".join(_WORD.findall(token)).lower() for token in tokens[:max_words]]
+    for size in range(min(len(previous_words), len(current_words)), 0, -1):
+        if previous_words[-size:] == current_words[:size]:
+            return " ".join(tokens[size:])
+    return current
+
+
+def _stitch_chunk(segments: list[dict], previous_text: str | None, overlaps_previous: bool) -> list[dict]:
+    stitched = []
+    for position, segment in enumerate(segments):
+        text = segment["text"]
+        if position == 0 and overlaps_previous and previous_text:
+            text = _drop_repeated_prefix(previous_text, text)
+        if text:
+            stitched.append({**segment, "text": text})
+    return stitched
+
+
+def _plan(pcm: PCMAudio, max_chunk_seconds: float, min_chunk_seconds: float) -> list[Chunk]:
+    # pydub only drives silence detection here; it wraps the decoded buffer
+    # rather than decoding the file a second time.
+    audio = AudioSegment(data=pcm.data, sample_width=SAMPLE_WIDTH, frame_rate=pcm.sample_rate, channels=1)
+
+    silences = detect_silence(audio, min_silence_len=500, silence_thresh=audio.dBFS - 16, seek_step=10)
+    return plan_chunks(
+        len(audio),
+        silences,
+        max_ms=int(max_chunk_seconds * 1000),
+        min_ms=int(min_chunk_seconds * 1000),
+        overlap_ms=int(LONG_AUDIO_OVERLAP_SECONDS * 1000),
+    )
+
+
+def iter_long_audio(audio_path: str, provider: str, language_code: str = "en", fan_out: int = LONG_AUDIO_FAN_OUT,
+                    max_chunk_seconds: float = LONG_AUDIO_MAX_CHUNK_SECONDS,
+                    min_chunk_seconds: float = LONG_AUDIO_MIN_CHUNK_SECONDS):
+    """Yields stitched segments in order as soon as each chunk (and every chunk before it) is transcribed."""
+    model = OPENAI_MODELS[provider]
+    with time_stage("openai-long", "transcode"):
+        pcm = decode_to_pcm(audio_path)
+    chunks = _plan(pcm, max_chunk_seconds, min_chunk_seconds)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, fan_out), thread_name_prefix="long-audio")
+    try:
+        results = executor.map(lambda chunk: _transcribe_chunk(pcm, chunk, model, language_code), chunks)
+        previous_text = None
+        for chunk, segments in zip(chunks, results):
+            with time_stage("openai-long", "postprocess"):
+                segments = _stitch_chunk(segments, previous_text, chunk.overlaps_previous)
+            if segments:
+                previous_text = segments[-1]["text"]
+            yield from segments
+    finally:
+        # A consumer that stops early should not wait for chunks nobody will read.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def transcribe_long_audio(audio_path: str, provider: str, language_code: str = "en",
+                          fan_out: int = LONG_AUDIO_FAN_OUT) -> tuple[str, list[dict]]:
+    """Splits long audio on silence and transcribes the chunks concurrently; returns (text, segments)."""
+    segments = list(iter_long_audio(audio_path, provider, language_code, fan_out))
+    return " ".join(segment["text"] for segment in segments), segments
@@ -0,0 +1,55 @@
+import threading
+
+from core.dispatch import run_blocking
+from core.routing import transcription_router
+from transcribers.aws_transcriber import transcribe_aws
+from transcribers.azure_multilingual import transcribe_azure_fast_multilingual_async
+from transcribers.azure_transcriber import transcribe_azure_fast_async
+from transcribers.google_new import transcribe_streaming_google
+from transcribers.google_transcriber import transcribe_google
+from transcribers.gpt_4o import transcribe_with_gpt_4o
+from transcribers.gpt_4o_mini import transcribe_with_gpt_4o_mini
+from transcribers.whisper import transcribe_with_whisper
+
+TRANSCRIPTION_PROVIDERS = (
+    "google-new", "google", "azure-fast", "aws", "azure-fast-multilingual",
+    "whisper", "gpt_4o", "gpt_4o_mini",
+)
+
+OPENAI_TRANSCRIBERS = {
+    "whisper": transcribe_with_whisper,
+    "gpt_4o": transcribe_with_gpt_4o,
+    "gpt_4o_mini": transcribe_with_gpt_4o_mini,
+}
+
+
+async def transcribe_with(provider: str, audio_path: str, language_code: str, file_type: str,
+                          cancel: threading.Event | None = None) -> str:
+    """Runs one provider on a spooled file and returns the transcript text.
+
+    `language_code` is BCP-47 (en-US); OpenAI models get the bare language.
+    `cancel` lets a caller abandon providers that poll (AWS); the async Azure
+    paths stop when the awaiting task is cancelled. Every call feeds the
+    transcription router's latency and error stats.
+    """
+    if provider not in TRANSCRIPTION_PROVIDERS:
+        raise ValueError(f"Invalid transcription provider: {provider}")
+    with transcription_router.track(provider, language_code):
+        return await _transcribe(provider, audio_path, language_code, file_type, cancel)
+
+
+async def _transcribe(provider: str, audio_path: str, language_code: str, file_type: str,
+                      cancel: threading.Event | None) -> str:
+    if provider == "google-new":
+        return await run_blocking(provider, transcribe_streaming_google, audio_path, language_code)
+    if provider == "google":
+        return await run_blocking(provider, transcribe_google, audio_path, language_code)
+    if provider == "azure-fast":
+        return await transcribe_azure_fast_async(audio_path, language_code, file_type=file_type)
+    if provider == "aws":
+        return await run_blocking(provider, transcribe_aws, audio_path, language_code, cancel=cancel)
+    if provider == "azure-fast-multilingual":
+        return await transcribe_azure_fast_multilingual_async(audio_path, file_type=file_type)
+    if provider in OPENAI_TRANSCRIBERS:
+        text, _ = await run_blocking(provider, OPENAI_TRANSCRIBERS[provider], audio_path, language_code.split("-")[0])
+        return text
@@ -4,18 +4,30 @@ os.environ["HF_HUB_DISABLE_SYMLINKS"] = "1"
 os.environ["HF_HUB_ENABLE_HF_TRANSFER"] = "1"
 os.environ["PYANNOTE_CACHE"] = os.path.expanduser("~/.cache/torch/pyannote")
 
-import whisper
-import ffmpeg
 import srt
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from huggingface_hub import login, snapshot_download
 from pyannote.audio import Pipeline
+from core.audio import decode_to_pcm
+from core.metrics import time_stage
+from core.waiter import JobCancelled
+from transcribers.alignment import group_by_turn, turns_from_pyannote, words_from_whisper
+from transcribers.whisper_local import whisper_models
 
 
 load_dotenv()
 HUGGINGFACE_TOKEN = os.getenv("HF_TOKEN")
 
+# Diarization and Whisper both only read the decoded samples, so by default they
+# run side by side. Set PYANNOTE_CONCURRENT=0 to run them one after another
+# when memory is tight. PYANNOTE_TORCH_THREADS is the intra-op thread budget,
+# split evenly between the two stages when they run side by side (defaults
+# to all cores).
+PYANNOTE_CONCURRENT = os.getenv("PYANNOTE_CONCURRENT", "1") == "1"
+PYANNOTE_TORCH_THREADS = int(os.getenv("PYANNOTE_TORCH_THREADS", os.cpu_count() or 2))
+
 
 pipeline = None
 if HUGGINGFACE_TOKEN:
@@ -38,62 +50,107 @@ else:
     print("❌ Hugging Face token not found")
 
 
-def transcribe_and_diarize(audio_path: str, language_code: str = "en") -> str:
-    """Transcribes and diarizes the input audio, returns path to SRT file"""
-    if not pipeline:
-        raise RuntimeError("Diarization pipeline unavailable")
+def _configure_torch_threads():
+    # torch's intra-op thread count is process-wide (it also sizes the MKL and
+    # pthreadpool pools), so it is set once here rather than per call. When
+    # the stages run side by side each gets half of the budget.
+    import torch
 
-    wav_path = os.path.splitext(audio_path)[0] + "_converted.wav"
-    srt_path = os.path.splitext(audio_path)[0] + ".srt"
+    stages = 2 if PYANNOTE_CONCURRENT else 1
+    torch.set_num_threads(max(1, PYANNOTE_TORCH_THREADS // stages))
 
-    try:
-        
-        (
-            ffmpeg.input(audio_path)
-            .output(wav_path, ar=16000, ac=1)
-            .run(overwrite_output=True, quiet=True)
-        )
 
-        
-        diarization = pipeline(wav_path, num_speakers=2)
+if pipeline is not None:
+    _configure_torch_threads()
+
+
+def _load_waveform(audio_path: str):
+    """Decodes once into a float32 array shared by the pyannote waveform dict and Whisper."""
+    import torch
+
+    audio = decode_to_pcm(audio_path)
+    samples = audio.to_float32()
+    # torch.from_numpy shares the array's memory, so both stages read one buffer.
+    waveform = {"waveform": torch.from_numpy(samples).unsqueeze(0), "sample_rate": audio.sample_rate}
+    return waveform, samples
+
+
+def _diarize_and_transcribe(waveform: dict, samples, language_code: str, concurrent: bool):
+    if not concurrent:
+        diarization = pipeline(waveform, num_speakers=2)
+        result = whisper_models.transcribe(samples, language=language_code, word_timestamps=True)
+        return diarization, result
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="pyannote-diarize") as executor:
+        diarization_future = executor.submit(pipeline, waveform, num_speakers=2)
+        result = whisper_models.transcribe(samples, language=language_code, word_timestamps=True)
+        diarization = diarization_future.result()
 
-        
-        model = whisper.load_model("large")  
-        result = model.transcribe(wav_path, language=language_code, word_timestamps=True)
+    return diarization, result
 
-        
-        segments = []
-        speakers = {}
-        for turn, _, speaker in diarization.itertracks(yield_label=True):
-            if speaker not in speakers:
-                speakers[speaker] = f"Speaker {len(speakers) + 1}"
 
-            words = []
-            for seg in result["segments"]:
-                for word in seg.get("words", []):
-                    if turn.start <= word["start"] and word["end"] <= turn.end:
-                        words.append(word["word"])
+def _write_srt(diarization, result, srt_path: str):
+    turns = turns_from_pyannote(diarization)
+    words_per_turn = group_by_turn(turns, words_from_whisper(result))
 
-            text = " ".join(words)
+    segments = []
+    speakers = {}
+    for turn, words in zip(turns, words_per_turn):
+        speaker = turn.speaker
+        if speaker not in speakers:
+            speakers[speaker] = f"Speaker {len(speakers) + 1}"
 
-            if text:
-                segments.append(srt.Subtitle(
-                    index=len(segments) + 1,
-                    start=datetime.timedelta(seconds=turn.start),
-                    end=datetime.timedelta(seconds=turn.end),
-                    content=f"[{speakers[speaker]}] {text}"
-                ))
+        text = " ".join(word.text for word in words)
+
+        if text:
+            segments.append(srt.Subtitle(
+                index=len(segments) + 1,
+                start=datetime.timedelta(seconds=turn.start),
+                end=datetime.timedelta(seconds=turn.end),
+                content=f"[{speakers[speaker]}] {text}"
+            ))
+
+    with open(srt_path, "w", encoding="utf-8") as f:
+        f.write(srt.compose(segments))
+
+
+def transcribe_and_diarize(audio_path: str, language_code: str = "en", concurrent: bool | None = None,
+                           progress=None, cancel=None) -> str:
+    """Transcribes and diarizes the input audio, returns path to SRT file
+
+    `progress(fraction, message)` and the `cancel` event are optional hooks
+    used by the job API; a cancel is honoured between stages.
+    """
+    def checkpoint(fraction: float, message: str):
+        if cancel is not None and cancel.is_set():
+            raise JobCancelled("Diarization was cancelled")
+        if progress:
+            progress(fraction, message)
+
+    if not pipeline:
+        raise RuntimeError("Diarization pipeline unavailable")
+
+    srt_path = os.path.splitext(audio_path)[0] + ".srt"
+
+    try:
+        checkpoint(0.0, "Decoding audio")
+        with time_stage("pyannote", "transcode"):
+            waveform, samples = _load_waveform(audio_path)
 
+        checkpoint(0.1, "Diarizing and transcribing")
+        if concurrent is None:
+            concurrent = PYANNOTE_CONCURRENT
+        with time_stage("pyannote", "provider_call"):
+            diarization, result = _diarize_and_transcribe(waveform, samples, language_code, concurrent)
 
-        
-        with open(srt_path, "w", encoding="utf-8") as f:
-            f.write(srt.compose(segments))
+        checkpoint(0.9, "Aligning speakers")
+        with time_stage("pyannote", "postprocess"):
+            _write_srt(diarization, result, srt_path)
 
         print(f"✅ Subtitle saved at: {srt_path}")
         return srt_path
 
+    except JobCancelled:
+        raise
     except Exception as e:
         raise RuntimeError(f"Processing failed: {e}")
-    finally:
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
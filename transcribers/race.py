@@ -0,0 +1,101 @@
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict
+
+from transcribers.providers import TRANSCRIPTION_PROVIDERS, transcribe_with
+
+# Providers raced by default (override per request with the race_providers form field).
+TRANSCRIBE_RACE_PROVIDERS = tuple(
+    p.strip() for p in os.getenv("TRANSCRIBE_RACE_PROVIDERS", "google,azure-fast,whisper").split(",") if p.strip()
+)
+
+
+class RaceFailed(Exception):
+    def __init__(self, errors: dict):
+        self.errors = errors
+        super().__init__("All raced providers failed: " + "; ".join(f"{p}: {e}" for p, e in errors.items()))
+
+
+class RaceStats:
+    """Wins, failures and winning latency per language and provider, for picking race subsets."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wins = defaultdict(lambda: defaultdict(int))
+        self._failures = defaultdict(lambda: defaultdict(int))
+        self._latency = defaultdict(lambda: defaultdict(float))
+
+    def record(self, language_code: str, winner: str | None, latency: float | None, errors: dict):
+        with self._lock:
+            if winner is not None:
+                self._wins[language_code][winner] += 1
+                self._latency[language_code][winner] += latency
+            for provider in errors:
+                self._failures[language_code][provider] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            languages = set(self._wins) | set(self._failures)
+            return {
+                language: {
+                    "wins": dict(self._wins[language]),
+                    "failures": dict(self._failures[language]),
+                    "mean_win_latency": {
+                        provider: round(self._latency[language][provider] / wins, 3)
+                        for provider, wins in self._wins[language].items()
+                    },
+                }
+                for language in languages
+            }
+
+
+race_stats = RaceStats()
+
+
+def parse_race_providers(value: str | None) -> tuple[str, ...]:
+    providers = tuple(dict.fromkeys(p.strip().lower() for p in value.split(",") if p.strip())) if value else TRANSCRIBE_RACE_PROVIDERS
+    unknown = [p for p in providers if p not in TRANSCRIPTION_PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unknown providers in race: {', '.join(unknown)}")
+    if len(providers) < 2:
+        raise ValueError("A race needs at least two providers")
+    return providers
+
+
+async def race_transcription(providers: tuple[str, ...], audio_path: str, language_code: str,
+                             file_type: str) -> tuple[str, str]:
+    """Sends the same audio to every provider at once and returns (winner, text) for the first non-empty result.
+
+    Losers are cancelled as soon as there is a winner: queued blocking calls
+    never start, AWS stops polling through its cancel event, and async Azure
+    requests are dropped. Blocking SDK calls already in flight (Google,
+    OpenAI) cannot be interrupted; they finish on their worker and are discarded.
+    """
+    start = time.monotonic()
+    cancel = threading.Event()
+    tasks = {
+        asyncio.create_task(transcribe_with(provider, audio_path, language_code, file_type, cancel=cancel)): provider
+        for provider in providers
+    }
+    errors = {}
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                provider = tasks[task]
+                if task.exception() is not None:
+                    errors[provider] = str(task.exception())
+                elif not (task.result() or "").strip():
+                    errors[provider] = "empty transcript"
+                else:
+                    race_stats.record(language_code, provider, time.monotonic() - start, errors)
+                    return provider, task.result()
+        race_stats.record(language_code, None, None, errors)
+        raise RaceFailed(errors)
+    finally:
+        cancel.set()
+        for task in tasks:
+            task.cancel()
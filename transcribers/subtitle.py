@@ -1,43 +1,61 @@
 import os
 import uuid
-import tempfile
-import shutil
 import datetime
 import zipfile
-from pydub import AudioSegment
-from google.cloud import storage
 from google.cloud import speech_v1p1beta1 as speech
+from core.artifacts import artifact_index
+from core.audio import TARGET_SAMPLE_RATE, PCMAudio, decode_to_pcm
+from core.clients import google_speech_beta_client
+from core.cloud_storage import delete_gcs, upload_gcs
+from core.metrics import time_stage
+from core.waiter import JobCancelled, JobWaiter, PollPolicy
+from transcribers.alignment import Word, assign_to_turns, turns_from_speaker_tags
+
+BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "ayush_bucket_0716")
+RECOGNIZE_TIMEOUT_SECONDS = 1800
+
+def upload_to_gcs(pcm: PCMAudio, dest_blob_name: str) -> str:
+    """Stages `pcm` as a WAV object for long_running_recognize, streamed straight from the decoded samples."""
+    return upload_gcs([pcm.wav_header(), pcm.data], BUCKET_NAME, dest_blob_name, "audio/wav")
+
+def _speaker_turns(response):
+    # With diarization enabled, Google repeats every word of the recording with
+    # its speaker_tag in the last result; tag 0 means no speaker was assigned.
+    if not response.results:
+        return []
+    words = response.results[-1].alternatives[0].words
+    if not any(word.speaker_tag for word in words):
+        return []
+    return turns_from_speaker_tags(words)
 
-BUCKET_NAME = "ayush_bucket_0716"  
+def format_srt(response, output_path: str):
+    cues = []
+    for result in response.results:
+        alt = result.alternatives[0]
+        if not alt.words:
+            continue
 
-def upload_to_gcs(local_path: str, dest_blob_name: str) -> str:
-    client = storage.Client()
-    bucket = storage.Client().bucket(BUCKET_NAME)
-    blob = bucket.blob(dest_blob_name)
-    blob.upload_from_filename(local_path)
-    return f"gs://{BUCKET_NAME}/{dest_blob_name}"
+        start = alt.words[0].start_time.total_seconds()
+        end = alt.words[-1].end_time.total_seconds()
+        cues.append(Word(start, end, alt.transcript.strip()))
 
-def format_srt(response, output_path: str):
-    index = 1
-    with open(output_path, "w", encoding="utf-8") as f:
-        for result in response.results:
-            alt = result.alternatives[0]
-            if not alt.words:
-                continue
+    turns = _speaker_turns(response)
+    cue_turns = assign_to_turns(turns, cues) if turns else [None] * len(cues)
 
-            start = alt.words[0].start_time.total_seconds()
-            end = alt.words[-1].end_time.total_seconds()
-            text = alt.transcript.strip()
+    def fmt_time(seconds):
+        td = datetime.timedelta(seconds=int(seconds))
+        millis = int((seconds - int(seconds)) * 1000)
+        return f"{str(td)},{millis:03d}"
 
-            def fmt_time(seconds):
-                td = datetime.timedelta(seconds=int(seconds))
-                millis = int((seconds - int(seconds)) * 1000)
-                return f"{str(td)},{millis:03d}"
+    with open(output_path, "w", encoding="utf-8") as f:
+        for index, (cue, turn_index) in enumerate(zip(cues, cue_turns), start=1):
+            text = cue.text
+            if turn_index is not None:
+                text = f"[Speaker {turns[turn_index].speaker}] {text}"
 
             f.write(f"{index}\n")
-            f.write(f"{fmt_time(start)} --> {fmt_time(end)}\n")
+            f.write(f"{fmt_time(cue.start)} --> {fmt_time(cue.end)}\n")
             f.write(f"{text}\n\n")
-            index += 1
 
 def format_speaker_transcript(response, output_path: str):
     result = response.results[-1]
@@ -59,28 +77,51 @@ def format_speaker_transcript(response, output_path: str):
         if line:
             f.write(f"Speaker {current_speaker}: {line.strip()}\n")
 
-def process_audio_and_generate_outputs(file, language_code: str) -> str:
-    temp_dir = tempfile.mkdtemp()
-    mp3_path = os.path.join(temp_dir, f"{uuid.uuid4()}.mp3")
-    wav_path = mp3_path.replace(".mp3", ".wav")
-    srt_path = mp3_path.replace(".mp3", ".srt")
-    txt_path = mp3_path.replace(".mp3", "_speakers.txt")
-    zip_path = mp3_path.replace(".mp3", ".zip")
-
-    with open(mp3_path, "wb") as f_out:
-        shutil.copyfileobj(file, f_out)
-
-    audio = AudioSegment.from_file(mp3_path)
-    audio = audio.set_channels(1).set_frame_rate(16000)
-    audio.export(wav_path, format="wav")
-
-    gcs_uri = upload_to_gcs(wav_path, os.path.basename(wav_path))
-
-    client = speech.SpeechClient()
+def _wait_for_operation(operation, audio_seconds: float, progress=None, cancel=None):
+    """Polls the long-running recognize operation, reporting Google's progress_percent."""
+    policy = PollPolicy.for_duration(audio_seconds)
+    policy.deadline = max(policy.deadline, RECOGNIZE_TIMEOUT_SECONDS)
+
+    def probe():
+        if operation.done():
+            return operation.result()
+        if progress and operation.metadata is not None:
+            progress(0.15 + 0.75 * operation.metadata.progress_percent / 100, "Transcribing")
+        return None
+
+    try:
+        return JobWaiter(policy, name="subtitle").wait(operation.operation.name, probe, cancel=cancel)
+    except JobCancelled:
+        operation.cancel()
+        raise
+
+def process_audio_and_generate_outputs(audio_path: str, language_code: str, progress=None, cancel=None) -> str:
+    """`progress(fraction, message)` and the `cancel` event are optional hooks used by the job API."""
+    # Swept by the artifact janitor if the caller does not remove it.
+    temp_dir = artifact_index.scratch_dir("subtitle")
+    base_path = os.path.join(temp_dir, str(uuid.uuid4()))
+    srt_path = base_path + ".srt"
+    txt_path = base_path + "_speakers.txt"
+    zip_path = base_path + ".zip"
+
+    # Decoded through ffmpeg pipes and uploaded straight from memory; the WAV
+    # is never written to the local disk or copied into one buffer.
+    if progress:
+        progress(0.0, "Decoding audio")
+    with time_stage("subtitle", "transcode"):
+        pcm = decode_to_pcm(audio_path)
+        audio_seconds = pcm.duration
+    if progress:
+        progress(0.05, "Uploading audio")
+    blob_name = os.path.basename(base_path) + ".wav"
+    gcs_uri = upload_to_gcs(pcm, blob_name)
+    del pcm
+
+    client = google_speech_beta_client()
     audio = speech.RecognitionAudio(uri=gcs_uri)
     config = speech.RecognitionConfig(
         encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-        sample_rate_hertz=16000,
+        sample_rate_hertz=TARGET_SAMPLE_RATE,
         language_code=language_code,
         enable_word_time_offsets=True,
         enable_automatic_punctuation=True,
@@ -88,16 +129,26 @@ def process_audio_and_generate_outputs(file, language_code: str) -> str:
         diarization_speaker_count=2,
     )
 
-    print("Starting transcription with speaker diarization...")
-    operation = client.long_running_recognize(config=config, audio=audio)
-    response = operation.result(timeout=1800)
+    # The staged WAV is only needed while the operation runs.
+    try:
+        print("Starting transcription with speaker diarization...")
+        with time_stage("subtitle", "provider_call"):
+            operation = client.long_running_recognize(config=config, audio=audio)
+        if progress:
+            progress(0.15, "Transcribing")
+        response = _wait_for_operation(operation, audio_seconds, progress, cancel)
+    finally:
+        delete_gcs(BUCKET_NAME, blob_name)
     print("Transcription complete")
+    if progress:
+        progress(0.95, "Writing outputs")
 
-    format_srt(response, srt_path)
-    format_speaker_transcript(response, txt_path)
+    with time_stage("subtitle", "postprocess"):
+        format_srt(response, srt_path)
+        format_speaker_transcript(response, txt_path)
 
-    with zipfile.ZipFile(zip_path, "w") as zipf:
-        zipf.write(srt_path, arcname="transcript.srt")
-        zipf.write(txt_path, arcname="transcript_speakers.txt")
+        with zipfile.ZipFile(zip_path, "w") as zipf:
+            zipf.write(srt_path, arcname="transcript.srt")
+            zipf.write(txt_path, arcname="transcript_speakers.txt")
 
     return zip_path
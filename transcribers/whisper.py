@@ -1,5 +1,4 @@
 import openai
-import tempfile
 import time
 from typing import Tuple
 import os
@@ -9,20 +8,16 @@ OPENAI_API_KEY=os.getenv("OPENAI_API_KEY")
 
 client = openai.OpenAI(api_key=OPENAI_API_KEY)  
 
-def transcribe_with_whisper(file_bytes: bytes, language_code: str = "en") -> Tuple[str, float]:
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_audio:
-        temp_audio.write(file_bytes)
-        temp_audio.flush()
-
-        start_time = time.time()
-        with open(temp_audio.name, "rb") as audio_file:
-            transcript_response = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                language=language_code,
-                response_format="text"
-            )
-        end_time = time.time()
+def transcribe_with_whisper(audio_path: str, language_code: str = "en") -> Tuple[str, float]:
+    start_time = time.time()
+    with open(audio_path, "rb") as audio_file:
+        transcript_response = client.audio.transcriptions.create(
+            model="whisper-1",
+            file=audio_file,
+            language=language_code,
+            response_format="text"
+        )
+    end_time = time.time()
 
     latency = end_time - start_time
     return transcript_response, latency
@@ -0,0 +1,142 @@
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WHISPER_SIZES = ("tiny", "base", "small", "medium", "large")
+
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "large")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE")
+WHISPER_QUANTIZE = os.getenv("WHISPER_QUANTIZE", "0") == "1"
+WHISPER_POOL_SIZE = int(os.getenv("WHISPER_POOL_SIZE", "1"))
+WHISPER_IDLE_TIMEOUT = float(os.getenv("WHISPER_IDLE_TIMEOUT", "900"))
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "0") == "1"
+
+
+class WhisperModelManager:
+    """Keeps local Whisper models resident and hands them out one request at a time.
+
+    A Whisper model installs per-call kv-cache hooks while decoding, so a
+    single instance cannot serve two transcriptions at once. Up to
+    `pool_size` copies are loaded on demand; further callers wait for a free
+    copy instead of allocating their own. All copies are dropped once the
+    pool has been idle for `idle_timeout` seconds (0 keeps them forever).
+    """
+
+    def __init__(self, size: str = WHISPER_MODEL_SIZE, device: str | None = WHISPER_DEVICE,
+                 quantize: bool = WHISPER_QUANTIZE, pool_size: int = WHISPER_POOL_SIZE,
+                 idle_timeout: float = WHISPER_IDLE_TIMEOUT):
+        if size not in WHISPER_SIZES:
+            raise ValueError(f"Unsupported Whisper model size '{size}', choose from {', '.join(WHISPER_SIZES)}")
+
+        self.size = size
+        self.device = device
+        self.quantize = quantize
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._loaded = 0
+        self._last_used = time.monotonic()
+        self._reaper = None
+
+    @property
+    def loaded(self) -> int:
+        return self._loaded
+
+    def _resolve_device(self) -> str:
+        if self.device:
+            return self.device
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _load(self):
+        import whisper
+
+        device = self._resolve_device()
+        model = whisper.load_model(self.size, device=device)
+        if self.quantize and device == "cpu":
+            import torch
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    @contextmanager
+    def acquire(self):
+        self._slots.acquire()
+        model = None
+        try:
+            with self._lock:
+                if self._idle:
+                    model = self._idle.pop()
+            if model is None:
+                model = self._load()
+                with self._lock:
+                    self._loaded += 1
+                self._start_reaper()
+            yield model
+        finally:
+            if model is not None:
+                with self._lock:
+                    self._idle.append(model)
+                    self._last_used = time.monotonic()
+            self._slots.release()
+
+    def transcribe(self, audio, **kwargs) -> dict:
+        kwargs.setdefault("fp16", self._resolve_device() != "cpu")
+        with self.acquire() as model:
+            return model.transcribe(audio, **kwargs)
+
+    def warm(self):
+        with self.acquire():
+            pass
+
+    def evict_if_idle(self) -> bool:
+        with self._lock:
+            idle_for = time.monotonic() - self._last_used
+            if not self._idle or len(self._idle) != self._loaded or idle_for < self.idle_timeout:
+                return False
+            self._idle.clear()
+            self._loaded = 0
+
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        return True
+
+    def _start_reaper(self):
+        if self.idle_timeout <= 0:
+            return
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap, name="whisper-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        interval = min(self.idle_timeout / 2, 60)
+        while True:
+            time.sleep(interval)
+            self.evict_if_idle()
+            with self._lock:
+                if self._loaded == 0:
+                    self._reaper = None
+                    return
+
+
+whisper_models = WhisperModelManager()
+
+
+def preload_in_background():
+    if WHISPER_PRELOAD:
+        threading.Thread(target=whisper_models.warm, name="whisper-preload", daemon=True).start()
@@ -1,9 +1,14 @@
 import os
 import google.generativeai as genai
 from dotenv import load_dotenv
+from translators.batching import build_batch_prompt, parse_batch_response, translate_with_resplit
 
 load_dotenv()
 
+# Segments and characters per structured request; chunks run concurrently.
+BATCH_MAX_SEGMENTS = int(os.getenv("GEMINI_BATCH_MAX_SEGMENTS", "100"))
+BATCH_MAX_CHARS = int(os.getenv("GEMINI_BATCH_MAX_CHARS", "8000"))
+
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 model = genai.GenerativeModel("models/gemini-1.5-flash")
@@ -17,3 +22,21 @@ def translate_text_gemini(text: str, target_language: str) -> str:
 )
     response = model.generate_content(prompt)
     return response.text.strip()
+
+
+def _translate_chunk_gemini(segments: list[str], target_language: str, source_language: str = None,
+                           context: dict = None) -> list[str] | None:
+    response = model.generate_content(
+        build_batch_prompt(segments, target_language, source_language, context),
+        generation_config={"response_mime_type": "application/json"}
+    )
+    return parse_batch_response(response.text, len(segments))
+
+
+def translate_text_gemini_batch(segments: list[str], target_language: str, source_language: str = None,
+                                context: dict = None) -> list[str]:
+    return translate_with_resplit(
+        segments,
+        lambda chunk: _translate_chunk_gemini(chunk, target_language, source_language, context),
+        lambda text: translate_text_gemini(text, target_language)
+    )
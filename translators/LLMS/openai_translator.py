@@ -1,11 +1,16 @@
 from openai import OpenAI
 import os
 from dotenv import load_dotenv
+from translators.batching import build_batch_prompt, parse_batch_response, translate_with_resplit
 
 load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Segments and characters per structured request; chunks run concurrently.
+BATCH_MAX_SEGMENTS = int(os.getenv("OPENAI_BATCH_MAX_SEGMENTS", "100"))
+BATCH_MAX_CHARS = int(os.getenv("OPENAI_BATCH_MAX_CHARS", "8000"))
+
 def translate_text(text: str, target_language: str) -> str:
     prompt = f"Translate this to {target_language}: '{text}'"
     
@@ -18,3 +23,25 @@ def translate_text(text: str, target_language: str) -> str:
     )
 
     return response.choices[0].message.content.strip()
+
+
+def _translate_chunk(segments: list[str], target_language: str, source_language: str = None,
+                     context: dict = None) -> list[str] | None:
+    response = client.chat.completions.create(
+        model="gpt-4o",
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": "You are a translation assistant."},
+            {"role": "user", "content": build_batch_prompt(segments, target_language, source_language, context)}
+        ]
+    )
+    return parse_batch_response(response.choices[0].message.content, len(segments))
+
+
+def translate_batch(segments: list[str], target_language: str, source_language: str = None,
+                    context: dict = None) -> list[str]:
+    return translate_with_resplit(
+        segments,
+        lambda chunk: _translate_chunk(chunk, target_language, source_language, context),
+        lambda text: translate_text(text, target_language)
+    )
@@ -0,0 +1,71 @@
+import json
+import re
+
+
+def chunk_segments(segments: list[str], max_items: int, max_chars: int) -> list[list[str]]:
+    """Packs segments, in order, into as few chunks as the item and character limits allow."""
+    chunks, current, size = [], [], 0
+    for segment in segments:
+        if current and (len(current) >= max_items or size + len(segment) > max_chars):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(segment)
+        size += len(segment)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_batch_prompt(segments: list[str], target_language: str, source_language: str | None = None,
+                       context: dict | None = None) -> str:
+    """`context` optionally carries the lines "before" and "after" the segments, shown to the model but not translated."""
+    source = f" from {source_language}" if source_language else ""
+    payload = json.dumps({"segments": segments}, ensure_ascii=False)
+    surrounding = ""
+    if context and (context.get("before") or context.get("after")):
+        surrounding = (
+            f"The segments are consecutive lines of a longer text. For context only, "
+            f"do not translate or return these: "
+            f"{json.dumps({'before': context.get('before', []), 'after': context.get('after', [])}, ensure_ascii=False)}\n\n"
+        )
+    return (
+        f"Translate each string in the JSON array \"segments\"{source} to {target_language}. "
+        f"Do not provide any transliteration or explanation. "
+        f"Keep the same number of items in the same order, translate each item on its own, "
+        f"and return only a JSON object of the form {{\"translations\": [...]}}.\n\n"
+        f"{surrounding}"
+        f"{payload}"
+    )
+
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def parse_batch_response(raw: str, expected: int) -> list[str] | None:
+    """Returns the translations list, or None when the model did not keep to the requested shape."""
+    try:
+        data = json.loads(_FENCE.sub("", raw.strip()))
+    except json.JSONDecodeError:
+        return None
+    translations = data.get("translations") if isinstance(data, dict) else data
+    if not isinstance(translations, list) or len(translations) != expected:
+        return None
+    if not all(isinstance(item, str) for item in translations):
+        return None
+    return [item.strip() for item in translations]
+
+
+def translate_with_resplit(segments: list[str], translate_many, translate_one) -> list[str]:
+    """Translates a chunk with one structured request, halving it whenever the reply cannot be re-split."""
+    if len(segments) == 1:
+        return [translate_one(segments[0])]
+
+    translations = translate_many(segments)
+    if translations is not None:
+        return translations
+
+    middle = len(segments) // 2
+    return (
+        translate_with_resplit(segments[:middle], translate_many, translate_one)
+        + translate_with_resplit(segments[middle:], translate_many, translate_one)
+    )
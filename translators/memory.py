@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+from dotenv import load_dotenv
+
+from core.cache import MemoryLRUBackend, build_backend
+
+load_dotenv()
+
+TRANSLATION_MEMORY_MAX_BYTES = int(os.getenv("TRANSLATION_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TranslationMemory:
+    """Exact-match translation memory: an in-process LRU in front of an optional persistent tier.
+
+    Entries are namespaced per provider, because two engines rarely agree on
+    a translation and callers asked for a specific one.
+    """
+
+    def __init__(self, memory_backend, persistent_backend=None):
+        self.memory = memory_backend
+        self.persistent = persistent_backend
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def key(self, provider: str, text: str, target_language: str, source_language: str | None = None) -> str:
+        material = json.dumps(
+            [provider, normalize(text), target_language.lower(), (source_language or "").lower()],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> str | None:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value.decode("utf-8")
+
+        if self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self.persistent_hits += 1
+                self.memory.set(key, value)
+                return value.decode("utf-8")
+
+        self.misses += 1
+        return None
+
+    def store(self, key: str, translation: str):
+        value = translation.encode("utf-8")
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, value)
+
+    async def translate(self, provider: str, text: str, target_language: str, source_language: str | None, fetch) -> str:
+        """Returns the remembered translation, or awaits `fetch(text)` and remembers its result."""
+        key = self.key(provider, text, target_language, source_language)
+        translation = self.lookup(key)
+        if translation is None:
+            translation = await fetch(text)
+            self.store(key, translation)
+        return translation
+
+    async def translate_batch(self, provider: str, texts: list[str], target_language: str,
+                              source_language: str | None, fetch_many) -> list[str]:
+        """Looks every text up and awaits `fetch_many(misses)` once for the distinct misses only."""
+        keys = [self.key(provider, text, target_language, source_language) for text in texts]
+        results: list[str | None] = [None] * len(texts)
+
+        missing: dict[str, str] = {}
+        for index, (key, text) in enumerate(zip(keys, texts)):
+            if key in missing:
+                continue
+            translation = self.lookup(key)
+            if translation is None:
+                missing[key] = text
+            else:
+                results[index] = translation
+
+        if missing:
+            translations = await fetch_many(list(missing.values()))
+            if len(translations) != len(missing):
+                raise Exception(f"Expected {len(missing)} translations from {provider}, got {len(translations)}")
+            fetched = dict(zip(missing.keys(), translations))
+            for key, translation in fetched.items():
+                self.store(key, translation)
+            for index, key in enumerate(keys):
+                if results[index] is None:
+                    results[index] = fetched[key]
+
+        return results
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+        }
+
+
+# TRANSLATION_MEMORY_BACKEND picks the persistent tier (sqlite, filesystem or
+# none); the in-process tier is always an LRU of TRANSLATION_MEMORY_MAX_BYTES.
+translation_memory = TranslationMemory(
+    MemoryLRUBackend(TRANSLATION_MEMORY_MAX_BYTES),
+    build_backend("TRANSLATION_MEMORY", default_backend="sqlite", default_path=".cache/translations.db"),
+)
@@ -0,0 +1,47 @@
+import asyncio
+
+from core.dispatch import run_blocking
+from translators.batching import chunk_segments
+from translators.LLMS import gemini_translator, openai_translator
+from translators.memory import translation_memory
+from translators.services import azure_translate
+
+BATCH_PROVIDERS = ("openai", "gemini", "azure")
+
+
+def _chunk_translator(provider: str, target_language: str, source_language: str | None, context: dict | None = None):
+    if provider == "azure":
+        async def translate_chunk(chunk: list[str]) -> list[str]:
+            return await azure_translate.translate_batch_azure_async(chunk, target_language, source_language)
+        return translate_chunk, azure_translate.BATCH_MAX_SEGMENTS, azure_translate.BATCH_MAX_CHARS
+
+    if provider == "openai":
+        module, translate_many = openai_translator, openai_translator.translate_batch
+    elif provider == "gemini":
+        module, translate_many = gemini_translator, gemini_translator.translate_text_gemini_batch
+    else:
+        raise ValueError(f"Unsupported translation provider: {provider}")
+
+    async def translate_chunk(chunk: list[str]) -> list[str]:
+        return await run_blocking(provider, translate_many, chunk, target_language, source_language, context)
+    return translate_chunk, module.BATCH_MAX_SEGMENTS, module.BATCH_MAX_CHARS
+
+
+async def translate_segments(provider: str, segments: list[str], target_language: str,
+                             source_language: str | None = None, context: dict | None = None) -> list[str]:
+    """Translates segments in order: translation-memory hits first, then the misses packed into
+    as few provider requests as its limits allow, with the chunks sent concurrently.
+
+    `context` ({"before": [...], "after": [...]}) is passed to LLM providers as surrounding text."""
+    translate_chunk, max_items, max_chars = _chunk_translator(provider, target_language, source_language, context)
+
+    async def fetch_many(misses: list[str]) -> list[str]:
+        translations = list(misses)
+        pending = [index for index, text in enumerate(misses) if text.strip()]
+        chunks = chunk_segments([misses[index] for index in pending], max_items, max_chars)
+        results = await asyncio.gather(*(translate_chunk(chunk) for chunk in chunks))
+        for index, translation in zip(pending, (t for chunk in results for t in chunk)):
+            translations[index] = translation
+        return translations
+
+    return await translation_memory.translate_batch(provider, segments, target_language, source_language, fetch_many)
@@ -1,6 +1,6 @@
 import os
-import requests
 from dotenv import load_dotenv
+from core.http_client import get_async_client
 
 load_dotenv()
 
@@ -8,7 +8,12 @@ AZURE_TRANSLATOR_KEY = os.getenv("AZURE_TRANSLATOR_KEY")
 AZURE_TRANSLATOR_REGION = os.getenv("AZURE_TRANSLATOR_REGION")
 AZURE_TRANSLATOR_ENDPOINT = os.getenv("AZURE_TRANSLATOR_ENDPOINT", "https://api.cognitive.microsofttranslator.com")
 
-def translate_text_azure(text: str, to_lang: str, from_lang: str = None) -> str:
+# Translator v3 accepts at most 1000 array elements and 50,000 characters per request.
+BATCH_MAX_SEGMENTS = 1000
+BATCH_MAX_CHARS = 50000
+
+
+def _build_request(to_lang: str, from_lang: str = None) -> tuple[str, dict]:
     if not AZURE_TRANSLATOR_KEY or not AZURE_TRANSLATOR_REGION:
         raise Exception("Azure credentials not set in .env")
 
@@ -21,11 +26,28 @@ def translate_text_azure(text: str, to_lang: str, from_lang: str = None) -> str:
         "Ocp-Apim-Subscription-Region": AZURE_TRANSLATOR_REGION,
         "Content-type": "application/json"
     }
+    return url, headers
+
+
+async def translate_text_azure_async(text: str, to_lang: str, from_lang: str = None) -> str:
+    url, headers = _build_request(to_lang, from_lang)
 
     body = [{"text": text}]
-    response = requests.post(url, headers=headers, json=body)
+    response = await get_async_client(url).post(url, headers=headers, json=body)
 
     if response.status_code != 200:
         raise Exception(f"Azure Translation failed: {response.status_code} - {response.text}")
 
     return response.json()[0]["translations"][0]["text"]
+
+
+async def translate_batch_azure_async(texts: list[str], to_lang: str, from_lang: str = None) -> list[str]:
+    url, headers = _build_request(to_lang, from_lang)
+
+    body = [{"text": text} for text in texts]
+    response = await get_async_client(url).post(url, headers=headers, json=body)
+
+    if response.status_code != 200:
+        raise Exception(f"Azure Translation failed: {response.status_code} - {response.text}")
+
+    return [item["translations"][0]["text"] for item in response.json()]
@@ -0,0 +1,86 @@
+import asyncio
+import io
+import os
+import re
+import zipfile
+
+import srt
+
+from translators.segments import translate_segments
+
+# Cues per translation window; windows are translated concurrently and
+# written out in order as each one (and every window before it) is done.
+SUBTITLE_WINDOW_CUES = int(os.getenv("SUBTITLE_WINDOW_CUES", "60"))
+SUBTITLE_CONCURRENT_WINDOWS = max(1, int(os.getenv("SUBTITLE_CONCURRENT_WINDOWS", "4")))
+# Neighbouring cues on each side shown to LLM providers as context.
+SUBTITLE_CONTEXT_CUES = int(os.getenv("SUBTITLE_CONTEXT_CUES", "3"))
+
+# "[Speaker 2] text", as written by the subtitle and pyannote pipelines.
+_SPEAKER_TAG = re.compile(r"^(\[Speaker [^\]]+\]\s*)")
+
+
+def read_subtitles(data: bytes) -> list[srt.Subtitle]:
+    """Parses an SRT file, or the transcript.srt inside a /transcribed/subtitle_file ZIP."""
+    if zipfile.is_zipfile(io.BytesIO(data)):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            names = [name for name in archive.namelist() if name.lower().endswith(".srt")]
+            if not names:
+                raise ValueError("ZIP archive contains no .srt file")
+            name = "transcript.srt" if "transcript.srt" in names else names[0]
+            data = archive.read(name)
+
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("Subtitle file is not UTF-8 encoded")
+    try:
+        # Sorted by start time only: cue numbers and empty cues are kept as written.
+        return sorted(srt.parse(text), key=lambda subtitle: (subtitle.start, subtitle.end))
+    except srt.SRTParseError as e:
+        raise ValueError(f"Invalid SRT: {e}")
+
+
+def split_speaker(content: str) -> tuple[str, str]:
+    """("[Speaker 1] ", "text") for a tagged cue, ("", content) otherwise."""
+    match = _SPEAKER_TAG.match(content)
+    if not match:
+        return "", content
+    return match.group(1), content[match.end():]
+
+
+async def translate_subtitles(provider: str, subtitles: list[srt.Subtitle], target_language: str,
+                              source_language: str | None = None):
+    """Async iterator over the translated SRT, one composed window of cues at a time.
+
+    Timing, numbering and speaker tags are kept; only the cue text is sent
+    to the provider.
+    """
+    tags, texts = zip(*(split_speaker(subtitle.content) for subtitle in subtitles)) if subtitles else ((), ())
+    windows = [range(start, min(start + SUBTITLE_WINDOW_CUES, len(subtitles)))
+               for start in range(0, len(subtitles), SUBTITLE_WINDOW_CUES)]
+
+    async def translate_window(window: range) -> str:
+        context = {
+            "before": list(texts[max(0, window.start - SUBTITLE_CONTEXT_CUES):window.start]),
+            "after": list(texts[window.stop:window.stop + SUBTITLE_CONTEXT_CUES]),
+        }
+        translations = await translate_segments(
+            provider, [texts[i] for i in window], target_language, source_language,
+            context if SUBTITLE_CONTEXT_CUES > 0 else None
+        )
+        cues = [
+            srt.Subtitle(index=subtitles[i].index, start=subtitles[i].start, end=subtitles[i].end,
+                         content=tags[i] + translation)
+            for i, translation in zip(window, translations)
+        ]
+        return srt.compose(cues, reindex=False)
+
+    tasks = []
+    try:
+        for index in range(len(windows)):
+            while len(tasks) < min(len(windows), index + SUBTITLE_CONCURRENT_WINDOWS):
+                tasks.append(asyncio.create_task(translate_window(windows[len(tasks)])))
+            yield await tasks[index]
+    finally:
+        for task in tasks:
+            task.cancel()